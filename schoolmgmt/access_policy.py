@@ -0,0 +1,85 @@
+from django.conf import settings
+
+# Flags a path can carry
+PUBLIC = 1           # AdminAuthMiddleware lets it through without looking at the session
+STUDENT_BLOCKED = 2  # StudentAccessMiddleware sends logged-in students back to their dashboard
+
+# Which paths are open and which are closed to students. 'exact' entries match
+# the whole path, 'prefix' entries must end with '/' and match that path and
+# everything below it. settings.ACCESS_POLICY replaces this when it is set.
+DEFAULT_ACCESS_POLICY = {
+    'public': {
+        'exact': [
+            '/', '/contact/', '/public-registration/', '/application-status/', '/public-school-calendar/',
+            # Login and student self-service pages
+            '/admin-login/', '/user-login/', '/login/', '/student-login/', '/student-dashboard/',
+            '/student-logout/', '/user-profile/',
+        ],
+        'prefix': ['/blog/', '/application-status/', '/admin/', '/media/', '/static/', '/auth/'],
+    },
+    'student_blocked': {
+        'exact': [],
+        'prefix': [
+            '/dashboard/', '/students/', '/studentlist/', '/teachers/', '/reports/', '/fees/',
+            '/marksheet-system/', '/admin/', '/user-management/', '/school-settings/',
+            '/website-settings/', '/student-daily-exp/', '/collection-dashboard/', '/attendance-report/',
+            '/create-exam/', '/create-subject/', '/enter-marks/', '/generate-results/',
+            '/fee-receipt-book/', '/admission-fee-table/', '/bulk-print-receipts/', '/photo-management/',
+            '/id-creation/', '/whatsapp-balance/',
+        ],
+    },
+}
+
+POLICY_FLAGS = {'public': PUBLIC, 'student_blocked': STUDENT_BLOCKED}
+
+
+class AccessPolicy:
+    """Path classifier compiled once from the declarative policy.
+
+    Exact paths and prefixes go into dictionaries keyed by path. A request path
+    is looked up whole, then cut at each '/' up to the depth of the deepest
+    prefix, so classifying costs a few dict lookups whatever the policy size.
+    """
+
+    def __init__(self, policy):
+        self.exact = {}
+        self.prefixes = {}
+        for name, flag in POLICY_FLAGS.items():
+            rules = policy.get(name, {})
+            for path in rules.get('exact', ()):
+                self.exact[path] = self.exact.get(path, 0) | flag
+            for prefix in rules.get('prefix', ()):
+                if not prefix.endswith('/'):
+                    raise ValueError(f'Access policy prefix "{prefix}" must end with "/"')
+                self.prefixes[prefix] = self.prefixes.get(prefix, 0) | flag
+        self.depth = max((prefix.count('/') - 1 for prefix in self.prefixes), default=0)
+
+    def classify(self, path):
+        """PUBLIC / STUDENT_BLOCKED flags for a request path (0 for neither)"""
+        flags = self.exact.get(path, 0)
+        end = 0
+        for _ in range(self.depth):
+            end = path.find('/', end + 1)
+            if end < 0:
+                break
+            flags |= self.prefixes.get(path[:end + 1], 0)
+        return flags
+
+
+_policy = None
+
+
+def get_access_policy():
+    """The compiled policy, built from settings on first use"""
+    global _policy
+    if _policy is None:
+        _policy = AccessPolicy(getattr(settings, 'ACCESS_POLICY', DEFAULT_ACCESS_POLICY))
+    return _policy
+
+
+def classify_request(request):
+    """Flags for request.path, worked out once and shared by both middlewares"""
+    flags = getattr(request, 'access_flags', None)
+    if flags is None:
+        flags = request.access_flags = get_access_policy().classify(request.path)
+    return flags
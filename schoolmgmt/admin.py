@@ -1,5 +1,9 @@
 from django.contrib import admin
-from .models import Student, FeeStructure, FeePayment, Session, Subject, Exam, Marksheet, StudentMarks, MarksheetData, StudentDailyExpense, SchoolDetail, AdminLogin, StudentRegistration, ContactEnquiry, HeroSlider, Blog, SchoolAttendance, Teacher, TeacherClassSubject, CalendarEvent, StudentAttendance
+from .models import Student, FeeStructure, FeePayment, FeePaymentItem, StudentFeeBalance, Session, Subject, Exam, Marksheet, ExamRanking, StudentMarks, MarksheetData, StudentDailyExpense, SchoolDetail, AdminLogin, StudentRegistration, ContactEnquiry, HeroSlider, Blog, SchoolAttendance, StudentMonthlyAttendance, ClassDailyAttendance, Teacher, TeacherClassSubject, CalendarEvent, StudentAttendance
+from .attendance_rollup import refresh_attendance_rollups
+from .fee_ledger import refresh_fee_balances
+from .school_calendar import invalidate_school_calendar
+from .teacher_directory import invalidate_teacher_coverage, with_assignments
 
 @admin.register(Student)
 class StudentAdmin(admin.ModelAdmin):
@@ -40,12 +44,37 @@ class FeeStructureAdmin(admin.ModelAdmin):
     list_filter = ['class_name']
     ordering = ['class_name']
 
+    def delete_queryset(self, request, queryset):
+        # Bulk deletes skip FeeStructure.delete(), so refresh the classes' balances here
+        class_names = list(queryset.values_list('class_name', flat=True))
+        super().delete_queryset(request, queryset)
+        refresh_fee_balances(Student.objects.filter(student_class__in=class_names))
+
+class FeePaymentItemInline(admin.TabularInline):
+    model = FeePaymentItem
+    fields = ['month', 'fee_type']
+    readonly_fields = ['month', 'fee_type']
+    extra = 0
+    can_delete = False
+    
+    def has_add_permission(self, request, obj=None):
+        return False
+
 @admin.register(FeePayment)
 class FeePaymentAdmin(admin.ModelAdmin):
     list_display = ['student', 'total_fee', 'payment_amount', 'balance', 'payment_method', 'created_at']
     list_filter = ['payment_method', 'created_at']
     search_fields = ['student__name']
     ordering = ['-created_at']
+    inlines = [FeePaymentItemInline]
+
+@admin.register(StudentFeeBalance)
+class StudentFeeBalanceAdmin(admin.ModelAdmin):
+    list_display = ['student', 'total_due', 'total_paid', 'unpaid_expenses', 'pending_amount', 'last_payment_date', 'updated_at']
+    search_fields = ['student__name', 'student__reg_number']
+    list_select_related = ['student']
+    ordering = ['-pending_amount']
+    readonly_fields = ['student', 'total_due', 'total_paid', 'unpaid_expenses', 'pending_amount', 'last_payment_date', 'updated_at']
 
 @admin.register(StudentMarks)
 class StudentMarksAdmin(admin.ModelAdmin):
@@ -90,6 +119,11 @@ class SubjectAdmin(admin.ModelAdmin):
             'fields': ('max_marks', 'pass_marks')
         }),
     )
+    
+    def delete_queryset(self, request, queryset):
+        # Bulk deletes skip Subject.delete()
+        super().delete_queryset(request, queryset)
+        invalidate_teacher_coverage()
 
 @admin.register(Exam)
 class ExamAdmin(admin.ModelAdmin):
@@ -105,6 +139,15 @@ class MarksheetAdmin(admin.ModelAdmin):
     search_fields = ['student__name', 'exam__name', 'subject__name']
     ordering = ['-exam__exam_date', 'student__name']
 
+@admin.register(ExamRanking)
+class ExamRankingAdmin(admin.ModelAdmin):
+    list_display = ['student', 'exam', 'section', 'obtained_marks', 'total_marks', 'percentage', 'gpa', 'class_rank', 'section_rank', 'updated_at']
+    list_filter = ['exam__class_name', 'exam__exam_type', 'section']
+    search_fields = ['student__name', 'student__reg_number', 'exam__name']
+    list_select_related = ['student', 'exam']
+    ordering = ['-exam__exam_date', 'class_rank']
+    readonly_fields = ['exam', 'student', 'section', 'total_marks', 'obtained_marks', 'percentage', 'gpa', 'failed_subjects', 'class_rank', 'section_rank', 'class_size', 'section_size', 'updated_at']
+
 @admin.register(SchoolDetail)
 class SchoolDetailAdmin(admin.ModelAdmin):
     list_display = ['school_name', 'phone', 'email', 'updated_at']
@@ -212,6 +255,38 @@ class SchoolAttendanceAdmin(admin.ModelAdmin):
             'fields': ('marked_by', 'date_nepali')
         }),
     )
+    
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        # save() recounted the record's new day; recount the one it was moved away from
+        if change and {'date', 'student'} & set(form.changed_data):
+            refresh_attendance_rollups(form.initial['date'], [form.initial['student']])
+    
+    def delete_queryset(self, request, queryset):
+        # Bulk deletes skip SchoolAttendance.delete(), so recount the rollups here
+        touched = {}
+        for day, student_id in queryset.values_list('date', 'student_id'):
+            touched.setdefault(day, set()).add(student_id)
+        super().delete_queryset(request, queryset)
+        for day, student_ids in touched.items():
+            refresh_attendance_rollups(day, student_ids)
+
+@admin.register(StudentMonthlyAttendance)
+class StudentMonthlyAttendanceAdmin(admin.ModelAdmin):
+    list_display = ['student', 'bs_year', 'bs_month', 'month_start', 'present', 'absent', 'late', 'updated_at']
+    list_filter = ['bs_year', 'bs_month', 'student__student_class']
+    search_fields = ['student__name', 'student__reg_number']
+    list_select_related = ['student']
+    ordering = ['-month_start', 'student__name']
+    readonly_fields = ['student', 'bs_year', 'bs_month', 'month_start', 'present', 'absent', 'late', 'updated_at']
+
+@admin.register(ClassDailyAttendance)
+class ClassDailyAttendanceAdmin(admin.ModelAdmin):
+    list_display = ['date', 'student_class', 'present', 'absent', 'late']
+    list_filter = ['student_class']
+    date_hierarchy = 'date'
+    ordering = ['-date', 'student_class']
+    readonly_fields = ['date', 'student_class', 'present', 'absent', 'late']
 
 class TeacherClassSubjectInline(admin.TabularInline):
     model = TeacherClassSubject
@@ -244,9 +319,18 @@ class TeacherAdmin(admin.ModelAdmin):
         }),
     )
     
+    def get_queryset(self, request):
+        # One prefetch for the assigned classes column instead of a query per row
+        return with_assignments(super().get_queryset(request))
+    
+    def delete_queryset(self, request, queryset):
+        # Bulk deletes skip Teacher.delete()
+        super().delete_queryset(request, queryset)
+        invalidate_teacher_coverage()
+    
     def get_assigned_classes_display(self, obj):
         """Display assigned classes in admin list"""
-        classes = obj.get_assigned_classes()
+        classes = list(dict.fromkeys(assignment.class_name for assignment in obj.assignments))
         return ', '.join(classes) if classes else 'No assignments'
     get_assigned_classes_display.short_description = 'Assigned Classes'
 
@@ -256,6 +340,11 @@ class TeacherClassSubjectAdmin(admin.ModelAdmin):
     list_filter = ['class_name', 'is_active', 'subject__specialization', 'created_at']
     search_fields = ['teacher__name', 'subject__name', 'class_name']
     ordering = ['teacher__name', 'class_name', 'subject__name']
+    
+    def delete_queryset(self, request, queryset):
+        # Bulk deletes skip TeacherClassSubject.delete()
+        super().delete_queryset(request, queryset)
+        invalidate_teacher_coverage()
     date_hierarchy = 'created_at'
     
     fieldsets = (
@@ -290,6 +379,11 @@ class CalendarEventAdmin(admin.ModelAdmin):
         }),
     )
 
+    def delete_queryset(self, request, queryset):
+        # Bulk deletes skip CalendarEvent.delete()
+        super().delete_queryset(request, queryset)
+        invalidate_school_calendar()
+
 @admin.register(StudentAttendance)
 class StudentAttendanceAdmin(admin.ModelAdmin):
     list_display = ['date', 'student', 'status', 'marked_by', 'created_at']
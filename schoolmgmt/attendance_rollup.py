@@ -0,0 +1,128 @@
+from datetime import datetime, timedelta
+from django.db import transaction
+from django.db.models import Max, Min, Q, Sum
+from .attendance_summary import ATTENDANCE_STATUSES, status_counts
+from .bikram_sambat import month_bounds, to_bs
+from .models import ClassDailyAttendance, SchoolAttendance, StudentMonthlyAttendance
+
+COUNT_FIELDS = list(ATTENDANCE_STATUSES)
+
+
+def _as_date(value):
+    return datetime.strptime(value, '%Y-%m-%d').date() if isinstance(value, str) else value
+
+
+def _month_of(day):
+    """(bs_year, bs_month, first AD day, last AD day) of the BS month containing day"""
+    year, month, _ = to_bs(day)
+    return (year, month) + month_bounds(year, month)
+
+
+def _student_months(year, month, first, last, records):
+    rows = records.filter(date__range=(first, last)).order_by().values('student_id').annotate(**status_counts())
+    return [StudentMonthlyAttendance(student_id=row['student_id'], bs_year=year, bs_month=month, month_start=first,
+                                     **{field: row[field] for field in COUNT_FIELDS})
+            for row in rows]
+
+
+def _class_days(records):
+    rows = records.order_by().values('date', 'student__student_class').annotate(**status_counts())
+    return [ClassDailyAttendance(date=row['date'], student_class=row['student__student_class'],
+                                 **{field: row[field] for field in COUNT_FIELDS})
+            for row in rows]
+
+
+def refresh_attendance_rollups(attendance_date, student_ids):
+    """Recount the rollup rows one day's attendance writes touch.
+
+    That is the BS month of attendance_date for each of student_ids, and
+    every class on attendance_date. Counts are taken from SchoolAttendance
+    rather than adjusted, so a changed status can never leave them off by one.
+    """
+    day = _as_date(attendance_date)
+    year, month, first, last = _month_of(day)
+    student_ids = list(student_ids)
+    months = _student_months(year, month, first, last, SchoolAttendance.objects.filter(student_id__in=student_ids))
+    # Students with nothing left in the month lose their row
+    emptied = set(student_ids) - {row.student_id for row in months}
+    with transaction.atomic():
+        if emptied:
+            StudentMonthlyAttendance.objects.filter(student_id__in=emptied, month_start=first).delete()
+        StudentMonthlyAttendance.objects.bulk_create(
+            months, update_conflicts=True, unique_fields=['student', 'month_start'],
+            update_fields=COUNT_FIELDS + ['updated_at'],
+        )
+        ClassDailyAttendance.objects.filter(date=day).delete()
+        ClassDailyAttendance.objects.bulk_create(_class_days(SchoolAttendance.objects.filter(date=day)))
+
+
+def rebuild_attendance_rollups():
+    """Recount every rollup row from SchoolAttendance, one query per BS month; returns the row counts"""
+    bounds = SchoolAttendance.objects.aggregate(first=Min('date'), last=Max('date'))
+    months = []
+    day = bounds['first']
+    while day and day <= bounds['last']:
+        year, month, first, last = _month_of(day)
+        months.extend(_student_months(year, month, first, last, SchoolAttendance.objects.all()))
+        day = last + timedelta(days=1)
+    class_days = _class_days(SchoolAttendance.objects.all())
+
+    with transaction.atomic():
+        StudentMonthlyAttendance.objects.all().delete()
+        ClassDailyAttendance.objects.all().delete()
+        StudentMonthlyAttendance.objects.bulk_create(months, batch_size=500)
+        ClassDailyAttendance.objects.bulk_create(class_days, batch_size=500)
+    return len(months), len(class_days)
+
+
+def attendance_totals(student_ids, start_date=None, end_date=None):
+    """{student_id: {'present', 'absent', 'late', 'total'}} between two dates, either of which may be open.
+
+    Whole BS months are summed from StudentMonthlyAttendance; only the days
+    of a partly covered month at either end are counted from attendance rows.
+    """
+    start_date, end_date = _as_date(start_date), _as_date(end_date)
+    if start_date and end_date and start_date > end_date:
+        return {}
+
+    months = StudentMonthlyAttendance.objects.filter(student_id__in=student_ids)
+    edges = set()
+    if start_date:
+        _, _, first, last = _month_of(start_date)
+        if first == start_date:
+            months = months.filter(month_start__gte=first)
+        else:
+            months = months.filter(month_start__gt=last)
+            edges.add((start_date, min(last, end_date) if end_date else last))
+    if end_date:
+        _, _, first, last = _month_of(end_date)
+        if last == end_date:
+            months = months.filter(month_start__lte=first)
+        else:
+            months = months.filter(month_start__lt=first)
+            edges.add((max(first, start_date) if start_date else first, end_date))
+
+    totals = {}
+    rows = list(months.order_by().values('student_id').annotate(**{field: Sum(field) for field in COUNT_FIELDS}))
+    if edges:
+        in_edges = Q()
+        for edge in edges:
+            in_edges |= Q(date__range=edge)
+        rows.extend(SchoolAttendance.objects.filter(in_edges, student_id__in=student_ids)
+                    .order_by().values('student_id').annotate(**status_counts()))
+    for row in rows:
+        counts = totals.setdefault(row['student_id'], dict.fromkeys(COUNT_FIELDS + ['total'], 0))
+        for field in COUNT_FIELDS:
+            counts[field] += row[field]
+            counts['total'] += row[field]
+    return totals
+
+
+def school_days(start_date=None, end_date=None):
+    """Number of days attendance was taken, from the per-class daily rollup"""
+    days = ClassDailyAttendance.objects.all()
+    if start_date:
+        days = days.filter(date__gte=start_date)
+    if end_date:
+        days = days.filter(date__lte=end_date)
+    return days.values('date').distinct().count()
@@ -0,0 +1,94 @@
+from django.core.paginator import Paginator
+from django.db.models import Count, Q
+from .csv_export import EXPORT_CHUNK_SIZE, iter_student_chunks
+from .models import SchoolAttendance, Student
+
+ATTENDANCE_STATUSES = ('present', 'absent', 'late')
+REPORT_PAGE_SIZE = 100
+
+CSV_HEADER = ['S.No', 'Name', 'Class', 'Section', 'Roll Number', 'Days Marked', 'Present', 'Absent', 'Late',
+              'Attendance %']
+
+
+def status_counts():
+    """Aggregates counting attendance rows in total and per status"""
+    counts = {'total': Count('id')}
+    counts.update({status: Count('id', filter=Q(status=status)) for status in ATTENDANCE_STATUSES})
+    return counts
+
+
+def _summary(counts):
+    summary = {key: counts.get(key) or 0 for key in ('total',) + ATTENDANCE_STATUSES}
+    summary['attendance_percentage'] = summary['present'] / summary['total'] * 100 if summary['total'] else 0
+    return summary
+
+
+def empty_summary():
+    return _summary({})
+
+
+def summarize(records):
+    """total, per-status counts and attendance_percentage for an attendance queryset, in one query"""
+    return _summary(records.order_by().aggregate(**status_counts()))
+
+
+class AttendanceReport:
+    """Attendance totals between two dates for the students of a class and section.
+
+    Per-student and per-class figures each come from one GROUP BY query with
+    conditional counts, so the cost does not grow with the number of students.
+    Pages and CSV exports load students in slices and total only those.
+    """
+
+    def __init__(self, start_date, end_date, student_class='', section='', model=SchoolAttendance):
+        self.start_date, self.end_date = start_date, end_date
+        self.students = Student.objects.all()
+        self.records = model.objects.filter(date__range=(start_date, end_date))
+        if student_class:
+            self.students = self.students.filter(student_class=student_class)
+            self.records = self.records.filter(student__student_class=student_class)
+        if section:
+            self.students = self.students.filter(section=section)
+            self.records = self.records.filter(student__section=section)
+        self.students = self.students.order_by('name', 'id')
+
+    def totals(self):
+        return summarize(self.records)
+
+    def by_student(self, students=None):
+        """{student_id: summary} for students with attendance in the range, optionally only the given ones"""
+        records = self.records.order_by()
+        if students is not None:
+            records = records.filter(student_id__in=[getattr(student, 'pk', student) for student in students])
+        return {row['student_id']: _summary(row)
+                for row in records.values('student_id').annotate(**status_counts())}
+
+    def by_class(self):
+        """[{'student_class': ..., 'summary': ...}] in class order"""
+        rows = (self.records.order_by('student__student_class').values('student__student_class')
+                .annotate(**status_counts()))
+        return [{'student_class': row['student__student_class'], 'summary': _summary(row)} for row in rows]
+
+    def _rows(self, students):
+        summaries = self.by_student(students)
+        return [{'student': student, 'summary': summaries.get(student.pk) or empty_summary()}
+                for student in students]
+
+    def page(self, number=1, page_size=REPORT_PAGE_SIZE):
+        """A Paginator page of students; page.rows pairs each with its summary"""
+        page = Paginator(self.students, page_size).get_page(number)
+        page.rows = self._rows(list(page.object_list))
+        return page
+
+    def iter_rows(self, chunk_size=EXPORT_CHUNK_SIZE):
+        for chunk in iter_student_chunks(self.students, chunk_size):
+            yield from self._rows(chunk)
+
+    def iter_csv_rows(self, chunk_size=EXPORT_CHUNK_SIZE):
+        """CSV rows (lists), header first, for streaming_csv_response"""
+        yield CSV_HEADER
+        for index, row in enumerate(self.iter_rows(chunk_size), start=1):
+            student, summary = row['student'], row['summary']
+            yield [index, student.name, student.student_class, student.section, student.reg_number,
+                   summary['total'], summary['present'], summary['absent'], summary['late'],
+                   f"{summary['attendance_percentage']:.1f}"]
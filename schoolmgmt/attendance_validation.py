@@ -1,20 +1,16 @@
 from django.core.exceptions import ValidationError
-from .models import CalendarEvent
+from .school_calendar import get_school_calendar
 
 def validate_attendance_date(date):
     """Check if attendance can be recorded on this date"""
-    
+
+    # Answered from the cached school calendar, so saving many rows runs no holiday queries
+    calendar = get_school_calendar()
+    if calendar.is_school_day(date):
+        return True
+
     # Check if it's a holiday
-    holiday = CalendarEvent.objects.filter(
-        event_date=date,
-        event_type__in=['holiday', 'festival']
-    ).exists()
-    
-    if holiday:
+    if calendar.holiday(date):
         raise ValidationError(f"Cannot record attendance on {date} - it's a holiday/festival")
-    
-    # Check if it's Saturday
-    if date.weekday() == 5:
-        raise ValidationError(f"Cannot record attendance on {date} - it's Saturday")
-    
-    return True
\ No newline at end of file
+
+    raise ValidationError(f"Cannot record attendance on {date} - it's Saturday")
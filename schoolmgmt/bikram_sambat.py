@@ -0,0 +1,206 @@
+from bisect import bisect_right
+from datetime import date, timedelta
+
+# Days in each month (Baisakh..Chaitra) of every Bikram Sambat year, as
+# published by the Nepal calendar committee; the months do not follow a rule.
+BS_MONTH_DAYS = {
+    1975: (31, 31, 32, 32, 31, 30, 30, 29, 30, 29, 30, 30),
+    1976: (31, 32, 31, 32, 31, 30, 30, 30, 29, 29, 30, 31),
+    1977: (30, 32, 31, 32, 31, 30, 30, 30, 29, 30, 29, 31),
+    1978: (31, 31, 32, 31, 31, 31, 30, 29, 30, 29, 30, 30),
+    1979: (31, 31, 32, 32, 31, 30, 30, 29, 30, 29, 30, 30),
+    1980: (31, 32, 31, 32, 31, 30, 30, 30, 29, 29, 30, 31),
+    1981: (31, 31, 31, 32, 31, 31, 29, 30, 30, 29, 30, 30),
+    1982: (31, 31, 32, 31, 31, 31, 30, 29, 30, 29, 30, 30),
+    1983: (31, 31, 32, 32, 31, 30, 30, 29, 30, 29, 30, 30),
+    1984: (31, 32, 31, 32, 31, 30, 30, 30, 29, 29, 30, 31),
+    1985: (31, 31, 31, 32, 31, 31, 29, 30, 30, 29, 30, 30),
+    1986: (31, 31, 32, 31, 31, 31, 30, 29, 30, 29, 30, 30),
+    1987: (31, 32, 31, 32, 31, 30, 30, 29, 30, 29, 30, 30),
+    1988: (31, 32, 31, 32, 31, 30, 30, 30, 29, 29, 30, 31),
+    1989: (31, 31, 31, 32, 31, 31, 29, 30, 30, 29, 30, 30),
+    1990: (31, 31, 32, 31, 31, 31, 30, 29, 30, 29, 30, 30),
+    1991: (31, 32, 31, 32, 31, 30, 30, 30, 29, 29, 30, 30),
+    1992: (31, 32, 31, 32, 31, 30, 30, 30, 29, 30, 29, 31),
+    1993: (31, 31, 32, 31, 31, 31, 30, 29, 30, 29, 30, 30),
+    1994: (31, 31, 32, 31, 31, 31, 30, 29, 30, 29, 30, 30),
+    1995: (31, 32, 31, 32, 31, 30, 30, 30, 29, 29, 30, 30),
+    1996: (31, 32, 31, 32, 31, 30, 30, 30, 29, 30, 29, 31),
+    1997: (31, 31, 32, 31, 31, 31, 30, 29, 30, 29, 30, 30),
+    1998: (31, 31, 32, 31, 31, 31, 30, 29, 30, 29, 30, 30),
+    1999: (31, 32, 31, 32, 31, 30, 30, 30, 29, 29, 30, 31),
+    2000: (30, 32, 31, 32, 31, 30, 30, 30, 29, 30, 29, 31),
+    2001: (31, 31, 32, 31, 31, 31, 30, 29, 30, 29, 30, 30),
+    2002: (31, 31, 32, 32, 31, 30, 30, 29, 30, 29, 30, 30),
+    2003: (31, 32, 31, 32, 31, 30, 30, 30, 29, 29, 30, 31),
+    2004: (30, 32, 31, 32, 31, 30, 30, 30, 29, 30, 29, 31),
+    2005: (31, 31, 32, 31, 31, 31, 30, 29, 30, 29, 30, 30),
+    2006: (31, 31, 32, 32, 31, 30, 30, 29, 30, 29, 30, 30),
+    2007: (31, 32, 31, 32, 31, 30, 30, 30, 29, 29, 30, 31),
+    2008: (31, 31, 31, 32, 31, 31, 29, 30, 30, 29, 29, 31),
+    2009: (31, 31, 32, 31, 31, 31, 30, 29, 30, 29, 30, 30),
+    2010: (31, 31, 32, 32, 31, 30, 30, 29, 30, 29, 30, 30),
+    2011: (31, 32, 31, 32, 31, 30, 30, 30, 29, 29, 30, 31),
+    2012: (31, 31, 31, 32, 31, 31, 29, 30, 30, 29, 30, 30),
+    2013: (31, 31, 32, 31, 31, 31, 30, 29, 30, 29, 30, 30),
+    2014: (31, 31, 32, 32, 31, 30, 30, 29, 30, 29, 30, 30),
+    2015: (31, 32, 31, 32, 31, 30, 30, 30, 29, 29, 30, 31),
+    2016: (31, 31, 31, 32, 31, 31, 29, 30, 30, 29, 30, 30),
+    2017: (31, 31, 32, 31, 31, 31, 30, 29, 30, 29, 30, 30),
+    2018: (31, 32, 31, 32, 31, 30, 30, 29, 30, 29, 30, 30),
+    2019: (31, 32, 31, 32, 31, 30, 30, 30, 29, 30, 29, 31),
+    2020: (31, 31, 31, 32, 31, 31, 30, 29, 30, 29, 30, 30),
+    2021: (31, 31, 32, 31, 31, 31, 30, 29, 30, 29, 30, 30),
+    2022: (31, 32, 31, 32, 31, 30, 30, 30, 29, 29, 30, 30),
+    2023: (31, 32, 31, 32, 31, 30, 30, 30, 29, 30, 29, 31),
+    2024: (31, 31, 31, 32, 31, 31, 30, 29, 30, 29, 30, 30),
+    2025: (31, 31, 32, 31, 31, 31, 30, 29, 30, 29, 30, 30),
+    2026: (31, 32, 31, 32, 31, 30, 30, 30, 29, 29, 30, 31),
+    2027: (30, 32, 31, 32, 31, 30, 30, 30, 29, 30, 29, 31),
+    2028: (31, 31, 32, 31, 31, 31, 30, 29, 30, 29, 30, 30),
+    2029: (31, 31, 32, 31, 32, 30, 30, 29, 30, 29, 30, 30),
+    2030: (31, 32, 31, 32, 31, 30, 30, 30, 29, 29, 30, 31),
+    2031: (30, 32, 31, 32, 31, 30, 30, 30, 29, 30, 29, 31),
+    2032: (31, 31, 32, 31, 31, 31, 30, 29, 30, 29, 30, 30),
+    2033: (31, 31, 32, 32, 31, 30, 30, 29, 30, 29, 30, 30),
+    2034: (31, 32, 31, 32, 31, 30, 30, 30, 29, 29, 30, 31),
+    2035: (30, 32, 31, 32, 31, 31, 29, 30, 30, 29, 29, 31),
+    2036: (31, 31, 32, 31, 31, 31, 30, 29, 30, 29, 30, 30),
+    2037: (31, 31, 32, 32, 31, 30, 30, 29, 30, 29, 30, 30),
+    2038: (31, 32, 31, 32, 31, 30, 30, 30, 29, 29, 30, 31),
+    2039: (31, 31, 31, 32, 31, 31, 29, 30, 30, 29, 30, 30),
+    2040: (31, 31, 32, 31, 31, 31, 30, 29, 30, 29, 30, 30),
+    2041: (31, 31, 32, 32, 31, 30, 30, 29, 30, 29, 30, 30),
+    2042: (31, 32, 31, 32, 31, 30, 30, 30, 29, 29, 30, 31),
+    2043: (31, 31, 31, 32, 31, 31, 29, 30, 30, 29, 30, 30),
+    2044: (31, 31, 32, 31, 31, 31, 30, 29, 30, 29, 30, 30),
+    2045: (31, 32, 31, 32, 31, 30, 30, 29, 30, 29, 30, 30),
+    2046: (31, 32, 31, 32, 31, 30, 30, 30, 29, 29, 30, 31),
+    2047: (31, 31, 31, 32, 31, 31, 30, 29, 30, 29, 30, 30),
+    2048: (31, 31, 32, 31, 31, 31, 30, 29, 30, 29, 30, 30),
+    2049: (31, 32, 31, 32, 31, 30, 30, 30, 29, 29, 30, 30),
+    2050: (31, 32, 31, 32, 31, 30, 30, 30, 29, 30, 29, 31),
+    2051: (31, 31, 31, 32, 31, 31, 30, 29, 30, 29, 30, 30),
+    2052: (31, 31, 32, 31, 31, 31, 30, 29, 30, 29, 30, 30),
+    2053: (31, 32, 31, 32, 31, 30, 30, 30, 29, 29, 30, 30),
+    2054: (31, 32, 31, 32, 31, 30, 30, 30, 29, 30, 29, 31),
+    2055: (31, 31, 32, 31, 31, 31, 30, 29, 30, 29, 30, 30),
+    2056: (31, 31, 32, 31, 32, 30, 30, 29, 30, 29, 30, 30),
+    2057: (31, 32, 31, 32, 31, 30, 30, 30, 29, 29, 30, 31),
+    2058: (30, 32, 31, 32, 31, 30, 30, 30, 29, 30, 29, 31),
+    2059: (31, 31, 32, 31, 31, 31, 30, 29, 30, 29, 30, 30),
+    2060: (31, 31, 32, 32, 31, 30, 30, 29, 30, 29, 30, 30),
+    2061: (31, 32, 31, 32, 31, 30, 30, 30, 29, 29, 30, 31),
+    2062: (31, 31, 31, 32, 31, 31, 29, 30, 29, 30, 29, 31),
+    2063: (31, 31, 32, 31, 31, 31, 30, 29, 30, 29, 30, 30),
+    2064: (31, 31, 32, 32, 31, 30, 30, 29, 30, 29, 30, 30),
+    2065: (31, 32, 31, 32, 31, 30, 30, 30, 29, 29, 30, 31),
+    2066: (31, 31, 31, 32, 31, 31, 29, 30, 30, 29, 29, 31),
+    2067: (31, 31, 32, 31, 31, 31, 30, 29, 30, 29, 30, 30),
+    2068: (31, 31, 32, 32, 31, 30, 30, 29, 30, 29, 30, 30),
+    2069: (31, 32, 31, 32, 31, 30, 30, 30, 29, 29, 30, 31),
+    2070: (31, 31, 31, 32, 31, 31, 29, 30, 30, 29, 30, 30),
+    2071: (31, 31, 32, 31, 31, 31, 30, 29, 30, 29, 30, 30),
+    2072: (31, 32, 31, 32, 31, 30, 30, 29, 30, 29, 30, 30),
+    2073: (31, 32, 31, 32, 31, 30, 30, 30, 29, 29, 30, 31),
+    2074: (31, 31, 31, 32, 31, 31, 30, 29, 30, 29, 30, 30),
+    2075: (31, 31, 32, 31, 31, 31, 30, 29, 30, 29, 30, 30),
+    2076: (31, 32, 31, 32, 31, 30, 30, 30, 29, 29, 30, 30),
+    2077: (31, 32, 31, 32, 31, 30, 30, 30, 29, 30, 29, 31),
+    2078: (31, 31, 31, 32, 31, 31, 30, 29, 30, 29, 30, 30),
+    2079: (31, 31, 32, 31, 31, 31, 30, 29, 30, 29, 30, 30),
+    2080: (31, 32, 31, 32, 31, 30, 30, 30, 29, 29, 30, 30),
+    2081: (31, 32, 31, 32, 31, 30, 30, 30, 29, 30, 29, 31),
+    2082: (31, 31, 32, 31, 31, 31, 30, 29, 30, 29, 30, 30),
+    2083: (31, 31, 32, 31, 31, 31, 30, 29, 30, 29, 30, 30),
+    2084: (31, 31, 32, 31, 31, 30, 30, 30, 29, 30, 30, 30),
+    2085: (31, 32, 31, 32, 30, 31, 30, 30, 29, 30, 30, 30),
+    2086: (30, 32, 31, 32, 31, 30, 30, 30, 29, 30, 30, 30),
+    2087: (31, 31, 32, 31, 31, 31, 30, 29, 30, 30, 30, 30),
+    2088: (30, 31, 32, 32, 30, 31, 30, 30, 29, 30, 30, 30),
+    2089: (30, 32, 31, 32, 31, 30, 30, 30, 29, 30, 30, 30),
+    2090: (30, 32, 31, 32, 31, 30, 30, 30, 29, 30, 30, 30),
+    2091: (31, 31, 32, 31, 31, 31, 30, 30, 29, 30, 30, 30),
+    2092: (30, 31, 32, 32, 31, 30, 30, 30, 29, 30, 30, 30),
+    2093: (30, 32, 31, 32, 31, 30, 30, 30, 29, 30, 30, 30),
+    2094: (31, 31, 32, 31, 31, 30, 30, 30, 29, 30, 30, 30),
+    2095: (31, 31, 32, 31, 31, 31, 30, 29, 30, 30, 30, 30),
+    2096: (30, 31, 32, 32, 31, 30, 30, 29, 30, 29, 30, 30),
+    2097: (31, 32, 31, 32, 31, 30, 30, 30, 29, 30, 30, 30),
+    2098: (31, 31, 32, 31, 31, 31, 29, 30, 29, 30, 29, 31),
+    2099: (31, 31, 32, 31, 31, 31, 30, 29, 29, 30, 30, 30),
+    2100: (31, 32, 31, 32, 30, 31, 30, 29, 30, 29, 30, 30),
+}
+
+BS_FIRST_YEAR = min(BS_MONTH_DAYS)
+BS_LAST_YEAR = max(BS_MONTH_DAYS)
+# 1 Baisakh 1975 BS
+BS_EPOCH = date(1918, 4, 13)
+
+
+def _month_starts():
+    """AD ordinal of the first day of every BS month, then the day after the last one"""
+    starts = [BS_EPOCH.toordinal()]
+    for year in range(BS_FIRST_YEAR, BS_LAST_YEAR + 1):
+        for days in BS_MONTH_DAYS[year]:
+            starts.append(starts[-1] + days)
+    return starts
+
+
+# Month n counted from Baisakh 1975 starts on AD ordinal MONTH_STARTS[n]
+MONTH_STARTS = _month_starts()
+FIRST_DATE = BS_EPOCH
+LAST_DATE = date.fromordinal(MONTH_STARTS[-1] - 1)
+
+
+def days_in_month(year, month):
+    if year not in BS_MONTH_DAYS or not 1 <= month <= 12:
+        raise ValueError(f'{year}/{month:02d} is outside the supported Bikram Sambat range '
+                         f'{BS_FIRST_YEAR}-{BS_LAST_YEAR}')
+    return BS_MONTH_DAYS[year][month - 1]
+
+
+def to_bs(ad_date):
+    """(year, month, day) in Bikram Sambat for an AD date"""
+    ordinal = ad_date.toordinal()
+    if not MONTH_STARTS[0] <= ordinal < MONTH_STARTS[-1]:
+        raise ValueError(f'{ad_date} is outside the supported range {FIRST_DATE} to {LAST_DATE}')
+    index = bisect_right(MONTH_STARTS, ordinal) - 1
+    years, month = divmod(index, 12)
+    return BS_FIRST_YEAR + years, month + 1, ordinal - MONTH_STARTS[index] + 1
+
+
+def to_ad(year, month, day):
+    """The AD date of a Bikram Sambat date"""
+    if not 1 <= day <= days_in_month(year, month):
+        raise ValueError(f'{year}/{month:02d} has no day {day}')
+    return date.fromordinal(MONTH_STARTS[(year - BS_FIRST_YEAR) * 12 + month - 1] + day - 1)
+
+
+def month_bounds(year, month):
+    """First and last AD dates of a Bikram Sambat month"""
+    return to_ad(year, month, 1), to_ad(year, month, days_in_month(year, month))
+
+
+def bs_range(start, end):
+    """(ad_date, (year, month, day)) for every day from start to end inclusive.
+
+    Only the first day is looked up; the rest step through the month table,
+    so a report can label thousands of rows for the cost of one conversion.
+    """
+    if end < start:
+        return
+    year, month, day = to_bs(start)
+    to_bs(end)  # Fail before yielding if the range runs past the table
+    month_days = BS_MONTH_DAYS[year][month - 1]
+    current, step = start, timedelta(days=1)
+    while current <= end:
+        yield current, (year, month, day)
+        current += step
+        day += 1
+        if day > month_days:
+            day, month = 1, month + 1
+            if month > 12:
+                month, year = 1, year + 1
+            if current <= end:
+                month_days = BS_MONTH_DAYS[year][month - 1]
@@ -1,8 +1,9 @@
 from .models import AdminLogin, SchoolDetail
+from .site_cache import memoize_on_request
 
 def school_context(request):
     """Context processor to make school information available in all templates"""
-    school_info = SchoolDetail.get_current_school()
+    school_info = memoize_on_request(request, 'school', SchoolDetail.get_current_school)
     admin_username = request.session.get('admin_username', '')
     return {
         'school_info': school_info,
@@ -16,7 +17,9 @@ def user_permissions(request):
         
         if admin_username:
             try:
-                admin = AdminLogin.objects.get(username=admin_username, is_active=True)
+                admin = memoize_on_request(request, 'admin', lambda: AdminLogin.get_active(username=admin_username))
+                if admin is None:
+                    raise AdminLogin.DoesNotExist
                 
                 if admin.is_super_admin:
                     permissions = {
@@ -0,0 +1,113 @@
+import csv
+from django.http import StreamingHttpResponse
+from .fee_ledger import FeeLedger, load_fee_structures
+
+EXPORT_CHUNK_SIZE = 500
+
+
+class Echo:
+    """Pseudo-buffer for csv.writer: write() hands the formatted line straight back"""
+
+    def write(self, value):
+        return value
+
+
+def _money(value):
+    return f'Rs.{float(value):,.2f}'
+
+
+def _date(value):
+    return value.strftime('%Y-%m-%d') if value else ''
+
+
+# Each column set is a list of (header, value(index, student, ledger_entry)).
+# 'fee_receipt_book' matches the original fee receipt book export and
+# 'students' matches the student upload template so exports can be re-imported.
+COLUMN_SETS = {
+    'fee_receipt_book': [
+        ('S.No', lambda i, s, e: i),
+        ('Student ID', lambda i, s, e: f'STU{s.id:03d}'),
+        ('Name', lambda i, s, e: s.name),
+        ('Class', lambda i, s, e: s.student_class),
+        ('Section', lambda i, s, e: s.section),
+        ('Roll Number', lambda i, s, e: s.reg_number),
+        ('Total Fee', lambda i, s, e: _money(e.total_fee)),
+        ('Amount Paid', lambda i, s, e: _money(e.paid_amount)),
+        ('Amount Pending', lambda i, s, e: _money(e.pending_amount)),
+        ('Payment Status', lambda i, s, e: 'Paid' if e.pending_amount == 0 else 'Pending'),
+        ('Last Payment Date', lambda i, s, e: _date(e.last_payment_date) or 'No payments'),
+        ('Father Name', lambda i, s, e: s.father_name),
+        ('Mobile', lambda i, s, e: s.mobile),
+        ('Paid Months', lambda i, s, e: ', '.join(sorted(e.paid_months)) if e.paid_months else 'None'),
+    ],
+    'students': [
+        ('Name', lambda i, s, e: s.name),
+        ('Father Name', lambda i, s, e: s.father_name),
+        ('Mother Name', lambda i, s, e: s.mother_name),
+        ('Class', lambda i, s, e: s.student_class),
+        ('Section', lambda i, s, e: s.section),
+        ('Gender', lambda i, s, e: s.gender),
+        ('Mobile', lambda i, s, e: s.mobile),
+        ('Father Mobile', lambda i, s, e: s.father_mobile),
+        ('Mother Mobile', lambda i, s, e: s.mother_mobile),
+        ('Address1', lambda i, s, e: s.address1),
+        ('Address2', lambda i, s, e: s.address2),
+        ('City', lambda i, s, e: s.city),
+        ('Religion', lambda i, s, e: s.religion),
+        ('DOB', lambda i, s, e: _date(s.dob)),
+        ('Admission Date', lambda i, s, e: _date(s.admission_date)),
+        ('Session', lambda i, s, e: s.session),
+        ('Transport', lambda i, s, e: s.transport),
+        ('Registration Number', lambda i, s, e: s.reg_number),
+        ('Father Email', lambda i, s, e: s.father_email),
+        ('Father Occupation', lambda i, s, e: s.father_occupation),
+        ('Father Qualification', lambda i, s, e: s.father_qualification),
+        ('Mother Occupation', lambda i, s, e: s.mother_occupation),
+        ('Mother Qualification', lambda i, s, e: s.mother_qualification),
+        ('Old Balance', lambda i, s, e: s.old_balance),
+    ],
+}
+
+# Column sets that need fee ledger data for each row
+LEDGER_COLUMN_SETS = {'fee_receipt_book'}
+
+
+def iter_student_chunks(students, chunk_size=EXPORT_CHUNK_SIZE):
+    """Yield lists of at most chunk_size students without loading the whole queryset"""
+    chunk = []
+    for student in students.iterator(chunk_size=chunk_size):
+        chunk.append(student)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def iter_csv_rows(students, column_set='fee_receipt_book', chunk_size=EXPORT_CHUNK_SIZE):
+    """Yield CSV rows (lists) for a student queryset, header first.
+
+    Fee data is loaded per chunk through the fee ledger, so memory use and the
+    number of queries per chunk stay constant however many students are exported.
+    """
+    columns = COLUMN_SETS[column_set]
+    yield [header for header, _ in columns]
+
+    fee_structures = load_fee_structures() if column_set in LEDGER_COLUMN_SETS else None
+    index = 0
+    for chunk in iter_student_chunks(students, chunk_size):
+        ledger = None
+        if fee_structures is not None:
+            ledger = FeeLedger(chunk, include_expenses=False, fee_structures=fee_structures)
+        for student in chunk:
+            index += 1
+            entry = ledger[student.pk] if ledger is not None else None
+            yield [value(index, student, entry) for _, value in columns]
+
+
+def streaming_csv_response(rows, filename):
+    """StreamingHttpResponse that writes CSV rows as they are produced"""
+    writer = csv.writer(Echo())
+    response = StreamingHttpResponse((writer.writerow(row) for row in rows), content_type='text/csv')
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
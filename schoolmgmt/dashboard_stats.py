@@ -0,0 +1,91 @@
+from datetime import date, timedelta
+from decimal import Decimal
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Sum, Q
+from .models import Student, FeePayment, SchoolAttendance, ContactEnquiry, StudentRegistration
+
+CACHE_KEY_PREFIX = 'dashboard_stats'
+
+
+def _cache_key(today):
+    return f'{CACHE_KEY_PREFIX}:{today.isoformat()}'
+
+
+def compute_dashboard_stats(today=None):
+    """Student, fee collection, attendance and enquiry figures for the dashboards.
+
+    Counts come from conditional aggregates so each table is read once:
+    students (grouped by class, religion and gender), fee payments and today's
+    attendance, plus the two pending-enquiry counts.
+    """
+    today = today or date.today()
+    week_start = today - timedelta(days=6)
+    thirty_days_ago = today - timedelta(days=29)  # 30 days including today
+    year_start = date(today.year, 1, 1)
+
+    # Students: one grouped query gives totals, gender split, class and religion breakdowns
+    class_counts = {}
+    religion_counts = {}
+    gender_counts = {}
+    total_students = 0
+    todays_birthdays = 0
+    student_groups = (Student.objects.order_by().values('student_class', 'religion', 'gender')
+                      .annotate(count=Count('id'),
+                                birthdays=Count('id', filter=Q(dob__month=today.month, dob__day=today.day))))
+    for row in student_groups:
+        total_students += row['count']
+        todays_birthdays += row['birthdays']
+        class_counts[row['student_class']] = class_counts.get(row['student_class'], 0) + row['count']
+        religion_counts[row['religion']] = religion_counts.get(row['religion'], 0) + row['count']
+        gender_counts[row['gender']] = gender_counts.get(row['gender'], 0) + row['count']
+
+    collections = FeePayment.objects.filter(payment_date__gte=min(thirty_days_ago, year_start)).aggregate(
+        todays=Sum('payment_amount', filter=Q(payment_date=today)),
+        weekly=Sum('payment_amount', filter=Q(payment_date__range=[week_start, today])),
+        monthly=Sum('payment_amount', filter=Q(payment_date__range=[thirty_days_ago, today])),
+        yearly=Sum('payment_amount', filter=Q(payment_date__year=today.year)),
+    )
+
+    attendance = SchoolAttendance.objects.filter(date=today).aggregate(
+        present=Count('id', filter=Q(status='present')),
+        absent=Count('id', filter=Q(status='absent')),
+        late=Count('id', filter=Q(status='late')),
+    )
+
+    pending_enquiries = (ContactEnquiry.objects.exclude(status='closed').count() +
+                         StudentRegistration.objects.filter(status='pending').count())
+
+    return {
+        'total_students': total_students,
+        'boys_count': gender_counts.get('Boy', 0),
+        'girls_count': gender_counts.get('Girl', 0),
+        'todays_birthdays': todays_birthdays,
+        'todays_collection': collections['todays'] or 0,
+        'weekly_collection': collections['weekly'] or 0,
+        'monthly_collection': collections['monthly'] or Decimal('0'),
+        'yearly_collection': collections['yearly'] or 0,
+        'pending_enquiries': pending_enquiries,
+        'total_present': attendance['present'],
+        'total_absent': attendance['absent'],
+        'total_late': attendance['late'],
+        'attendance_percentage': round((attendance['present'] / total_students * 100) if total_students > 0 else 0, 1),
+        'class_data': [{'student_class': name, 'count': count} for name, count in sorted(class_counts.items())],
+        'religion_data': [{'religion': name, 'count': count} for name, count in sorted(religion_counts.items())],
+    }
+
+
+def get_dashboard_stats(today=None):
+    """Cached snapshot of compute_dashboard_stats, kept for settings.DASHBOARD_STATS_TTL seconds"""
+    today = today or date.today()
+    key = _cache_key(today)
+    stats = cache.get(key)
+    if stats is None:
+        stats = compute_dashboard_stats(today)
+        cache.set(key, stats, getattr(settings, 'DASHBOARD_STATS_TTL', 60))
+    return stats
+
+
+def invalidate_dashboard_stats():
+    """Drop today's snapshot after students, fee payments or attendance change"""
+    cache.delete(_cache_key(date.today()))
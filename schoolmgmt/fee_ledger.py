@@ -0,0 +1,193 @@
+import threading
+from contextlib import contextmanager
+from decimal import Decimal
+from django.db import transaction
+from django.db.models import QuerySet, Sum, Max
+from .models import FeeStructure, FeePayment, FeePaymentItem, StudentDailyExpense, StudentFeeBalance
+
+# Fee fields charged every month vs once per session
+MONTHLY_FEE_FIELDS = ('monthly_fee', 'tuition_fee', 'transportation_fee')
+ONE_TIME_FEE_FIELDS = ('admission_fee', 'examination_fee', 'library_fee', 'sports_fee', 'laboratory_fee', 'computer_fee')
+
+# Annual fee used when a class has no FeeStructure row
+# (admission 5000, monthly 2500, tuition 2000, exam 1000, library 500,
+#  sports 800, lab 1200, computer 1500, transport 1500)
+DEFAULT_ANNUAL_FEE = (
+    Decimal('5000') + Decimal('2500') * 12 + Decimal('2000') * 12 + Decimal('1000') +
+    Decimal('500') + Decimal('800') + Decimal('1200') + Decimal('1500') + Decimal('1500') * 12
+)
+DEFAULT_MONTHLY_FEE_AMOUNT = Decimal('4500')  # monthly 2500 + tuition 2000
+
+
+def annual_fee_for(fee_structure):
+    """Total yearly fee for a class fee structure (monthly fees x 12 plus one-time fees)"""
+    total = sum((getattr(fee_structure, field) * 12 for field in MONTHLY_FEE_FIELDS), Decimal('0'))
+    total += sum((getattr(fee_structure, field) for field in ONE_TIME_FEE_FIELDS), Decimal('0'))
+    return total
+
+
+def load_fee_structures():
+    """FeeStructure rows keyed by class name"""
+    return {fs.class_name: fs for fs in FeeStructure.objects.all()}
+
+
+class LedgerEntry:
+    """Fee position of a single student"""
+
+    __slots__ = ('student_id', 'fee_structure', 'annual_fee', 'paid_amount',
+                 'unpaid_expenses', 'last_payment_date', 'paid_months', 'paid_fee_types')
+
+    def __init__(self, student_id, fee_structure, annual_fee):
+        self.student_id = student_id
+        self.fee_structure = fee_structure
+        self.annual_fee = annual_fee
+        self.paid_amount = Decimal('0')
+        self.unpaid_expenses = Decimal('0')
+        self.last_payment_date = None
+        self.paid_months = set()
+        self.paid_fee_types = set()
+
+    @property
+    def total_fee(self):
+        return self.annual_fee + self.unpaid_expenses
+
+    @property
+    def pending_amount(self):
+        return max(Decimal('0'), self.total_fee - self.paid_amount)
+
+    @property
+    def payment_status(self):
+        return 'paid' if self.pending_amount == 0 else 'pending'
+
+    @property
+    def monthly_fee_amount(self):
+        """Monthly + tuition fee charged for one month"""
+        if self.fee_structure is None:
+            return DEFAULT_MONTHLY_FEE_AMOUNT
+        return self.fee_structure.monthly_fee + self.fee_structure.tuition_fee
+
+    def is_month_paid(self, month_name):
+        return month_name in self.paid_months
+
+
+class FeeLedger:
+    """Fee totals, payments, unpaid expenses and paid months/fee types for a set of students.
+
+    Everything is loaded with a fixed number of grouped queries regardless of
+    how many students are in the set, so views can build per-student rows
+    without touching the database inside their loops.
+    """
+
+    def __init__(self, students, include_expenses=True, include_paid_months=True,
+                 default_annual_fee=DEFAULT_ANNUAL_FEE, fee_structures=None):
+        if isinstance(students, QuerySet):
+            student_ids = students.order_by().values('pk')
+            class_by_student = dict(students.order_by().values_list('pk', 'student_class'))
+        else:
+            class_by_student = {student.pk: student.student_class for student in students}
+            student_ids = list(class_by_student)
+
+        if fee_structures is None:
+            fee_structures = load_fee_structures()
+        self.entries = {}
+        for student_id, class_name in class_by_student.items():
+            fee_structure = fee_structures.get(class_name)
+            annual_fee = annual_fee_for(fee_structure) if fee_structure else default_annual_fee
+            self.entries[student_id] = LedgerEntry(student_id, fee_structure, annual_fee)
+
+        payments = (FeePayment.objects.filter(student_id__in=student_ids)
+                    .order_by().values('student_id')
+                    .annotate(total_paid=Sum('payment_amount'), last_payment_date=Max('payment_date')))
+        for row in payments:
+            entry = self.entries[row['student_id']]
+            entry.paid_amount = row['total_paid'] or Decimal('0')
+            entry.last_payment_date = row['last_payment_date']
+
+        if include_expenses:
+            expenses = (StudentDailyExpense.objects.filter(student_id__in=student_ids, is_paid=False)
+                        .order_by().values('student_id')
+                        .annotate(total_expenses=Sum('amount')))
+            for row in expenses:
+                self.entries[row['student_id']].unpaid_expenses = row['total_expenses'] or Decimal('0')
+
+        if include_paid_months:
+            items = (FeePaymentItem.objects.filter(student_id__in=student_ids)
+                     .values_list('student_id', 'month', 'fee_type').distinct())
+            for student_id, month, fee_type in items:
+                entry = self.entries[student_id]
+                if month:
+                    entry.paid_months.add(month)
+                if fee_type:
+                    entry.paid_fee_types.add(fee_type)
+
+    def __getitem__(self, student_id):
+        return self.entries[student_id]
+
+    def __iter__(self):
+        return iter(self.entries.values())
+
+    def __len__(self):
+        return len(self.entries)
+
+    @property
+    def total_paid(self):
+        return sum((entry.paid_amount for entry in self), Decimal('0'))
+
+    @property
+    def total_pending(self):
+        return sum((entry.pending_amount for entry in self), Decimal('0'))
+
+
+BALANCE_FIELDS = ['total_due', 'total_paid', 'unpaid_expenses', 'pending_amount', 'last_payment_date', 'updated_at']
+
+
+def build_fee_balances(students):
+    """Unsaved StudentFeeBalance rows computed from the ledger"""
+    ledger = FeeLedger(students, include_paid_months=False)
+    return [
+        StudentFeeBalance(
+            student_id=entry.student_id,
+            total_due=entry.annual_fee,
+            total_paid=entry.paid_amount,
+            unpaid_expenses=entry.unpaid_expenses,
+            pending_amount=entry.pending_amount,
+            last_payment_date=entry.last_payment_date,
+        )
+        for entry in ledger
+    ]
+
+
+def refresh_fee_balances(students):
+    """Recompute and upsert StudentFeeBalance rows for a student queryset or list"""
+    with transaction.atomic():
+        balances = build_fee_balances(students)
+        StudentFeeBalance.objects.bulk_create(
+            balances, batch_size=500, update_conflicts=True,
+            unique_fields=['student'], update_fields=BALANCE_FIELDS,
+        )
+    return len(balances)
+
+
+_deferred = threading.local()
+
+
+@contextmanager
+def deferred_balance_refresh():
+    """Skip the balance refresh each payment, expense and student save does.
+
+    For views writing several rows for a student in one go; the caller runs
+    refresh_fee_balances once for those students before the block's transaction ends.
+    """
+    previous = getattr(_deferred, 'active', False)
+    _deferred.active = True
+    try:
+        yield
+    finally:
+        _deferred.active = previous
+
+
+def refresh_balances_on_save(students):
+    """refresh_fee_balances for a model save hook, unless a deferred_balance_refresh() block is open"""
+    if getattr(_deferred, 'active', False):
+        return 0
+    return refresh_fee_balances(students)
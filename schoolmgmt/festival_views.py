@@ -2,6 +2,8 @@ from django.core.cache import cache
 from django.http import JsonResponse
 from django.conf import settings
 from .models import CalendarEvent, SchoolDetail
+from .public_cache import bump_content_version
+from .school_calendar import invalidate_school_calendar
 from datetime import datetime
 
 CACHE_TTL = 60 * 60 * 24  # 1 day
@@ -45,6 +47,8 @@ def populate_festivals_from_api(request):
     try:
         data = get_festivals_from_api(year_bs)
         CalendarEvent.objects.filter(event_type='festival').delete()
+        bump_content_version()
+        invalidate_school_calendar()
         school = SchoolDetail.get_current_school()
         
         count = 0
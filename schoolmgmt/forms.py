@@ -26,14 +26,13 @@ class TeacherAssignmentForm(forms.Form):
         teacher = kwargs.pop('teacher', None)
         super().__init__(*args, **kwargs)
         
-        # Create dynamic fields for each class
+        # Create dynamic fields for each class that has subjects, found in one query
+        classes_with_subjects = set(Subject.objects.order_by().values_list('class_name', flat=True).distinct())
         for class_name, class_display in self.CLASS_CHOICES:
-            # Get subjects for this class
-            subjects = Subject.objects.filter(class_name=class_name)
-            if subjects.exists():
+            if class_name in classes_with_subjects:
                 field_name = f'class_{class_name.lower()}_subjects'
                 self.fields[field_name] = forms.ModelMultipleChoiceField(
-                    queryset=subjects,
+                    queryset=Subject.objects.filter(class_name=class_name),
                     widget=forms.CheckboxSelectMultiple,
                     required=False,
                     label=f'{class_display} - Subjects'
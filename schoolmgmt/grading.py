@@ -0,0 +1,75 @@
+import time
+from bisect import bisect_right
+from collections import namedtuple
+
+GradeInfo = namedtuple('GradeInfo', ['grade', 'grade_point', 'remarks'])
+
+# Used when no GradingScale rows exist: (minimum percentage, grade, grade point, remarks)
+DEFAULT_GRADING_SCALE = [
+    (90, 'A+', 4.0, 'Outstanding'),
+    (80, 'A', 3.6, 'Excellent'),
+    (70, 'B+', 3.2, 'Very Good'),
+    (60, 'B', 2.8, 'Good'),
+    (50, 'C+', 2.4, 'Satisfactory'),
+    (40, 'C', 2.0, 'Acceptable'),
+    (30, 'D+', 1.6, 'Partially Accept.'),
+    (20, 'D', 1.2, 'Weak'),
+    (0, 'E', 0.8, 'Very Poor / Fail'),
+]
+
+# Seconds a loaded scale is reused before GradingScale is read again; saves in
+# this process clear it straight away, other processes pick changes up after this
+GRADING_CACHE_TTL = 300
+
+
+class GradingEngine:
+    """Maps percentages to grade, grade point and remarks with a bisect over sorted cut-offs"""
+
+    def __init__(self, bands):
+        bands = sorted(bands, key=lambda band: band[0])
+        self.cutoffs = [band[0] for band in bands]
+        self.grades = [GradeInfo(grade, float(point), remarks) for _, grade, point, remarks in bands]
+        # Anything below the lowest cut-off still gets the lowest band
+        self.lowest = self.grades[0]
+
+    def lookup(self, percentage):
+        index = bisect_right(self.cutoffs, percentage) - 1
+        return self.grades[index] if index >= 0 else self.lowest
+
+    def lookup_many(self, percentages):
+        """GradeInfo for each percentage, in order"""
+        cutoffs, grades, lowest = self.cutoffs, self.grades, self.lowest
+        return [grades[i] if i >= 0 else lowest for i in (bisect_right(cutoffs, p) - 1 for p in percentages)]
+
+    def grade(self, percentage):
+        return self.lookup(percentage).grade
+
+    def grade_point(self, percentage):
+        return self.lookup(percentage).grade_point
+
+    def remarks(self, percentage):
+        return self.lookup(percentage).remarks
+
+
+_cache = {'engine': None, 'loaded_at': 0.0}
+
+
+def get_grading_engine():
+    """The GradingScale table as a GradingEngine, loaded once and cached"""
+    engine = _cache['engine']
+    if engine is None or time.monotonic() - _cache['loaded_at'] > GRADING_CACHE_TTL:
+        from .models import GradingScale
+        rows = GradingScale.objects.values_list('min_marks', 'grade', 'grade_point', 'performance')
+        engine = GradingEngine(list(rows) or DEFAULT_GRADING_SCALE)
+        _cache['engine'] = engine
+        _cache['loaded_at'] = time.monotonic()
+    return engine
+
+
+def clear_grading_cache():
+    _cache['engine'] = None
+
+
+def grade_for(percentage):
+    """GradeInfo(grade, grade_point, remarks) for a percentage"""
+    return get_grading_engine().lookup(percentage)
@@ -42,31 +42,30 @@ class Command(BaseCommand):
                     self.stdout.write(f"Created exam: {exam.name} for {class_name}")
         
         # Get all subjects and create marksheets
+        subjects_by_class, exams_by_class = {}, {}
+        for subject in Subject.objects.all():
+            subjects_by_class.setdefault(subject.class_name, []).append(subject)
+        for exam in Exam.objects.all():
+            exams_by_class.setdefault(exam.class_name, []).append(exam)
+        existing = set(Marksheet.objects.values_list('student_id', 'exam_id', 'subject_id'))
+        
+        records = []
         for student in students:
-            subjects = Subject.objects.filter(class_name=student.student_class)
-            exams = Exam.objects.filter(class_name=student.student_class)
-            
-            for exam in exams:
-                for subject in subjects:
+            for exam in exams_by_class.get(student.student_class, []):
+                for subject in subjects_by_class.get(student.student_class, []):
                     # Check if marksheet already exists
-                    if not Marksheet.objects.filter(student=student, exam=exam, subject=subject).exists():
+                    if (student.id, exam.id, subject.id) not in existing:
                         # Generate random marks (60-95% of max marks for demo)
                         min_marks = int(subject.max_marks * 0.6)  # 60% minimum
                         max_marks = int(subject.max_marks * 0.95)  # 95% maximum
-                        demo_marks = random.randint(min_marks, max_marks)
-                        
-                        # Create marksheet
-                        marksheet = Marksheet.objects.create(
-                            student=student,
-                            exam=exam,
-                            subject=subject,
-                            marks_obtained=demo_marks,
-                            remarks='Demo marks'
-                        )
-                        created_marksheets += 1
-                        
-                        if created_marksheets % 50 == 0:  # Progress indicator
-                            self.stdout.write(f"Created {created_marksheets} marksheets...")
+                        records.append({'exam_id': exam.id, 'student_id': student.id, 'subject_id': subject.id,
+                                        'marks_obtained': random.randint(min_marks, max_marks),
+                                        'remarks': 'Demo marks'})
+        
+        # One upsert, and one ranking rebuild per exam instead of one per mark
+        created_marksheets, errors = Marksheet.bulk_upsert(records)
+        for error in errors:
+            self.stdout.write(self.style.ERROR(error))
         
         self.stdout.write(
             self.style.SUCCESS(
@@ -0,0 +1,63 @@
+import time
+from django.core.management.base import BaseCommand
+from django.http import HttpResponse
+from django.test import RequestFactory
+from schoolmgmt.access_policy import DEFAULT_ACCESS_POLICY, get_access_policy
+from schoolmgmt.middleware import AdminAuthMiddleware
+from schoolmgmt.student_access_middleware import StudentAccessMiddleware
+
+SAMPLE_PATHS = [
+    '/', '/blog/12/', '/static/css/site.css', '/media/student_photos/a.jpg', '/public-school-calendar/',
+    '/dashboard/', '/students/15/', '/api/student-fee-history/15/', '/whatsapp-balance/', '/attendance/',
+]
+
+
+class CountingSession(dict):
+    """Session stand-in that counts reads, i.e. the loads a real session would do"""
+
+    reads = 0
+
+    def get(self, key, default=None):
+        CountingSession.reads += 1
+        return super().get(key, default)
+
+
+def linear_scan(path):
+    """The per-request checks the middlewares did before the policy was compiled"""
+    public = DEFAULT_ACCESS_POLICY['public']
+    blocked = list(DEFAULT_ACCESS_POLICY['student_blocked']['prefix'])
+    is_public = path in list(public['exact']) or any(path.startswith(prefix) for prefix in list(public['prefix']))
+    is_blocked = any(path.startswith(prefix) for prefix in blocked)
+    return is_public, is_blocked
+
+
+class Command(BaseCommand):
+    help = 'Time the compiled access policy against a linear prefix scan and count session reads'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=100000, help='Classifications per path')
+
+    def handle(self, *args, **options):
+        iterations = options['iterations']
+        policy = get_access_policy()
+
+        for name, classify in (('linear scan', linear_scan), ('compiled policy', policy.classify)):
+            start = time.perf_counter()
+            for path in SAMPLE_PATHS:
+                for _ in range(iterations):
+                    classify(path)
+            elapsed = time.perf_counter() - start
+            per_call = elapsed / (iterations * len(SAMPLE_PATHS)) * 1e9
+            self.stdout.write(f'{name:>16}: {per_call:8.1f} ns per path')
+
+        stack = AdminAuthMiddleware(StudentAccessMiddleware(lambda request: HttpResponse()))
+        factory = RequestFactory()
+        self.stdout.write('\nSession reads per anonymous request through both middlewares:')
+        for path in SAMPLE_PATHS:
+            request = factory.get(path)
+            request.session = CountingSession()
+            CountingSession.reads = 0
+            response = stack(request)
+            self.stdout.write(f'  {path:<32} {CountingSession.reads} reads, status {response.status_code}')
+
+        self.stdout.write(self.style.SUCCESS('Done'))
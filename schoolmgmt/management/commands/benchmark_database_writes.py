@@ -0,0 +1,94 @@
+import os
+import tempfile
+import threading
+import time
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connections, transaction
+from schoolmgmt.db_profile import register_database, sqlite_database
+
+BENCH_TABLE = 'benchmark_writes'
+
+
+class Command(BaseCommand):
+    help = ('Measure concurrent write throughput: plain SQLite against the tuned SQLite profile, '
+            'both in temporary files, plus a server database when --database names one')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=8, help='Concurrent writer threads')
+        parser.add_argument('--writes', type=int, default=200, help='Transactions per worker')
+        parser.add_argument('--database', help=f'Also benchmark this database alias; a scratch {BENCH_TABLE} '
+                                               'table is created in it and dropped afterwards')
+
+    def handle(self, *args, **options):
+        workers, writes = options['workers'], options['writes']
+        if options['database'] and options['database'] not in connections:
+            raise CommandError(f'Unknown database alias "{options["database"]}"')
+        with tempfile.TemporaryDirectory() as directory:
+            profiles = [
+                # Django's old settings: rollback journal, default 5s timeout, deferred transactions
+                ('sqlite (plain)', {'ENGINE': 'django.db.backends.sqlite3',
+                                    'NAME': os.path.join(directory, 'plain.sqlite3')}),
+                ('sqlite (WAL profile)', sqlite_database(os.path.join(directory, 'tuned.sqlite3'))),
+            ]
+            if options['database']:
+                # Only on request: the scratch table goes into that real database
+                chosen = connections[options['database']]
+                profiles.append((f'{options["database"]} ({chosen.vendor})', chosen.settings_dict))
+
+            self.stdout.write(f'{workers} workers x {writes} transactions (insert + update each)')
+            for index, (name, config) in enumerate(profiles):
+                alias = f'benchmark_{index}'
+                register_database(alias, config)
+                elapsed, failures = self.run_profile(alias, workers, writes)
+                done = workers * writes - failures
+                self.stdout.write(f'  {name:<22} {done / elapsed:8.0f} writes/s  {failures} failed  ({elapsed:.2f}s)')
+                connections[alias].close()
+
+        self.stdout.write(self.style.SUCCESS('Done'))
+
+    def run_profile(self, alias, workers, writes):
+        connection = connections[alias]
+        if BENCH_TABLE in connection.introspection.table_names():
+            raise CommandError(f'{connection.settings_dict["NAME"]} already has a {BENCH_TABLE} table; '
+                               'drop it or pick another database')
+        with connection.cursor() as cursor:
+            cursor.execute(f'CREATE TABLE {BENCH_TABLE} (worker integer, seq integer, status varchar(10))')
+        connection.close()
+        try:
+            return self.time_writes(alias, workers, writes)
+        finally:
+            with connections[alias].cursor() as cursor:
+                cursor.execute(f'DROP TABLE {BENCH_TABLE}')
+            connections[alias].close()
+
+    def time_writes(self, alias, workers, writes):
+
+        failures = []
+        barrier = threading.Barrier(workers)
+
+        def worker(number):
+            # Each thread gets its own connection from Django's per-thread handler
+            connection = connections[alias]
+            failed = 0
+            barrier.wait()
+            for seq in range(writes):
+                try:
+                    # The shape of an attendance save: insert a row, then update it
+                    with transaction.atomic(using=alias), connection.cursor() as cursor:
+                        cursor.execute(f'INSERT INTO {BENCH_TABLE} VALUES (%s, %s, %s)', [number, seq, 'present'])
+                        cursor.execute(f'UPDATE {BENCH_TABLE} SET status = %s WHERE worker = %s AND seq = %s',
+                                       ['late', number, seq])
+                except OperationalError:
+                    # "database is locked"
+                    failed += 1
+            failures.append(failed)
+            connection.close()
+
+        threads = [threading.Thread(target=worker, args=(number,)) for number in range(workers)]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+        return elapsed, sum(failures)
@@ -0,0 +1,47 @@
+import random
+import time
+from django.core.management.base import BaseCommand
+from schoolmgmt.student_search import StudentSearchIndex
+
+FIRST_NAMES = ['Aarav', 'Sita', 'Ram', 'Gita', 'Hari', 'Anita', 'Bikash', 'Sunita', 'Prakash', 'Manisha',
+               'Suman', 'Rojina', 'Kiran', 'Nabin', 'Pooja', 'Sagar', 'Asmita', 'Dipesh', 'Kabita', 'Roshan']
+SURNAMES = ['Sharma', 'Shrestha', 'Gurung', 'Tamang', 'Thapa', 'Rai', 'Magar', 'Karki', 'Adhikari', 'Poudel',
+            'Bhattarai', 'Khadka', 'Maharjan', 'Basnet', 'Limbu', 'Joshi', 'Bista', 'Regmi', 'Lama', 'Ghimire']
+CLASSES = ['Nursery', 'LKG', 'UKG', 'One', 'Two', 'Three', 'Four', 'Five', 'Six', 'Seven', 'Eight', 'Nine', 'Ten']
+QUERIES = ['s', 'a', '5', 'sh', 'sha', 'shrestha', 'REG2024001', 'sita gurung', 'ram', 'five', 'hari thapa', 'zzz']
+
+
+class Command(BaseCommand):
+    help = 'Build the student search index over synthetic students and time autocomplete queries'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--students', type=int, default=50000, help='Number of synthetic students')
+        parser.add_argument('--repeat', type=int, default=20, help='Times each query is run')
+
+    def handle(self, *args, **options):
+        rng = random.Random(7)
+        rows = [
+            (number, f'{rng.choice(FIRST_NAMES)} {rng.choice(SURNAMES)}', f'REG2024{number:05d}',
+             rng.choice(CLASSES), rng.choice('AB'), f'{rng.choice(FIRST_NAMES)} {rng.choice(SURNAMES)}')
+            for number in range(1, options['students'] + 1)
+        ]
+
+        start = time.perf_counter()
+        index = StudentSearchIndex(rows)
+        self.stdout.write(f'Built index of {len(index)} students in {(time.perf_counter() - start) * 1000:.0f} ms')
+
+        worst = 0
+        for query in QUERIES:
+            # The first run pays for anything the index fills in as queries arrive
+            start = time.perf_counter()
+            page, total = index.search(query)
+            first = (time.perf_counter() - start) * 1000
+            start = time.perf_counter()
+            for _ in range(options['repeat']):
+                page, total = index.search(query)
+            elapsed = (time.perf_counter() - start) / options['repeat'] * 1000
+            worst = max(worst, first, elapsed)
+            self.stdout.write(f'  {query!r:<16} {elapsed:7.2f} ms  (first {first:.2f} ms)  {total} matches')
+
+        style = self.style.SUCCESS if worst < 20 else self.style.WARNING
+        self.stdout.write(style(f'Slowest query: {worst:.2f} ms'))
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand, CommandError
+from schoolmgmt.query_plans import explain_hot_queries
+
+
+class Command(BaseCommand):
+    help = 'EXPLAIN the hot view queries and fail if any of them scans its table instead of using an index'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--verbose-plans', action='store_true', help='Print the full plan of every query')
+
+    def handle(self, *args, **options):
+        failures = []
+        for name, indexed, plan in explain_hot_queries():
+            status = self.style.SUCCESS('index') if indexed else self.style.ERROR('SCAN')
+            self.stdout.write(f'  {status}  {name}')
+            if options['verbose_plans'] or not indexed:
+                for line in plan.splitlines():
+                    self.stdout.write(f'         {line}')
+            if not indexed:
+                failures.append(name)
+
+        if failures:
+            raise CommandError(f'{len(failures)} hot queries do not use an index: {", ".join(failures)}')
+        self.stdout.write(self.style.SUCCESS('Every hot query uses an index'))
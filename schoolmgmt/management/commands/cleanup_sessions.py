@@ -0,0 +1,52 @@
+import glob
+import os
+import pickle
+import time
+from importlib import import_module
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.filebased import FileBasedCache
+from django.core.management.base import BaseCommand
+
+
+def remove_expired_cache_files(directory):
+    """Delete the expired entries of a file based cache; returns how many were removed.
+
+    Each .djcache file starts with its pickled expiry time (None for entries
+    that never expire), followed by the compressed value.
+    """
+    removed = 0
+    for path in glob.glob(os.path.join(glob.escape(directory), f'*{FileBasedCache.cache_suffix}')):
+        try:
+            with open(path, 'rb') as cache_file:
+                try:
+                    expires = pickle.load(cache_file)
+                except EOFError:
+                    expires = 0  # An empty file counts as expired, as it does for the backend
+            if expires is not None and expires < time.time():
+                os.remove(path)
+                removed += 1
+        except FileNotFoundError:
+            # Another process removed it first
+            continue
+    return removed
+
+
+class Command(BaseCommand):
+    help = 'Delete expired sessions from the session store and the session cache'
+
+    def handle(self, *args, **options):
+        engine = import_module(settings.SESSION_ENGINE)
+        self.stdout.write(f'Session storage: {settings.SESSION_STORAGE} ({settings.SESSION_ENGINE})')
+
+        try:
+            # Database rows are deleted here; cache and cookie sessions expire on their own
+            engine.SessionStore.clear_expired()
+        except NotImplementedError:
+            self.stdout.write(self.style.WARNING('This session engine cannot clear expired sessions'))
+
+        if isinstance(caches[settings.SESSION_CACHE_ALIAS], FileBasedCache):
+            removed = remove_expired_cache_files(settings.CACHES[settings.SESSION_CACHE_ALIAS]['LOCATION'])
+            self.stdout.write(f'Removed {removed} expired entries from the session cache')
+
+        self.stdout.write(self.style.SUCCESS('Session cleanup complete'))
@@ -0,0 +1,100 @@
+from django.apps import apps
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.core.serializers import sort_dependencies
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from schoolmgmt.db_profile import database_config, register_database, same_database
+
+SOURCE_ALIAS = 'copy_source'
+
+
+def models_in_copy_order():
+    """Every concrete model, tables referenced by foreign keys first, then the m2m tables"""
+    app_list = [(app_config, None) for app_config in apps.get_app_configs()]
+    ordered = [model for model in sort_dependencies(app_list, allow_cycles=True)
+               if model._meta.managed and not model._meta.proxy]
+    seen = set(ordered)
+    for model in apps.get_models(include_auto_created=True):
+        if model not in seen and model._meta.managed and not model._meta.proxy:
+            ordered.append(model)
+    return ordered
+
+
+class Command(BaseCommand):
+    help = ('Copy all data from another database (the SQLite file by default) into the configured '
+            'database, e.g. after pointing DATABASE_URL at a freshly migrated PostgreSQL database')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--source',
+            default=f'sqlite:///{settings.BASE_DIR / "db.sqlite3"}',
+            help='Database URL to copy from (default: the project SQLite file)',
+        )
+        parser.add_argument('--batch-size', type=int, default=1000, help='Rows inserted per statement batch')
+        parser.add_argument('--noinput', '--no-input', action='store_false', dest='interactive',
+                            help='Do not ask before replacing the data in the target database')
+
+    def handle(self, *args, **options):
+        source = register_database(SOURCE_ALIAS, database_config(options['source']))
+        target = connections[DEFAULT_DB_ALIAS]
+        if same_database(source.settings_dict, target.settings_dict):
+            raise CommandError('The source and target are the same database')
+
+        source_tables = set(source.introspection.table_names())
+        target_tables = set(target.introspection.table_names())
+        copy_models = []
+        for model in models_in_copy_order():
+            table = model._meta.db_table
+            if table not in source_tables:
+                continue
+            if table not in target_tables:
+                self.stdout.write(self.style.WARNING(f'Skipping {table}: it is not in the target database'))
+                continue
+            copy_models.append(model)
+
+        if options['interactive']:
+            answer = input(f'This replaces every row in {len(copy_models)} tables of '
+                           f'{target.settings_dict["NAME"]}. Type "yes" to continue: ')
+            if answer != 'yes':
+                raise CommandError('Copy cancelled')
+
+        total = 0
+        with transaction.atomic(using=DEFAULT_DB_ALIAS):
+            with target.cursor() as cursor:
+                # migrate already filled content types and permissions; the source's rows replace them
+                for model in reversed(copy_models):
+                    cursor.execute(f'DELETE FROM {target.ops.quote_name(model._meta.db_table)}')
+                for model in copy_models:
+                    count = self.copy_table(model, target, cursor, options['batch_size'])
+                    total += count
+                    self.stdout.write(f'  {model._meta.label}: {count} rows')
+                for sql in target.ops.sequence_reset_sql(no_style(), copy_models):
+                    cursor.execute(sql)
+
+        self.stdout.write(self.style.SUCCESS(f'Copied {total} rows in {len(copy_models)} tables'))
+
+    def copy_table(self, model, target, cursor, batch_size):
+        fields = model._meta.concrete_fields
+        quote = target.ops.quote_name
+        sql = 'INSERT INTO {} ({}) VALUES ({})'.format(
+            quote(model._meta.db_table),
+            ', '.join(quote(field.column) for field in fields),
+            ', '.join(['%s'] * len(fields)),
+        )
+        rows = (model._base_manager.using(SOURCE_ALIAS).order_by('pk')
+                .values_list(*[field.attname for field in fields]))
+
+        count = 0
+        batch = []
+        for row in rows.iterator(chunk_size=batch_size):
+            # Convert through the fields so JSON, decimals and dates suit the target backend
+            batch.append([field.get_db_prep_save(value, connection=target) for field, value in zip(fields, row)])
+            if len(batch) >= batch_size:
+                cursor.executemany(sql, batch)
+                count += len(batch)
+                batch = []
+        if batch:
+            cursor.executemany(sql, batch)
+            count += len(batch)
+        return count
@@ -1,87 +1,72 @@
 from django.core.management.base import BaseCommand
-from schoolmgmt.models import Teacher, Subject
-from collections import defaultdict
+from schoolmgmt.models import Teacher, TeacherClassSubject
+from schoolmgmt.teacher_directory import TeacherCoverage, format_assignment_changes
 
 class Command(BaseCommand):
     help = 'Ensure all subjects in all classes are covered by teachers'
 
     def handle(self, *args, **options):
-        # Get all subjects grouped by class
-        all_subjects = Subject.objects.all().order_by('class_name', 'name')
-        subjects_by_class = defaultdict(list)
+        # Current coverage from the active assignments, in two queries
+        coverage = TeacherCoverage.build()
         
-        for subject in all_subjects:
-            subjects_by_class[subject.class_name].append(subject.name)
-        
-        # Get current teacher coverage
-        teachers = Teacher.objects.all()
-        current_coverage = defaultdict(set)
-        
-        for teacher in teachers:
-            if teacher.assigned_class and teacher.subjects:
-                class_name = teacher.assigned_class
-                if class_name != 'All Classes':
-                    teacher_subjects = [s.strip() for s in teacher.subjects.split(',') if s.strip()]
-                    current_coverage[class_name].update(teacher_subjects)
-        
-        # Find gaps and update existing teachers or create new ones
+        # Find gaps and give them to a teacher of the class, or a new teacher
+        wanted = {}
         gaps_filled = 0
         teachers_updated = 0
         
-        for class_name, required_subjects in subjects_by_class.items():
-            covered_subjects = current_coverage[class_name]
-            missing_subjects = set(required_subjects) - covered_subjects
+        for class_name in coverage.classes():
+            missing_subjects = coverage.uncovered(class_name)
+            if not coverage.subjects.get(class_name):
+                continue
             
             if missing_subjects:
-                self.stdout.write(f"\nClass {class_name} missing subjects: {', '.join(missing_subjects)}")
+                self.stdout.write(f"\nClass {class_name} missing subjects: {', '.join(name for _, name in missing_subjects)}")
                 
                 # Try to find an existing teacher for this class to add missing subjects
-                class_teacher = Teacher.objects.filter(assigned_class=class_name).first()
+                class_teachers = coverage.teachers_for_class(class_name)
                 
-                if class_teacher:
-                    # Add missing subjects to existing teacher
-                    current_subjects = [s.strip() for s in class_teacher.subjects.split(',') if s.strip()] if class_teacher.subjects else []
-                    all_subjects_for_teacher = list(set(current_subjects + list(missing_subjects)))
-                    class_teacher.subjects = ', '.join(sorted(all_subjects_for_teacher))
-                    class_teacher.save()
-                    self.stdout.write(f"  > Updated {class_teacher.name} to cover all subjects")
+                if class_teachers:
+                    teacher_id = class_teachers[0]['id']
+                    self.stdout.write(f"  > Updated {class_teachers[0]['name']} to cover all subjects")
                     teachers_updated += 1
-                    gaps_filled += len(missing_subjects)
                 else:
                     # Create new teacher for this class
-                    new_teacher = self.create_teacher_for_class(class_name, required_subjects)
+                    new_teacher = self.create_teacher_for_class(class_name)
+                    teacher_id = new_teacher.id
                     self.stdout.write(f"  > Created {new_teacher.name} to cover all subjects")
-                    gaps_filled += len(missing_subjects)
+                wanted.setdefault(teacher_id, set()).update((class_name, subject_id) for subject_id, _ in missing_subjects)
+                gaps_filled += len(missing_subjects)
             else:
                 self.stdout.write(f"Class {class_name}: All subjects covered")
         
+        # Only adds assignments; nothing a teacher already teaches is removed
+        summary = TeacherClassSubject.bulk_assign(wanted, replace=False)
+        
         # Verify complete coverage
         self.stdout.write(f"\n{'='*50}")
         self.stdout.write("COVERAGE VERIFICATION:")
         self.stdout.write(f"{'='*50}")
         
+        coverage = TeacherCoverage.build()
         total_subjects = 0
         covered_subjects = 0
         
-        for class_name, required_subjects in subjects_by_class.items():
-            total_subjects += len(required_subjects)
+        for class_name in coverage.classes():
+            summary_row = coverage.class_summary(class_name)
+            required = len(summary_row['subjects'])
+            if not required:
+                continue
+            total_subjects += required
+            covered_subjects += summary_row['covered']
             
-            # Recheck coverage after updates
-            class_teachers = Teacher.objects.filter(assigned_class=class_name)
-            class_coverage = set()
-            
-            for teacher in class_teachers:
-                if teacher.subjects:
-                    teacher_subjects = [s.strip() for s in teacher.subjects.split(',') if s.strip()]
-                    class_coverage.update(teacher_subjects)
-            
-            covered_in_class = len(set(required_subjects) & class_coverage)
-            covered_subjects += covered_in_class
-            
-            coverage_percent = (covered_in_class / len(required_subjects)) * 100
+            coverage_percent = (summary_row['covered'] / required) * 100
             status = "COMPLETE" if coverage_percent == 100 else f"INCOMPLETE {coverage_percent:.1f}%"
             
-            self.stdout.write(f"{class_name:12} | {covered_in_class:2}/{len(required_subjects):2} subjects | {status}")
+            self.stdout.write(f"{class_name:12} | {summary_row['covered']:2}/{required:2} subjects | {status}")
+        
+        if not total_subjects:
+            self.stdout.write(self.style.WARNING("WARNING: No subjects found"))
+            return
         
         overall_coverage = (covered_subjects / total_subjects) * 100
         
@@ -89,15 +74,16 @@ class Command(BaseCommand):
         self.stdout.write(f"OVERALL COVERAGE: {covered_subjects}/{total_subjects} subjects ({overall_coverage:.1f}%)")
         self.stdout.write(f"Teachers Updated: {teachers_updated}")
         self.stdout.write(f"Subject Gaps Filled: {gaps_filled}")
+        self.stdout.write(f"Assignments: {format_assignment_changes(summary)}")
         self.stdout.write(f"{'='*50}")
         
-        if overall_coverage == 100:
+        if covered_subjects == total_subjects:
             self.stdout.write(self.style.SUCCESS("SUCCESS: ALL SUBJECTS IN ALL CLASSES ARE NOW COVERED!"))
         else:
             self.stdout.write(self.style.WARNING(f"WARNING: Still need to cover {total_subjects - covered_subjects} subjects"))
 
-    def create_teacher_for_class(self, class_name, subjects):
-        """Create a new teacher for a specific class with all required subjects"""
+    def create_teacher_for_class(self, class_name):
+        """Create a new teacher for a specific class; the caller assigns the subjects"""
         
         # Teacher names for different classes
         teacher_names = {
@@ -141,9 +127,6 @@ class Command(BaseCommand):
             gender=gender,
             joining_date=date.today() - timedelta(days=random.randint(365, 1825)),
             qualification="Bachelor's Degree in Education",
-            assigned_class=class_name,
-            subject_specialization=subjects[0] if subjects else "General",
-            subjects=', '.join(sorted(subjects)),
             salary=random.randint(25000, 45000),
             is_active=True
         )
@@ -13,7 +13,9 @@ class Command(BaseCommand):
             self.stdout.write(self.style.ERROR('No students found. Please add students first.'))
             return
         
-        created_count = 0
+        existing = set(Marksheet.objects.filter(student__in=students)
+                       .values_list('student_id', 'exam_id', 'subject_id'))
+        records = []
         
         for student in students:
             # Get subjects for this student's class
@@ -34,7 +36,7 @@ class Command(BaseCommand):
             for exam in exams:
                 for subject in subjects:
                     # Check if marksheet already exists
-                    if not Marksheet.objects.filter(student=student, exam=exam, subject=subject).exists():
+                    if (student.id, exam.id, subject.id) not in existing:
                         # Generate random marks (60-95% of max marks for good results)
                         min_marks = int(subject.max_marks * 0.6)
                         max_marks = int(subject.max_marks * 0.95)
@@ -44,14 +46,18 @@ class Command(BaseCommand):
                         if random.random() < 0.1:  # 10% chance of lower marks
                             marks = random.randint(subject.pass_marks, min_marks)
                         
-                        Marksheet.objects.create(
-                            student=student,
-                            exam=exam,
-                            subject=subject,
-                            marks_obtained=marks,
-                            remarks=random.choice(['Excellent', 'Good', 'Satisfactory', 'Needs Improvement', ''])
-                        )
-                        created_count += 1
+                        records.append({
+                            'exam_id': exam.id,
+                            'student_id': student.id,
+                            'subject_id': subject.id,
+                            'marks_obtained': marks,
+                            'remarks': random.choice(['Excellent', 'Good', 'Satisfactory', 'Needs Improvement', ''])
+                        })
+        
+        # One upsert, and one ranking rebuild per exam instead of one per mark
+        created_count, errors = Marksheet.bulk_upsert(records)
+        for error in errors:
+            self.stdout.write(self.style.ERROR(error))
         
         self.stdout.write(
             self.style.SUCCESS(f'Successfully created {created_count} marksheet entries')
@@ -50,35 +50,35 @@ class Command(BaseCommand):
             self.stdout.write(self.style.ERROR(f'No subjects found for class {student.student_class}'))
             return
 
-        created_count = 0
-        updated_count = 0
-
+        existing = set(Marksheet.objects.filter(student=student, exam=exam).values_list('subject_id', flat=True))
+        records = []
         for subject in subjects:
             # Generate random marks (70-95% of max marks for good results)
             min_marks = int(subject.max_marks * 0.70)
             max_marks = int(subject.max_marks * 0.95)
             marks = random.randint(min_marks, max_marks)
+            records.append({
+                'exam_id': exam.id,
+                'student_id': student.id,
+                'subject_id': subject.id,
+                'marks_obtained': marks,
+                'remarks': 'Good performance' if marks >= subject.pass_marks else 'Needs improvement'
+            })
 
-            # Create or update marksheet
-            marksheet, created = Marksheet.objects.update_or_create(
-                student=student,
-                exam=exam,
-                subject=subject,
-                defaults={
-                    'marks_obtained': marks,
-                    'remarks': 'Good performance' if marks >= subject.pass_marks else 'Needs improvement'
-                }
-            )
-
-            if created:
-                created_count += 1
-            else:
-                updated_count += 1
-
-            self.stdout.write(f'{subject.name}: {marks}/{subject.max_marks} - {marksheet.grade} ({marksheet.status})')
+        # Create or update the marksheets in one upsert, with one ranking rebuild
+        saved_count, errors = Marksheet.bulk_upsert(records)
+        if errors:
+            for error in errors:
+                self.stdout.write(self.style.ERROR(error))
+            return
+        updated_count = len(existing & {record['subject_id'] for record in records})
+        created_count = saved_count - updated_count
 
         # Calculate overall result
-        marksheets = Marksheet.objects.filter(student=student, exam=exam)
+        marksheets = Marksheet.objects.filter(student=student, exam=exam).select_related('subject')
+        for marksheet in marksheets:
+            self.stdout.write(f'{marksheet.subject.name}: {marksheet.marks_obtained}/{marksheet.subject.max_marks} '
+                              f'- {marksheet.grade} ({marksheet.status})')
         total_marks = sum(m.subject.max_marks for m in marksheets)
         obtained_marks = sum(m.marks_obtained for m in marksheets)
         percentage = (obtained_marks / total_marks * 100) if total_marks > 0 else 0
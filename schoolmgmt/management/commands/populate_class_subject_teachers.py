@@ -1,5 +1,6 @@
 from django.core.management.base import BaseCommand
-from schoolmgmt.models import Teacher, Subject
+from schoolmgmt.models import Teacher, TeacherClassSubject
+from schoolmgmt.teacher_directory import TeacherCoverage, format_assignment_changes
 from datetime import date
 
 class Command(BaseCommand):
@@ -8,12 +9,8 @@ class Command(BaseCommand):
     def handle(self, *args, **options):
         Teacher.objects.all().delete()
         
-        # Get subjects by class
-        subjects_by_class = {}
-        for subject in Subject.objects.all():
-            if subject.class_name not in subjects_by_class:
-                subjects_by_class[subject.class_name] = []
-            subjects_by_class[subject.class_name].append(subject.name)
+        # Subjects by class, to turn the subject names below into assignments
+        coverage = TeacherCoverage.build()
         
         teachers_data = [
             # Nursery Teachers
@@ -79,6 +76,7 @@ class Command(BaseCommand):
         ]
         
         created_count = 0
+        wanted = {}
         for teacher_data in teachers_data:
             teacher = Teacher.objects.create(
                 name=teacher_data['name'],
@@ -90,28 +88,27 @@ class Command(BaseCommand):
                 date_of_birth=date(1980 + (created_count % 15), 1 + (created_count % 12), 1 + (created_count % 28)),
                 joining_date=date(2015 + (created_count % 8), 1 + (created_count % 12), 1 + (created_count % 28)),
                 qualification=f"M.Ed in {teacher_data['specialization']}, B.Ed",
-                assigned_class=teacher_data['class'],
-                subject_specialization=teacher_data['specialization'],
-                subjects=', '.join(teacher_data['subjects']),
                 salary=35000 + (created_count * 2000),
                 is_active=True
             )
             created_count += 1
-            self.stdout.write(f"Created: {teacher.name} - {teacher.assigned_class} - {teacher.subject_specialization}")
+            class_names = coverage.classes() if teacher_data['class'] == 'All Classes' else [teacher_data['class']]
+            wanted[teacher.id], _ = coverage.find_subjects(class_names, teacher_data['subjects'])
+            self.stdout.write(f"Created: {teacher.name} - {teacher_data['class']} - {teacher_data['specialization']}")
+        
+        # Every assignment in one pass
+        summary = TeacherClassSubject.bulk_assign(wanted)
+        self.stdout.write(f"Assignments: {format_assignment_changes(summary)}")
         
         # Verify coverage
         self.stdout.write("\n=== COVERAGE VERIFICATION ===")
-        for class_name, subjects in subjects_by_class.items():
-            teachers_for_class = Teacher.objects.filter(assigned_class=class_name)
-            covered_subjects = set()
-            for teacher in teachers_for_class:
-                if teacher.subjects:
-                    covered_subjects.update([s.strip() for s in teacher.subjects.split(',')])
-            
-            missing = set(subjects) - covered_subjects
+        coverage = TeacherCoverage.build()
+        for class_name in coverage.classes():
+            subjects = coverage.subjects.get(class_name, [])
+            missing = coverage.uncovered_subjects(class_name)
             if missing:
-                self.stdout.write(f"{class_name}: Missing {missing}")
-            else:
+                self.stdout.write(f"{class_name}: Missing {', '.join(missing)}")
+            elif subjects:
                 self.stdout.write(f"{class_name}: All {len(subjects)} subjects covered")
         
-        self.stdout.write(f"\nCreated {created_count} teachers covering all classes and subjects")
\ No newline at end of file
+        self.stdout.write(f"\nCreated {created_count} teachers covering all classes and subjects")
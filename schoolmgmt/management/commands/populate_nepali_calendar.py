@@ -1,6 +1,8 @@
 from django.core.management.base import BaseCommand
 from schoolmgmt.models import CalendarEvent, SchoolDetail
 from schoolmgmt.nepali_calendar import NepaliCalendar
+from schoolmgmt.public_cache import bump_content_version
+from schoolmgmt.school_calendar import invalidate_school_calendar
 
 class Command(BaseCommand):
     help = 'Populate Nepali calendar events from Baishakh 1 to Chaitra 30'
@@ -24,6 +26,8 @@ class Command(BaseCommand):
         
         if options['clear']:
             CalendarEvent.objects.all().delete()
+            bump_content_version()
+            invalidate_school_calendar()
             self.stdout.write('Cleared existing events.')
         
         # Accurate Festival data based on traditional Nepali calendar
@@ -1,47 +1,44 @@
 from django.core.management.base import BaseCommand
 from schoolmgmt.models import Teacher, Subject, TeacherClassSubject
+from schoolmgmt.teacher_directory import format_assignment_changes
 import random
 
 class Command(BaseCommand):
     help = 'Populate class and subject assignments for all teachers'
 
     def handle(self, *args, **options):
-        teachers = Teacher.objects.all()
-        subjects = Subject.objects.all()
-        
-        if not teachers.exists():
+        teacher_ids = list(Teacher.objects.values_list('id', flat=True))
+        subjects_by_class = {}
+        for subject_id, class_name in Subject.objects.order_by('id').values_list('id', 'class_name'):
+            subjects_by_class.setdefault(class_name, []).append(subject_id)
+
+        if not teacher_ids:
             self.stdout.write(self.style.ERROR('No teachers found'))
             return
-            
-        if not subjects.exists():
+
+        if not subjects_by_class:
             self.stdout.write(self.style.ERROR('No subjects found'))
             return
 
-        # Clear existing assignments
-        TeacherClassSubject.objects.all().delete()
-        
-        for teacher in teachers:
+        # Pick every teacher's assignments in memory, then write them in one pass
+        wanted = {}
+        for teacher_id in teacher_ids:
+            pairs = wanted.setdefault(teacher_id, set())
             # Get random classes (1-3 classes per teacher)
             classes = ['Nursery', 'LKG', 'UKG', 'One', 'Two', 'Three', 'Four', 'Five', 'Six', 'Seven', 'Eight', 'Nine', 'Ten']
             assigned_classes = random.sample(classes, random.randint(1, 3))
-            
+
             for class_name in assigned_classes:
-                # Get subjects for this class
-                class_subjects = subjects.filter(class_name=class_name)
-                if class_subjects.exists():
+                class_subjects = subjects_by_class.get(class_name)
+                if class_subjects:
                     # Assign 1-3 subjects per class
-                    num_subjects = min(random.randint(1, 3), class_subjects.count())
-                    selected_subjects = random.sample(list(class_subjects), num_subjects)
-                    
-                    for subject in selected_subjects:
-                        TeacherClassSubject.objects.create(
-                            teacher=teacher,
-                            class_name=class_name,
-                            subject=subject,
-                            is_active=True
-                        )
-        
-        total_assignments = TeacherClassSubject.objects.count()
+                    num_subjects = min(random.randint(1, 3), len(class_subjects))
+                    pairs.update((class_name, subject_id) for subject_id in random.sample(class_subjects, num_subjects))
+
+        # Replaces each teacher's current assignments; rows no longer wanted are deactivated
+        summary = TeacherClassSubject.bulk_assign(wanted)
+        total_assignments = TeacherClassSubject.objects.filter(is_active=True).count()
+        self.stdout.write(f'Assignments: {format_assignment_changes(summary)}')
         self.stdout.write(
-            self.style.SUCCESS(f'Successfully created {total_assignments} teacher assignments')
-        )
\ No newline at end of file
+            self.style.SUCCESS(f'Successfully assigned {total_assignments} active teacher assignments')
+        )
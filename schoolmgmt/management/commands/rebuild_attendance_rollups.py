@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from schoolmgmt.attendance_rollup import rebuild_attendance_rollups
+
+
+class Command(BaseCommand):
+    help = ('Rebuild the monthly student and daily class attendance rollups from SchoolAttendance, '
+            'e.g. after attendance rows were deleted in bulk or students changed class')
+
+    def handle(self, *args, **options):
+        month_count, day_count = rebuild_attendance_rollups()
+        self.stdout.write(self.style.SUCCESS(
+            f'Rebuilt {month_count} student-month and {day_count} class-day attendance rows'
+        ))
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+from schoolmgmt.models import Exam, ExamRanking
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the stored ExamRanking merit lists from marksheets'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--exam',
+            dest='exam_id',
+            type=int,
+            help='Only rebuild the ranking of one exam (by id)',
+        )
+
+    def handle(self, *args, **options):
+        exams = Exam.objects.all()
+        if options['exam_id']:
+            exams = exams.filter(id=options['exam_id'])
+
+        exam_count = 0
+        row_count = 0
+        for exam in exams:
+            row_count += ExamRanking.refresh_for_exam(exam)
+            exam_count += 1
+
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt rankings for {exam_count} exams ({row_count} students)'))
@@ -0,0 +1,65 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from schoolmgmt.models import Student, StudentFeeBalance
+from schoolmgmt.fee_ledger import build_fee_balances, refresh_fee_balances, BALANCE_FIELDS
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the StudentFeeBalance summary table from payments, expenses and fee structures'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--verify',
+            action='store_true',
+            help='Only compare stored balances with freshly computed ones and report differences',
+        )
+        parser.add_argument(
+            '--class',
+            dest='student_class',
+            help='Limit to students of one class',
+        )
+
+    def handle(self, *args, **options):
+        students = Student.objects.all()
+        if options['student_class']:
+            students = students.filter(student_class=options['student_class'])
+
+        if options['verify']:
+            self.verify(students)
+            return
+
+        with transaction.atomic():
+            # Drop rows for students outside the rebuilt set only when rebuilding everything
+            if not options['student_class']:
+                StudentFeeBalance.objects.exclude(student__in=students).delete()
+            count = refresh_fee_balances(students)
+
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt fee balances for {count} students'))
+
+    def verify(self, students):
+        stored = {balance.student_id: balance for balance in StudentFeeBalance.objects.filter(student__in=students)}
+        compare_fields = [field for field in BALANCE_FIELDS if field != 'updated_at']
+
+        missing = 0
+        mismatched = 0
+        for expected in build_fee_balances(students):
+            actual = stored.get(expected.student_id)
+            if actual is None:
+                missing += 1
+                self.stdout.write(self.style.WARNING(f'Student {expected.student_id}: no balance row'))
+                continue
+            differences = [
+                f'{field} {getattr(actual, field)} != {getattr(expected, field)}'
+                for field in compare_fields
+                if getattr(actual, field) != getattr(expected, field)
+            ]
+            if differences:
+                mismatched += 1
+                self.stdout.write(self.style.WARNING(f'Student {expected.student_id}: ' + ', '.join(differences)))
+
+        if missing or mismatched:
+            self.stdout.write(self.style.ERROR(
+                f'{mismatched} stale and {missing} missing balances. Run rebuild_fee_balances to fix them.'
+            ))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'All {len(stored)} fee balances are up to date'))
@@ -1,5 +1,6 @@
 from django.core.management.base import BaseCommand
 from schoolmgmt.models import CalendarEvent
+from schoolmgmt.school_calendar import invalidate_school_calendar
 
 class Command(BaseCommand):
     help = 'Remove all festival events from the school calendar'
@@ -43,6 +44,7 @@ class Command(BaseCommand):
             
             # Delete all festival events
             deleted_count = festival_events.delete()[0]
+            invalidate_school_calendar()
             self.stdout.write(
                 self.style.SUCCESS(
                     f'Successfully deleted {deleted_count} festival events from the calendar.'
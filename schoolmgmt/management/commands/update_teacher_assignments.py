@@ -1,5 +1,6 @@
 from django.core.management.base import BaseCommand
-from schoolmgmt.models import Teacher
+from schoolmgmt.models import Teacher, TeacherClassSubject
+from schoolmgmt.teacher_directory import TeacherCoverage, format_assignment_changes
 
 class Command(BaseCommand):
     help = 'Update teachers with class and subject assignments'
@@ -123,17 +124,23 @@ class Command(BaseCommand):
             }
         }
         
-        updated_count = 0
+        # Subject names are resolved against the class's subjects; 'All Classes' means every class
+        coverage = TeacherCoverage.build()
+        teacher_ids = dict(Teacher.objects.filter(name__in=teacher_assignments).values_list('name', 'id'))
+        wanted = {}
         for teacher_name, assignments in teacher_assignments.items():
-            try:
-                teacher = Teacher.objects.get(name=teacher_name)
-                teacher.assigned_class = assignments['assigned_class']
-                teacher.subject_specialization = assignments['subject_specialization']
-                teacher.subjects = assignments['subjects']
-                teacher.save()
-                updated_count += 1
-                self.stdout.write(f"Updated {teacher_name}: Class {assignments['assigned_class']}, Subject: {assignments['subject_specialization']}")
-            except Teacher.DoesNotExist:
+            if teacher_name not in teacher_ids:
                 self.stdout.write(f"Teacher {teacher_name} not found")
+                continue
+            assigned_class = assignments['assigned_class']
+            class_names = coverage.classes() if assigned_class == 'All Classes' else [assigned_class]
+            subject_names = [s.strip() for s in assignments['subjects'].split(',') if s.strip()]
+            pairs, unknown = coverage.find_subjects(class_names, subject_names)
+            wanted[teacher_ids[teacher_name]] = pairs
+            self.stdout.write(f"Updated {teacher_name}: Class {assigned_class}, {len(pairs)} class subjects")
+            if unknown:
+                self.stdout.write(f"  No such subject for {assigned_class}: {', '.join(unknown)}")
         
-        self.stdout.write(f"\nSuccessfully updated {updated_count} teachers with class and subject assignments")
\ No newline at end of file
+        summary = TeacherClassSubject.bulk_assign(wanted)
+        self.stdout.write(f"\nSuccessfully updated {len(wanted)} teachers with class and subject assignments")
+        self.stdout.write(f"Assignments: {format_assignment_changes(summary)}")
@@ -0,0 +1,75 @@
+# Generated by Django 5.2.6 on 2026-10-18 19:05
+
+import json
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+NEPALI_MONTHS_EN = [
+    'Baisakh', 'Jestha', 'Ashadh', 'Shrawan', 'Bhadra', 'Ashwin',
+    'Kartik', 'Mangsir', 'Poush', 'Magh', 'Falgun', 'Chaitra'
+]
+
+
+def _load_json_list(value):
+    if not value:
+        return []
+    try:
+        data = json.loads(value)
+    except (ValueError, TypeError):
+        return []
+    return data if isinstance(data, list) else []
+
+
+def backfill_payment_items(apps, schema_editor):
+    """Create FeePaymentItem rows from the JSON stored on existing payments"""
+    FeePayment = apps.get_model('schoolmgmt', 'FeePayment')
+    FeePaymentItem = apps.get_model('schoolmgmt', 'FeePaymentItem')
+
+    items = []
+    payments = FeePayment.objects.values_list('id', 'student_id', 'selected_months', 'fee_types')
+    for payment_id, student_id, selected_months, fee_types in payments.iterator(chunk_size=2000):
+        months = []
+        for month in _load_json_list(selected_months):
+            month = str(month).strip()
+            if month.isdigit() and 1 <= int(month) <= 12:
+                month = NEPALI_MONTHS_EN[int(month) - 1]
+            months.append(month)
+        types = []
+        for fee_data in _load_json_list(fee_types):
+            fee_type = fee_data.get('type') if isinstance(fee_data, dict) else fee_data
+            if fee_type:
+                types.append(str(fee_type))
+        for fee_type in types or ['']:
+            for month in months or ['']:
+                if month or fee_type:
+                    items.append(FeePaymentItem(payment_id=payment_id, student_id=student_id,
+                                                month=month, fee_type=fee_type))
+        if len(items) >= 2000:
+            FeePaymentItem.objects.bulk_create(items)
+            items = []
+    FeePaymentItem.objects.bulk_create(items)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('schoolmgmt', '0059_student_password_student_username_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FeePaymentItem',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.CharField(blank=True, help_text='Nepali month name, blank for one-time fees', max_length=20)),
+                ('fee_type', models.CharField(blank=True, help_text='Fee type code, e.g. monthly_fee', max_length=50)),
+                ('payment', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='items', to='schoolmgmt.feepayment')),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='fee_payment_items', to='schoolmgmt.student')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['month', 'student'], name='feeitem_month_student_idx'), models.Index(fields=['student', 'fee_type'], name='feeitem_student_type_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_payment_items, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,81 @@
+# Generated by Django 5.2.6 on 2026-10-18 19:07
+
+from decimal import Decimal
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Max, Sum
+
+MONTHLY_FEE_FIELDS = ('monthly_fee', 'tuition_fee', 'transportation_fee')
+ONE_TIME_FEE_FIELDS = ('admission_fee', 'examination_fee', 'library_fee', 'sports_fee', 'laboratory_fee', 'computer_fee')
+DEFAULT_ANNUAL_FEE = Decimal('82000')
+
+
+def backfill_fee_balances(apps, schema_editor):
+    """Compute a StudentFeeBalance row for every existing student"""
+    Student = apps.get_model('schoolmgmt', 'Student')
+    FeeStructure = apps.get_model('schoolmgmt', 'FeeStructure')
+    FeePayment = apps.get_model('schoolmgmt', 'FeePayment')
+    StudentDailyExpense = apps.get_model('schoolmgmt', 'StudentDailyExpense')
+    StudentFeeBalance = apps.get_model('schoolmgmt', 'StudentFeeBalance')
+
+    annual_fees = {}
+    for fs in FeeStructure.objects.all():
+        annual_fees[fs.class_name] = (
+            sum(getattr(fs, field) * 12 for field in MONTHLY_FEE_FIELDS) +
+            sum(getattr(fs, field) for field in ONE_TIME_FEE_FIELDS)
+        )
+    payments = {
+        row['student_id']: row
+        for row in FeePayment.objects.order_by().values('student_id')
+        .annotate(total_paid=Sum('payment_amount'), last_payment_date=Max('payment_date'))
+    }
+    expenses = dict(
+        StudentDailyExpense.objects.filter(is_paid=False).order_by().values('student_id')
+        .annotate(total=Sum('amount')).values_list('student_id', 'total')
+    )
+
+    balances = []
+    for student_id, student_class in Student.objects.values_list('id', 'student_class').iterator(chunk_size=2000):
+        total_due = annual_fees.get(student_class, DEFAULT_ANNUAL_FEE)
+        payment = payments.get(student_id, {})
+        total_paid = payment.get('total_paid') or Decimal('0')
+        unpaid_expenses = expenses.get(student_id) or Decimal('0')
+        balances.append(StudentFeeBalance(
+            student_id=student_id,
+            total_due=total_due,
+            total_paid=total_paid,
+            unpaid_expenses=unpaid_expenses,
+            pending_amount=max(Decimal('0'), total_due + unpaid_expenses - total_paid),
+            last_payment_date=payment.get('last_payment_date'),
+        ))
+    StudentFeeBalance.objects.bulk_create(balances, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('schoolmgmt', '0060_feepaymentitem'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StudentFeeBalance',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('total_due', models.DecimalField(decimal_places=2, default=0, help_text='Annual fee from the class fee structure', max_digits=12)),
+                ('total_paid', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('unpaid_expenses', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('pending_amount', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('last_payment_date', models.DateField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('student', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='fee_balance', to='schoolmgmt.student')),
+            ],
+            options={
+                'verbose_name': 'Student Fee Balance',
+                'verbose_name_plural': 'Student Fee Balances',
+                'indexes': [models.Index(fields=['pending_amount'], name='feebal_pending_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_fee_balances, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.6 on 2026-10-18 19:15
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('schoolmgmt', '0061_studentfeebalance'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExamRanking',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('section', models.CharField(blank=True, max_length=1)),
+                ('total_marks', models.IntegerField(default=0)),
+                ('obtained_marks', models.IntegerField(default=0)),
+                ('percentage', models.DecimalField(decimal_places=2, default=0, max_digits=5)),
+                ('gpa', models.DecimalField(decimal_places=2, default=0, max_digits=3)),
+                ('failed_subjects', models.IntegerField(default=0)),
+                ('class_rank', models.IntegerField(help_text='Dense rank by percentage within the exam')),
+                ('section_rank', models.IntegerField(help_text="Dense rank by percentage within the student's section")),
+                ('class_size', models.IntegerField(default=0)),
+                ('section_size', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('exam', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='rankings', to='schoolmgmt.exam')),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='exam_rankings', to='schoolmgmt.student')),
+            ],
+            options={
+                'ordering': ['exam', 'class_rank', 'student__name'],
+                'indexes': [models.Index(fields=['exam', 'class_rank'], name='examrank_exam_rank_idx'), models.Index(fields=['exam', 'section', 'section_rank'], name='examrank_section_rank_idx')],
+                'unique_together': {('exam', 'student')},
+            },
+        ),
+    ]
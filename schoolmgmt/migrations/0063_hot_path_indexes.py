@@ -0,0 +1,45 @@
+# Generated by Django 5.2.6 on 2026-10-18 19:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('schoolmgmt', '0062_examranking'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='calendarevent',
+            index=models.Index(fields=['event_date', 'is_active'], name='calevent_date_active_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='exam',
+            index=models.Index(fields=['class_name', 'exam_date'], name='exam_class_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='feepayment',
+            index=models.Index(fields=['payment_date'], name='feepay_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='schoolattendance',
+            index=models.Index(fields=['date', 'status'], name='schoolatt_date_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='student',
+            index=models.Index(fields=['student_class', 'section', 'name'], name='student_class_section_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='student',
+            index=models.Index(fields=['student_class', 'name'], name='student_class_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='studentdailyexpense',
+            index=models.Index(fields=['student', 'is_paid'], name='dailyexp_student_paid_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='studentregistration',
+            index=models.Index(fields=['status', 'registration_date'], name='registration_status_idx'),
+        ),
+    ]
@@ -0,0 +1,85 @@
+# Generated by Django 5.2.6 on 2026-10-18 19:40
+
+from datetime import timedelta
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Max, Min, Q
+
+from schoolmgmt.bikram_sambat import month_bounds, to_bs
+
+STATUSES = ('present', 'absent', 'late')
+
+
+def backfill_attendance_rollups(apps, schema_editor):
+    """Count existing attendance into the monthly student and daily class rollups"""
+    SchoolAttendance = apps.get_model('schoolmgmt', 'SchoolAttendance')
+    StudentMonthlyAttendance = apps.get_model('schoolmgmt', 'StudentMonthlyAttendance')
+    ClassDailyAttendance = apps.get_model('schoolmgmt', 'ClassDailyAttendance')
+    counts = {status: Count('id', filter=Q(status=status)) for status in STATUSES}
+
+    months = []
+    bounds = SchoolAttendance.objects.aggregate(first=Min('date'), last=Max('date'))
+    day = bounds['first']
+    while day and day <= bounds['last']:
+        year, month, _ = to_bs(day)
+        first, last = month_bounds(year, month)
+        for row in (SchoolAttendance.objects.filter(date__range=(first, last)).order_by()
+                    .values('student_id').annotate(**counts)):
+            months.append(StudentMonthlyAttendance(
+                student_id=row['student_id'], bs_year=year, bs_month=month, month_start=first,
+                **{status: row[status] for status in STATUSES}))
+        day = last + timedelta(days=1)
+    StudentMonthlyAttendance.objects.bulk_create(months, batch_size=500)
+
+    ClassDailyAttendance.objects.bulk_create([
+        ClassDailyAttendance(date=row['date'], student_class=row['student__student_class'],
+                             **{status: row[status] for status in STATUSES})
+        for row in SchoolAttendance.objects.order_by().values('date', 'student__student_class').annotate(**counts)
+    ], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('schoolmgmt', '0063_hot_path_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ClassDailyAttendance',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('student_class', models.CharField(max_length=10)),
+                ('present', models.PositiveIntegerField(default=0)),
+                ('absent', models.PositiveIntegerField(default=0)),
+                ('late', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Class Daily Attendance',
+                'verbose_name_plural': 'Class Daily Attendance',
+                'unique_together': {('date', 'student_class')},
+            },
+        ),
+        migrations.CreateModel(
+            name='StudentMonthlyAttendance',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('bs_year', models.PositiveSmallIntegerField()),
+                ('bs_month', models.PositiveSmallIntegerField()),
+                ('month_start', models.DateField(help_text='AD date of the first day of the BS month')),
+                ('present', models.PositiveIntegerField(default=0)),
+                ('absent', models.PositiveIntegerField(default=0)),
+                ('late', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='monthly_attendance', to='schoolmgmt.student')),
+            ],
+            options={
+                'verbose_name': 'Student Monthly Attendance',
+                'verbose_name_plural': 'Student Monthly Attendance',
+                'unique_together': {('student', 'month_start')},
+            },
+        ),
+        migrations.RunPython(backfill_attendance_rollups, migrations.RunPython.noop),
+    ]
@@ -1,11 +1,21 @@
-from django.db import models
+from django.db import models, transaction
+from django.utils import timezone
 from datetime import datetime, date
 from .nepali_calendar import NepaliCalendar
+from .grading import grade_for, clear_grading_cache
+from .public_cache import PublicContentMixin
+from .site_cache import school_cache, admin_cache
+from .student_search import StudentSearchIndex, invalidate_search_index
+import copy
+import json
 import os
 import random
+import threading
+from contextlib import contextmanager
+from functools import partial
 from django.conf import settings
 
-class SchoolDetail(models.Model):
+class SchoolDetail(PublicContentMixin, models.Model):
     school_name = models.CharField(max_length=200, default="Everest Academy")
     logo = models.ImageField(upload_to='school_logos/', blank=True, null=True)
     principal_signature = models.ImageField(upload_to='signatures/', blank=True, null=True)
@@ -22,8 +32,24 @@ class SchoolDetail(models.Model):
     def __str__(self):
         return self.school_name
     
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        school_cache.invalidate()
+    
+    def delete(self, *args, **kwargs):
+        result = super().delete(*args, **kwargs)
+        school_cache.invalidate()
+        return result
+    
     @classmethod
     def get_current_school(cls):
+        """The school row, served from the process cache after the first load"""
+        school = school_cache.get('current', cls._load_current_school)
+        # A copy, so a view that edits fields without saving can't change other requests' school
+        return copy.copy(school)
+    
+    @classmethod
+    def _load_current_school(cls):
         try:
             school, created = cls.objects.get_or_create(
                 pk=1,
@@ -147,19 +173,57 @@ class Student(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
-    def save(self, *args, **kwargs):
-        # Auto-populate Nepali dates if not provided
+    def populate_nepali_dates(self):
+        """Auto-populate Nepali admission date and session if not provided"""
         if self.admission_date:
             if not self.admission_date_nepali:
-                nepali_date = NepaliCalendar.english_to_nepali_date(self.admission_date)
-                self.admission_date_nepali = NepaliCalendar.format_nepali_date(nepali_date, 'full_en')
-                self.admission_date_nepali_short = NepaliCalendar.format_nepali_date(nepali_date, 'short')
+                self.admission_date_nepali = NepaliCalendar.format_english_date(self.admission_date, 'full_en')
+                self.admission_date_nepali_short = NepaliCalendar.format_english_date(self.admission_date, 'short')
             
             # Auto-populate Nepali session if not provided
             if not self.session_nepali:
                 self.session_nepali = NepaliCalendar.get_nepali_session_from_date(self.admission_date)
+    
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        student = super().from_db(db, field_names, values)
+        # Kept as given, so reads pay nothing; save() compares the indexed fields against them
+        student._loaded_row = (field_names, values)
+        return student
+    
+    def search_fields_changed(self):
+        """Whether saving would change what the search index holds for this student"""
+        if getattr(self, '_loaded_row', None) is None:
+            return True
+        loaded = dict(zip(*self._loaded_row))
+        return any(field in self.__dict__ and (field not in loaded or loaded[field] != self.__dict__[field])
+                   for field in StudentSearchIndex.FIELDS)
+    
+    def save(self, *args, **kwargs):
+        self.populate_nepali_dates()
         
-        super().save(*args, **kwargs)
+        update_fields = kwargs.get('update_fields')
+        reindex = self.search_fields_changed()
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            # Class decides the fee structure, so the cached balance follows it
+            if update_fields is None or 'student_class' in update_fields:
+                from .fee_ledger import refresh_balances_on_save
+                refresh_balances_on_save([self])
+        from .dashboard_stats import invalidate_dashboard_stats
+        invalidate_dashboard_stats()
+        # Fee and date bookkeeping saves leave the search index alone; rebuilding it reads every student
+        if reindex:
+            invalidate_search_index()
+        saved = [field for field in StudentSearchIndex.FIELDS if field in self.__dict__]
+        self._loaded_row = (saved, [self.__dict__[field] for field in saved])
+    
+    def delete(self, *args, **kwargs):
+        result = super().delete(*args, **kwargs)
+        from .dashboard_stats import invalidate_dashboard_stats
+        invalidate_dashboard_stats()
+        invalidate_search_index()
+        return result
     
     def __str__(self):
         return f"{self.name} - {self.reg_number}"
@@ -194,10 +258,9 @@ class Student(models.Model):
         if self.dob_nepali:
             return self.dob_nepali
         try:
-            from nepali_datetime import date as nepali_date
-            nepali_dob = nepali_date.from_datetime_date(self.dob)
-            return f'{nepali_dob.year}/{nepali_dob.month:02d}/{nepali_dob.day:02d}'
-        except:
+            nepali_dob = NepaliCalendar.english_to_nepali_date(self.dob)
+            return f"{nepali_dob['year']}/{nepali_dob['month']:02d}/{nepali_dob['day']:02d}"
+        except ValueError:
             return f'{self.dob.year + 57}/{self.dob.month:02d}/{self.dob.day:02d}'
     
     def get_random_photo_url(self):
@@ -216,6 +279,11 @@ class Student(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Class and section listings ordered by name, and whole-class lists ordered by name
+            models.Index(fields=['student_class', 'section', 'name'], name='student_class_section_idx'),
+            models.Index(fields=['student_class', 'name'], name='student_class_name_idx'),
+        ]
 
 
 class FeeStructure(models.Model):
@@ -256,6 +324,34 @@ class FeeStructure(models.Model):
     def __str__(self):
         return f"{self.class_name}"
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        fee_structure = super().from_db(db, field_names, values)
+        # The class the stored row belongs to, whatever class_name is changed to before saving
+        fee_structure._loaded_class_name = fee_structure.__dict__.get('class_name')
+        return fee_structure
+    
+    def affected_classes(self):
+        """This structure's class, and the class its stored row had if that differs"""
+        return {self.class_name, getattr(self, '_loaded_class_name', None)} - {None}
+    
+    def save(self, *args, **kwargs):
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            # Moving a structure to another class changes the balances of both classes
+            self.refresh_student_balances(self.affected_classes())
+        self._loaded_class_name = self.class_name
+    
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            result = super().delete(*args, **kwargs)
+            self.refresh_student_balances(self.affected_classes())
+        return result
+    
+    def refresh_student_balances(self, class_names=None):
+        from .fee_ledger import refresh_fee_balances
+        refresh_fee_balances(Student.objects.filter(student_class__in=class_names or [self.class_name]))
+    
     class Meta:
         ordering = ['class_order']
 
@@ -290,16 +386,116 @@ class FeePayment(models.Model):
     def save(self, *args, **kwargs):
         # Auto-populate Nepali payment date if not provided
         if self.payment_date and not self.payment_date_nepali:
-            nepali_date = NepaliCalendar.english_to_nepali_date(self.payment_date)
-            self.payment_date_nepali = NepaliCalendar.format_nepali_date(nepali_date, 'full_en')
-            self.payment_date_nepali_short = NepaliCalendar.format_nepali_date(nepali_date, 'short')
-        super().save(*args, **kwargs)
+            self.payment_date_nepali = NepaliCalendar.format_english_date(self.payment_date, 'full_en')
+            self.payment_date_nepali_short = NepaliCalendar.format_english_date(self.payment_date, 'short')
+        
+        update_fields = kwargs.get('update_fields')
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            
+            # Keep the normalized month / fee-type lines in step with the JSON fields
+            if update_fields is None or {'selected_months', 'fee_types'} & set(update_fields):
+                self.sync_items()
+            
+            from .fee_ledger import refresh_balances_on_save
+            refresh_balances_on_save(Student.objects.filter(pk=self.student_id))
+        from .dashboard_stats import invalidate_dashboard_stats
+        invalidate_dashboard_stats()
+    
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            result = super().delete(*args, **kwargs)
+            from .fee_ledger import refresh_balances_on_save
+            refresh_balances_on_save(Student.objects.filter(pk=self.student_id))
+        from .dashboard_stats import invalidate_dashboard_stats
+        invalidate_dashboard_stats()
+        return result
     
     def __str__(self):
         return f"{self.student.name} - Rs.{self.payment_amount} - {self.payment_date}"
     
+    def get_selected_months(self):
+        """Paid months as Nepali month names (numbers like '9' are mapped to 'Poush')"""
+        return [normalize_nepali_month(month) for month in _load_json_list(self.selected_months)]
+    
+    def get_fee_types(self):
+        """Fee type codes (e.g. 'monthly_fee') covered by this payment"""
+        fee_types = []
+        for fee_data in _load_json_list(self.fee_types):
+            fee_type = fee_data.get('type') if isinstance(fee_data, dict) else fee_data
+            if fee_type:
+                fee_types.append(str(fee_type))
+        return fee_types
+    
+    def build_items(self):
+        """Unsaved FeePaymentItem rows: one per fee type and month"""
+        months = self.get_selected_months() or ['']
+        fee_types = self.get_fee_types() or ['']
+        return [
+            FeePaymentItem(payment=self, student_id=self.student_id, month=month, fee_type=fee_type)
+            for fee_type in fee_types
+            for month in months
+            if month or fee_type
+        ]
+    
+    def sync_items(self):
+        self.items.all().delete()
+        FeePaymentItem.objects.bulk_create(self.build_items())
+    
     class Meta:
         ordering = ['-created_at']
+        indexes = [models.Index(fields=['payment_date'], name='feepay_date_idx')]
+
+
+def normalize_nepali_month(month):
+    """Return the English Nepali month name for a month name or 1-12 month number"""
+    month = str(month).strip()
+    if month.isdigit() and 1 <= int(month) <= 12:
+        return NepaliCalendar.NEPALI_MONTHS_EN[int(month) - 1]
+    return month
+
+
+def _load_json_list(value):
+    if not value:
+        return []
+    try:
+        data = json.loads(value)
+    except (ValueError, TypeError):
+        return []
+    return data if isinstance(data, list) else []
+
+
+class FeePaymentItem(models.Model):
+    """Normalized month / fee-type line of a FeePayment, written by FeePayment.save"""
+    payment = models.ForeignKey(FeePayment, on_delete=models.CASCADE, related_name='items')
+    student = models.ForeignKey(Student, on_delete=models.CASCADE, related_name='fee_payment_items')
+    month = models.CharField(max_length=20, blank=True, help_text="Nepali month name, blank for one-time fees")
+    fee_type = models.CharField(max_length=50, blank=True, help_text="Fee type code, e.g. monthly_fee")
+    
+    def __str__(self):
+        return f"{self.student_id} - {self.month or '-'} - {self.fee_type or '-'}"
+    
+    @classmethod
+    def paid_months_for(cls, student):
+        return set(cls.objects.filter(student=student).exclude(month='').values_list('month', flat=True))
+    
+    @classmethod
+    def paid_fee_types_for(cls, student):
+        return set(cls.objects.filter(student=student).exclude(fee_type='').values_list('fee_type', flat=True))
+    
+    @classmethod
+    def students_without_month(cls, month, students=None):
+        """Students (optionally within a queryset) that have not paid for a month"""
+        if students is None:
+            students = Student.objects.all()
+        paid = cls.objects.filter(month=normalize_nepali_month(month)).values('student_id')
+        return students.exclude(pk__in=paid)
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['month', 'student'], name='feeitem_month_student_idx'),
+            models.Index(fields=['student', 'fee_type'], name='feeitem_student_type_idx'),
+        ]
 
 
 class Subject(models.Model):
@@ -324,6 +520,17 @@ class Subject(models.Model):
     def __str__(self):
         return f"{self.name} - {self.class_name}"
     
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        from .teacher_directory import invalidate_teacher_coverage
+        invalidate_teacher_coverage()
+    
+    def delete(self, *args, **kwargs):
+        result = super().delete(*args, **kwargs)
+        from .teacher_directory import invalidate_teacher_coverage
+        invalidate_teacher_coverage()
+        return result
+    
     class Meta:
         ordering = ['class_name', 'name']
 
@@ -350,9 +557,8 @@ class Exam(models.Model):
         # Auto-populate Nepali dates if not provided
         if self.exam_date:
             if not self.exam_date_nepali:
-                nepali_date = NepaliCalendar.english_to_nepali_date(self.exam_date)
-                self.exam_date_nepali = NepaliCalendar.format_nepali_date(nepali_date, 'full_en')
-                self.exam_date_nepali_short = NepaliCalendar.format_nepali_date(nepali_date, 'short')
+                self.exam_date_nepali = NepaliCalendar.format_english_date(self.exam_date, 'full_en')
+                self.exam_date_nepali_short = NepaliCalendar.format_english_date(self.exam_date, 'short')
             
             # Auto-populate Nepali session if not provided
             if not self.session_nepali:
@@ -365,6 +571,7 @@ class Exam(models.Model):
     
     class Meta:
         ordering = ['-exam_date']
+        indexes = [models.Index(fields=['class_name', 'exam_date'], name='exam_class_date_idx')]
 
 
 class Marksheet(models.Model):
@@ -378,85 +585,223 @@ class Marksheet(models.Model):
     def __str__(self):
         return f"{self.student.name} - {self.exam.name} - {self.subject.name}"
     
+    def save(self, *args, **kwargs):
+        # Grids should go through bulk_upsert; loops of saves can run inside ExamRanking.deferred_refresh()
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            ExamRanking.schedule_refresh(self.exam_id)
+    
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            result = super().delete(*args, **kwargs)
+            ExamRanking.schedule_refresh(self.exam_id)
+        return result
+    
     @property
     def percentage(self):
         return (int(self.marks_obtained) / int(self.subject.max_marks)) * 100
     
+    @property
+    def grade_info(self):
+        return grade_for(self.percentage)
+    
     @property
     def grade(self):
-        percentage = self.percentage
-        if percentage >= 90:
-            return 'A+'
-        elif percentage >= 80:
-            return 'A'
-        elif percentage >= 70:
-            return 'B+'
-        elif percentage >= 60:
-            return 'B'
-        elif percentage >= 50:
-            return 'C+'
-        elif percentage >= 40:
-            return 'C'
-        elif percentage >= 30:
-            return 'D+'
-        elif percentage >= 20:
-            return 'D'
-        else:
-            return 'E'
+        return self.grade_info.grade
     
     @property
     def grade_point(self):
-        percentage = self.percentage
-        if percentage >= 90:
-            return 4.0
-        elif percentage >= 80:
-            return 3.6
-        elif percentage >= 70:
-            return 3.2
-        elif percentage >= 60:
-            return 2.8
-        elif percentage >= 50:
-            return 2.4
-        elif percentage >= 40:
-            return 2.0
-        elif percentage >= 30:
-            return 1.6
-        elif percentage >= 20:
-            return 1.2
-        else:
-            return 0.8
+        return self.grade_info.grade_point
     
     @property
     def grade_remarks(self):
-        percentage = self.percentage
-        if percentage >= 90:
-            return 'Outstanding'
-        elif percentage >= 80:
-            return 'Excellent'
-        elif percentage >= 70:
-            return 'Very Good'
-        elif percentage >= 60:
-            return 'Good'
-        elif percentage >= 50:
-            return 'Satisfactory'
-        elif percentage >= 40:
-            return 'Acceptable'
-        elif percentage >= 30:
-            return 'Partially Accept.'
-        elif percentage >= 20:
-            return 'Weak'
-        else:
-            return 'Very Poor / Fail'
+        return self.grade_info.remarks
     
     @property
     def status(self):
         return 'Pass' if int(self.marks_obtained) >= int(self.subject.pass_marks) else 'Fail'
     
+    @classmethod
+    def bulk_upsert(cls, records):
+        """Validate and save a grid of marks in one transaction.
+        
+        records is a list of dicts with exam_id, student_id, subject_id, marks_obtained
+        and optional remarks. Exams, students and subjects are looked up with one
+        in_bulk() query each and marks are checked against Subject.max_marks in memory.
+        Returns (saved_count, errors); when any record has an error nothing is saved.
+        """
+        def ids(key):
+            return {int(record[key]) for record in records if str(record.get(key, '')).isdigit()}
+        
+        exams = Exam.objects.in_bulk(ids('exam_id'))
+        students = Student.objects.in_bulk(ids('student_id'))
+        subjects = Subject.objects.in_bulk(ids('subject_id'))
+        
+        errors = []
+        rows = {}
+        for number, record in enumerate(records, start=1):
+            record_errors = []
+            related = {}
+            for key, objects, label in (('exam_id', exams, 'Exam'), ('student_id', students, 'Student'),
+                                        ('subject_id', subjects, 'Subject')):
+                value = record.get(key)
+                obj = objects.get(int(value)) if str(value).isdigit() else None
+                if obj is None:
+                    record_errors.append(f'{label} {value} not found')
+                related[key] = obj
+            
+            subject = related['subject_id']
+            value = record.get('marks_obtained')
+            try:
+                marks = int(value)
+                if isinstance(value, float) and marks != value:
+                    raise ValueError
+            except (TypeError, ValueError):
+                record_errors.append(f'Marks "{value}" is not a whole number')
+            else:
+                if marks < 0 or (subject and marks > subject.max_marks):
+                    record_errors.append(f'Marks {marks} must be between 0 and {subject.max_marks if subject else "max marks"}')
+            
+            if record_errors:
+                errors.extend(f'Record {number}: {message}' for message in record_errors)
+                continue
+            
+            # A later record for the same student, exam and subject wins
+            rows[(related['student_id'].id, related['exam_id'].id, subject.id)] = cls(
+                student=related['student_id'], exam=related['exam_id'], subject=subject,
+                marks_obtained=marks, remarks=record.get('remarks', '') or '',
+            )
+        
+        if errors:
+            return 0, errors
+        
+        with transaction.atomic():
+            cls.objects.bulk_create(
+                list(rows.values()), batch_size=500, update_conflicts=True,
+                unique_fields=['student', 'exam', 'subject'], update_fields=['marks_obtained', 'remarks'],
+            )
+            for exam_id in {exam_id for _, exam_id, _ in rows}:
+                ExamRanking.refresh_for_exam(exams[exam_id])
+        return len(rows), []
+    
     class Meta:
         unique_together = ['student', 'exam', 'subject']
         ordering = ['exam', 'student', 'subject']
 
 
+class ExamRanking(models.Model):
+    """Stored result and rank of a student in one exam, rebuilt whenever that exam's marks change"""
+    exam = models.ForeignKey(Exam, on_delete=models.CASCADE, related_name='rankings')
+    student = models.ForeignKey(Student, on_delete=models.CASCADE, related_name='exam_rankings')
+    section = models.CharField(max_length=1, blank=True)
+    total_marks = models.IntegerField(default=0)
+    obtained_marks = models.IntegerField(default=0)
+    percentage = models.DecimalField(max_digits=5, decimal_places=2, default=0)
+    gpa = models.DecimalField(max_digits=3, decimal_places=2, default=0)
+    failed_subjects = models.IntegerField(default=0)
+    class_rank = models.IntegerField(help_text="Dense rank by percentage within the exam")
+    section_rank = models.IntegerField(help_text="Dense rank by percentage within the student's section")
+    class_size = models.IntegerField(default=0)
+    section_size = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f"{self.student.name} - {self.exam.name} - Rank {self.class_rank}"
+    
+    @property
+    def overall_status(self):
+        return 'Pass' if self.failed_subjects == 0 else 'Fail'
+    
+    @classmethod
+    def refresh_for_exam(cls, exam):
+        """Recompute and replace the ranking rows of one exam (an Exam or its id)"""
+        from .results import ExamResults
+        if not isinstance(exam, Exam):
+            exam = Exam.objects.filter(pk=exam).first()
+            if exam is None:
+                return 0
+        
+        results = list(ExamResults(exam, stored_ranks=False))
+        by_section = {}
+        for result in results:
+            by_section.setdefault(result.student.section, []).append(result)
+        
+        section_ranks = {}
+        for in_section in by_section.values():
+            for result, rank in zip(in_section, dense_ranks(result.raw_percentage for result in in_section)):
+                section_ranks[result.student.pk] = rank
+        
+        rows = [
+            cls(exam=exam, student=result.student, section=result.student.section,
+                total_marks=result.total_marks, obtained_marks=result.obtained_marks,
+                percentage=result.percentage, gpa=result.gpa, failed_subjects=result.failed_subjects,
+                class_rank=result.rank, section_rank=section_ranks[result.student.pk],
+                class_size=len(results), section_size=len(by_section[result.student.section]))
+            for result in results
+        ]
+        
+        with transaction.atomic():
+            cls.objects.filter(exam=exam).delete()
+            cls.objects.bulk_create(rows, batch_size=500)
+        return len(rows)
+    
+    @classmethod
+    def schedule_refresh(cls, exam_id):
+        """Refresh an exam's rankings after a mark changes: at the end of an open deferred_refresh() block,
+        otherwise when the current transaction commits"""
+        pending = getattr(_deferred_rankings, 'exam_ids', None)
+        if pending is not None:
+            pending.add(exam_id)
+        else:
+            transaction.on_commit(partial(cls.refresh_for_exam, exam_id))
+    
+    @classmethod
+    @contextmanager
+    def deferred_refresh(cls):
+        """Refresh each exam whose marks are saved in the block once, when the block ends.
+
+        For code saving marks row by row; a block that raises refreshes nothing, as its
+        transaction is rolled back. Nested blocks leave the refresh to the outermost one.
+        """
+        if getattr(_deferred_rankings, 'exam_ids', None) is not None:
+            yield
+            return
+        _deferred_rankings.exam_ids = set()
+        try:
+            yield
+            exam_ids = _deferred_rankings.exam_ids
+        finally:
+            _deferred_rankings.exam_ids = None
+        for exam_id in sorted(exam_ids):
+            cls.refresh_for_exam(exam_id)
+    
+    @classmethod
+    def ensure_for_exams(cls, exam_ids):
+        """Build rankings for exams that have marks but no ranking rows yet (e.g. marks saved before rankings existed)"""
+        exam_ids = set(exam_ids) - set(cls.objects.filter(exam_id__in=exam_ids).values_list('exam_id', flat=True))
+        for exam_id in exam_ids:
+            cls.refresh_for_exam(exam_id)
+    
+    class Meta:
+        unique_together = ['exam', 'student']
+        ordering = ['exam', 'class_rank', 'student__name']
+        indexes = [
+            models.Index(fields=['exam', 'class_rank'], name='examrank_exam_rank_idx'),
+            models.Index(fields=['exam', 'section', 'section_rank'], name='examrank_section_rank_idx'),
+        ]
+
+
+# Exams waiting for ExamRanking.deferred_refresh() to end, per thread
+_deferred_rankings = threading.local()
+
+
+def dense_ranks(scores):
+    """Dense ranks (1, 2, 2, 3) for scores in their given order, highest score first"""
+    scores = list(scores)
+    rank_of = {score: rank for rank, score in enumerate(sorted(set(scores), reverse=True), start=1)}
+    return [rank_of[score] for score in scores]
+
+
 class Session(models.Model):
     name = models.CharField(max_length=20, unique=True)  # e.g., "2024-25", "2025-26"
     name_nepali = models.CharField(max_length=25, blank=True, help_text="Nepali session name (e.g., 2082-83)")
@@ -475,12 +820,10 @@ class Session(models.Model):
             self.name_nepali = f"{start_year}-{str(start_year+1)[-2:]}"
         
         if self.start_date and not self.start_date_nepali:
-            nepali_date = NepaliCalendar.english_to_nepali_date(self.start_date)
-            self.start_date_nepali = NepaliCalendar.format_nepali_date(nepali_date, 'full_en')
+            self.start_date_nepali = NepaliCalendar.format_english_date(self.start_date, 'full_en')
         
         if self.end_date and not self.end_date_nepali:
-            nepali_date = NepaliCalendar.english_to_nepali_date(self.end_date)
-            self.end_date_nepali = NepaliCalendar.format_nepali_date(nepali_date, 'full_en')
+            self.end_date_nepali = NepaliCalendar.format_english_date(self.end_date, 'full_en')
         
         super().save(*args, **kwargs)
     
@@ -517,44 +860,21 @@ class StudentMarks(models.Model):
     def percentage(self):
         return (self.marks_obtained / self.max_marks) * 100 if self.max_marks > 0 else 0
     
+    @property
+    def grade_info(self):
+        return grade_for(self.percentage)
+    
     @property
     def grade(self):
-        percentage = self.percentage
-        if percentage >= 90: return 'A+'
-        elif percentage >= 80: return 'A'
-        elif percentage >= 70: return 'B+'
-        elif percentage >= 60: return 'B'
-        elif percentage >= 50: return 'C+'
-        elif percentage >= 40: return 'C'
-        elif percentage >= 30: return 'D+'
-        elif percentage >= 20: return 'D'
-        else: return 'E'
+        return self.grade_info.grade
     
     @property
     def grade_point(self):
-        percentage = self.percentage
-        if percentage >= 90: return 4.0
-        elif percentage >= 80: return 3.6
-        elif percentage >= 70: return 3.2
-        elif percentage >= 60: return 2.8
-        elif percentage >= 50: return 2.4
-        elif percentage >= 40: return 2.0
-        elif percentage >= 30: return 1.6
-        elif percentage >= 20: return 1.2
-        else: return 0.8
+        return self.grade_info.grade_point
     
     @property
     def grade_remarks(self):
-        percentage = self.percentage
-        if percentage >= 90: return 'Outstanding'
-        elif percentage >= 80: return 'Excellent'
-        elif percentage >= 70: return 'Very Good'
-        elif percentage >= 60: return 'Good'
-        elif percentage >= 50: return 'Satisfactory'
-        elif percentage >= 40: return 'Acceptable'
-        elif percentage >= 30: return 'Partially Accept.'
-        elif percentage >= 20: return 'Weak'
-        else: return 'Very Poor / Fail'
+        return self.grade_info.remarks
     
     class Meta:
         unique_together = ['student', 'subject_name', 'session', 'exam_type']
@@ -572,6 +892,15 @@ class GradingScale(models.Model):
     def __str__(self):
         return f"{self.min_marks}-{self.max_marks}: {self.grade} ({self.grade_point})"
     
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        clear_grading_cache()
+    
+    def delete(self, *args, **kwargs):
+        result = super().delete(*args, **kwargs)
+        clear_grading_cache()
+        return result
+    
     class Meta:
         ordering = ['-min_marks']
 
@@ -591,44 +920,21 @@ class MarksheetData(models.Model):
     def percentage(self):
         return (self.marks_obtained / self.max_marks) * 100 if self.max_marks > 0 else 0
     
+    @property
+    def grade_info(self):
+        return grade_for(self.percentage)
+    
     @property
     def grade(self):
-        percentage = self.percentage
-        if percentage >= 90: return 'A+'
-        elif percentage >= 80: return 'A'
-        elif percentage >= 70: return 'B+'
-        elif percentage >= 60: return 'B'
-        elif percentage >= 50: return 'C+'
-        elif percentage >= 40: return 'C'
-        elif percentage >= 30: return 'D+'
-        elif percentage >= 20: return 'D'
-        else: return 'E'
+        return self.grade_info.grade
     
     @property
     def grade_point(self):
-        percentage = self.percentage
-        if percentage >= 90: return 4.0
-        elif percentage >= 80: return 3.6
-        elif percentage >= 70: return 3.2
-        elif percentage >= 60: return 2.8
-        elif percentage >= 50: return 2.4
-        elif percentage >= 40: return 2.0
-        elif percentage >= 30: return 1.6
-        elif percentage >= 20: return 1.2
-        else: return 0.8
+        return self.grade_info.grade_point
     
     @property
     def grade_remarks(self):
-        percentage = self.percentage
-        if percentage >= 90: return 'Outstanding'
-        elif percentage >= 80: return 'Excellent'
-        elif percentage >= 70: return 'Very Good'
-        elif percentage >= 60: return 'Good'
-        elif percentage >= 50: return 'Satisfactory'
-        elif percentage >= 40: return 'Acceptable'
-        elif percentage >= 30: return 'Partially Accept.'
-        elif percentage >= 20: return 'Weak'
-        else: return 'Very Poor / Fail'
+        return self.grade_info.remarks
     
     class Meta:
         ordering = ['-created_at']
@@ -646,8 +952,46 @@ class StudentDailyExpense(models.Model):
     def __str__(self):
         return f"{self.student.name} - {self.description} - Rs.{self.amount}"
     
+    def save(self, *args, **kwargs):
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            from .fee_ledger import refresh_balances_on_save
+            refresh_balances_on_save(Student.objects.filter(pk=self.student_id))
+    
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            result = super().delete(*args, **kwargs)
+            from .fee_ledger import refresh_balances_on_save
+            refresh_balances_on_save(Student.objects.filter(pk=self.student_id))
+        return result
+    
     class Meta:
         ordering = ['-created_at']
+        indexes = [models.Index(fields=['student', 'is_paid'], name='dailyexp_student_paid_idx')]
+
+
+class StudentFeeBalance(models.Model):
+    """Denormalized fee position per student, refreshed whenever payments, daily
+    expenses or fee structures change (see fee_ledger.refresh_fee_balances)"""
+    student = models.OneToOneField(Student, on_delete=models.CASCADE, related_name='fee_balance')
+    total_due = models.DecimalField(max_digits=12, decimal_places=2, default=0, help_text="Annual fee from the class fee structure")
+    total_paid = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    unpaid_expenses = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    pending_amount = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    last_payment_date = models.DateField(blank=True, null=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f"{self.student_id} - pending Rs.{self.pending_amount}"
+    
+    @property
+    def total_fee(self):
+        return self.total_due + self.unpaid_expenses
+    
+    class Meta:
+        indexes = [models.Index(fields=['pending_amount'], name='feebal_pending_idx')]
+        verbose_name = "Student Fee Balance"
+        verbose_name_plural = "Student Fee Balances"
 
 
 class AdminLogin(models.Model):
@@ -693,6 +1037,26 @@ class AdminLogin(models.Model):
     def save(self, *args, **kwargs):
         # Store password as plain text (no hashing)
         super().save(*args, **kwargs)
+        admin_cache.invalidate()
+    
+    def delete(self, *args, **kwargs):
+        result = super().delete(*args, **kwargs)
+        admin_cache.invalidate()
+        return result
+    
+    @classmethod
+    def get_active(cls, username=None, pk=None):
+        """Active login by username or id from the process cache, or None"""
+        key = ('pk', pk) if pk is not None else ('username', username)
+        
+        def load():
+            try:
+                return cls.objects.select_related('teacher').get(**{key[0]: key[1], 'is_active': True})
+            except (cls.DoesNotExist, ValueError):
+                return None
+        
+        admin = admin_cache.get(key, load)
+        return copy.copy(admin) if admin is not None else None
     
     def has_user_management_permission(self):
         return self.is_super_admin or self.can_view_user_management
@@ -804,6 +1168,7 @@ class StudentRegistration(models.Model):
     
     class Meta:
         ordering = ['-registration_date']
+        indexes = [models.Index(fields=['status', 'registration_date'], name='registration_status_idx')]
         verbose_name = "Student Registration"
         verbose_name_plural = "Student Registrations"
 
@@ -833,7 +1198,7 @@ class ContactEnquiry(models.Model):
         verbose_name = "Contact Enquiry"
         verbose_name_plural = "Contact Enquiries"
 
-class HeroSlider(models.Model):
+class HeroSlider(PublicContentMixin, models.Model):
     title = models.CharField(max_length=100)
     image = models.ImageField(upload_to='hero_images/')
     is_active = models.BooleanField(default=True)
@@ -846,7 +1211,7 @@ class HeroSlider(models.Model):
     class Meta:
         ordering = ['order', '-created_at']
 
-class Blog(models.Model):
+class Blog(PublicContentMixin, models.Model):
     heading = models.CharField(max_length=200)
     description = models.TextField()
     photo = models.ImageField(upload_to='blog_images/')
@@ -858,7 +1223,7 @@ class Blog(models.Model):
     class Meta:
         ordering = ['-created_at']
 
-class WelcomeSection(models.Model):
+class WelcomeSection(PublicContentMixin, models.Model):
     title = models.CharField(max_length=200, default="Welcome to Our School")
     content = models.TextField()
     image = models.ImageField(upload_to='welcome_images/', blank=True, null=True)
@@ -943,6 +1308,17 @@ class Teacher(models.Model):
     def __str__(self):
         return f"{self.name} - {self.designation}"
     
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        from .teacher_directory import invalidate_teacher_coverage
+        invalidate_teacher_coverage()
+    
+    def delete(self, *args, **kwargs):
+        result = super().delete(*args, **kwargs)
+        from .teacher_directory import invalidate_teacher_coverage
+        invalidate_teacher_coverage()
+        return result
+    
     def get_assigned_classes(self):
         """Get all active classes assigned to this teacher"""
         return TeacherClassSubject.objects.filter(teacher=self, is_active=True).values_list('class_name', flat=True).distinct()
@@ -956,8 +1332,8 @@ class Teacher(models.Model):
         return TeacherClassSubject.get_teacher_assignments(self)
     
     def assign_classes_subjects(self, assignments_data):
-        """Assign multiple classes and subjects to this teacher"""
-        TeacherClassSubject.assign_multiple_classes_subjects(self, assignments_data)
+        """Assign multiple classes and subjects to this teacher; returns the change summary"""
+        return TeacherClassSubject.assign_multiple_classes_subjects(self, assignments_data)
     
     def get_random_photo_url(self):
         """Get a random photo from static/img/teachers folder"""
@@ -1007,41 +1383,87 @@ class TeacherClassSubject(models.Model):
     def __str__(self):
         return f"{self.teacher.name} - {self.class_name} - {self.subject.name}"
     
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        from .teacher_directory import invalidate_teacher_coverage
+        invalidate_teacher_coverage()
+    
+    def delete(self, *args, **kwargs):
+        result = super().delete(*args, **kwargs)
+        from .teacher_directory import invalidate_teacher_coverage
+        invalidate_teacher_coverage()
+        return result
+    
     @classmethod
     def get_teacher_assignments(cls, teacher):
         """Get all active assignments for a teacher grouped by class"""
-        assignments = cls.objects.filter(teacher=teacher, is_active=True).select_related('subject')
-        grouped = {}
-        for assignment in assignments:
-            if assignment.class_name not in grouped:
-                grouped[assignment.class_name] = []
-            grouped[assignment.class_name].append(assignment.subject)
-        return grouped
+        from .teacher_directory import group_by_class
+        return group_by_class(cls.objects.filter(teacher=teacher, is_active=True).select_related('subject'))
     
     @classmethod
     def assign_multiple_classes_subjects(cls, teacher, assignments_data):
-        """Assign multiple classes and subjects to a teacher
+        """Assign multiple classes and subjects to a teacher, replacing the current assignments
         assignments_data format: [{'class_name': 'One', 'subject_ids': [1, 2, 3]}, ...]
+        Returns the change summary from bulk_assign.
         """
-        # Deactivate existing assignments
-        cls.objects.filter(teacher=teacher).update(is_active=False)
+        wanted = {(assignment['class_name'], int(subject_id))
+                  for assignment in assignments_data for subject_id in assignment['subject_ids']}
+        return cls.bulk_assign({getattr(teacher, 'pk', teacher): wanted})
+    
+    @classmethod
+    def bulk_assign(cls, wanted, replace=True):
+        """Bring many teachers' assignments to the wanted state in a handful of queries.
+        
+        wanted maps teacher ids to sets of (class_name, subject_id) pairs. The pairs
+        are compared with the teachers' current rows in memory: missing ones are
+        created, inactive ones reactivated and, with replace, active rows not wanted
+        are deactivated. Teachers not in wanted are untouched. Pairs whose subject
+        does not belong to the class are skipped, as the one-teacher form always did.
+        Returns counts of 'created', 'reactivated', 'deactivated', 'kept' and 'skipped'.
+        """
+        wanted = {teacher_id: set(pairs) for teacher_id, pairs in wanted.items()}
+        subject_classes = dict(Subject.objects.filter(
+            id__in={subject_id for pairs in wanted.values() for _, subject_id in pairs}
+        ).values_list('id', 'class_name'))
+        
+        summary = dict.fromkeys(('created', 'reactivated', 'deactivated', 'kept', 'skipped'), 0)
+        for teacher_id, pairs in wanted.items():
+            valid = {pair for pair in pairs if subject_classes.get(pair[1]) == pair[0]}
+            summary['skipped'] += len(pairs) - len(valid)
+            wanted[teacher_id] = valid
         
-        # Create new assignments
-        for assignment in assignments_data:
-            class_name = assignment['class_name']
-            subject_ids = assignment['subject_ids']
+        with transaction.atomic():
+            current = cls.objects.select_for_update().filter(teacher_id__in=wanted).values_list(
+                'id', 'teacher_id', 'class_name', 'subject_id', 'is_active')
+            existing = set()
+            reactivate, deactivate = [], []
+            for row_id, teacher_id, class_name, subject_id, is_active in current:
+                existing.add((teacher_id, class_name, subject_id))
+                if (class_name, subject_id) in wanted[teacher_id]:
+                    if is_active:
+                        summary['kept'] += 1
+                    else:
+                        reactivate.append(row_id)
+                elif is_active and replace:
+                    deactivate.append(row_id)
             
-            for subject_id in subject_ids:
-                try:
-                    subject = Subject.objects.get(id=subject_id, class_name=class_name)
-                    cls.objects.update_or_create(
-                        teacher=teacher,
-                        class_name=class_name,
-                        subject=subject,
-                        defaults={'is_active': True}
-                    )
-                except Subject.DoesNotExist:
-                    continue
+            new_rows = [cls(teacher_id=teacher_id, class_name=class_name, subject_id=subject_id)
+                        for teacher_id, pairs in wanted.items() for class_name, subject_id in sorted(pairs)
+                        if (teacher_id, class_name, subject_id) not in existing]
+            cls.objects.bulk_create(new_rows, batch_size=500)
+            # Queryset updates skip auto_now, so set updated_at with them
+            now = timezone.now()
+            if reactivate:
+                cls.objects.filter(id__in=reactivate).update(is_active=True, updated_at=now)
+            if deactivate:
+                cls.objects.filter(id__in=deactivate).update(is_active=False, updated_at=now)
+        
+        summary.update(created=len(new_rows), reactivated=len(reactivate), deactivated=len(deactivate))
+        if new_rows or reactivate or deactivate:
+            # None of these writes go through save()
+            from .teacher_directory import invalidate_teacher_coverage
+            invalidate_teacher_coverage()
+        return summary
     
     class Meta:
         unique_together = ['teacher', 'class_name', 'subject']
@@ -1066,13 +1488,73 @@ class SchoolAttendance(models.Model):
     
     def save(self, *args, **kwargs):
         if self.date and not self.date_nepali:
-            nepali_date = NepaliCalendar.english_to_nepali_date(self.date)
-            self.date_nepali = NepaliCalendar.format_nepali_date(nepali_date, 'full_en')
+            self.date_nepali = NepaliCalendar.format_english_date(self.date, 'full_en')
         super().save(*args, **kwargs)
+        from .attendance_rollup import refresh_attendance_rollups
+        from .dashboard_stats import invalidate_dashboard_stats
+        refresh_attendance_rollups(self.date, [self.student_id])
+        invalidate_dashboard_stats()
+    
+    def delete(self, *args, **kwargs):
+        result = super().delete(*args, **kwargs)
+        from .attendance_rollup import refresh_attendance_rollups
+        from .dashboard_stats import invalidate_dashboard_stats
+        refresh_attendance_rollups(self.date, [self.student_id])
+        invalidate_dashboard_stats()
+        return result
     
     def __str__(self):
         return f"{self.student.name} - {self.date} - {self.status}"
     
+    @classmethod
+    def bulk_upsert(cls, attendance_date, records, marked_by=''):
+        """Insert or update one day's attendance for many students in a single statement.
+        
+        records is a list of dicts with student_id, status and optional remarks; a later
+        record for the same student wins. Unknown students or statuses raise ValueError
+        before anything is written. Returns {student_id: 'created' | 'updated'}.
+        """
+        if isinstance(attendance_date, str):
+            attendance_date = datetime.strptime(attendance_date, '%Y-%m-%d').date()
+        
+        by_student = {}
+        for record in records:
+            by_student[int(record['student_id'])] = record
+        
+        valid_statuses = dict(cls.ATTENDANCE_CHOICES)
+        bad_statuses = sorted({record['status'] for record in by_student.values()} - set(valid_statuses))
+        if bad_statuses:
+            raise ValueError(f"Invalid attendance status: {', '.join(map(str, bad_statuses))}")
+        
+        known_ids = set(Student.objects.filter(id__in=by_student).values_list('id', flat=True))
+        missing_ids = sorted(set(by_student) - known_ids)
+        if missing_ids:
+            raise ValueError(f"Students not found: {', '.join(map(str, missing_ids))}")
+        
+        date_nepali = NepaliCalendar.format_english_date(attendance_date, 'full_en')
+        rows = [
+            cls(student_id=student_id, date=attendance_date, date_nepali=date_nepali,
+                status=record['status'], remarks=record.get('remarks', '') or '', marked_by=marked_by)
+            for student_id, record in by_student.items()
+        ]
+        
+        with transaction.atomic():
+            existing_ids = set(
+                cls.objects.select_for_update()
+                .filter(date=attendance_date, student_id__in=by_student)
+                .values_list('student_id', flat=True)
+            )
+            cls.objects.bulk_create(
+                rows, update_conflicts=True, unique_fields=['student', 'date'],
+                update_fields=['status', 'remarks', 'marked_by', 'date_nepali', 'updated_at'],
+            )
+            from .attendance_rollup import refresh_attendance_rollups
+            refresh_attendance_rollups(attendance_date, by_student)
+        from .dashboard_stats import invalidate_dashboard_stats
+        invalidate_dashboard_stats()
+        
+        return {student_id: 'updated' if student_id in existing_ids else 'created' for student_id in by_student}
+    
     @classmethod
     def get_attendance_summary(cls, student, start_date=None, end_date=None):
         queryset = cls.objects.filter(student=student)
@@ -1081,27 +1563,64 @@ class SchoolAttendance(models.Model):
         if end_date:
             queryset = queryset.filter(date__lte=end_date)
         
-        total = queryset.count()
-        present = queryset.filter(status='present').count()
-        absent = queryset.filter(status='absent').count()
-        late = queryset.filter(status='late').count()
-        
-        return {
-            'total': total,
-            'present': present,
-            'absent': absent,
-            'late': late,
-            'attendance_percentage': (present / total * 100) if total > 0 else 0
-        }
+        from .attendance_summary import summarize
+        return summarize(queryset)
     
     class Meta:
         unique_together = ['student', 'date']
+        indexes = [models.Index(fields=['date', 'status'], name='schoolatt_date_status_idx')]
         ordering = ['-date', 'student__name']
         verbose_name = "School Attendance"
         verbose_name_plural = "School Attendance"
 
 
-class CalendarEvent(models.Model):
+class StudentMonthlyAttendance(models.Model):
+    """Attendance counts of one student in one Bikram Sambat month, refreshed
+    whenever that month's attendance is saved (see attendance_rollup)"""
+    student = models.ForeignKey(Student, on_delete=models.CASCADE, related_name='monthly_attendance')
+    bs_year = models.PositiveSmallIntegerField()
+    bs_month = models.PositiveSmallIntegerField()
+    month_start = models.DateField(help_text="AD date of the first day of the BS month")
+    present = models.PositiveIntegerField(default=0)
+    absent = models.PositiveIntegerField(default=0)
+    late = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f"{self.student_id} - {self.bs_year}/{self.bs_month:02d}"
+    
+    @property
+    def total(self):
+        return self.present + self.absent + self.late
+    
+    class Meta:
+        unique_together = ['student', 'month_start']
+        verbose_name = "Student Monthly Attendance"
+        verbose_name_plural = "Student Monthly Attendance"
+
+
+class ClassDailyAttendance(models.Model):
+    """Attendance counts of one class on one day, refreshed whenever that day's attendance is saved"""
+    date = models.DateField()
+    student_class = models.CharField(max_length=10)
+    present = models.PositiveIntegerField(default=0)
+    absent = models.PositiveIntegerField(default=0)
+    late = models.PositiveIntegerField(default=0)
+    
+    def __str__(self):
+        return f"{self.student_class} - {self.date}"
+    
+    @property
+    def total(self):
+        return self.present + self.absent + self.late
+    
+    class Meta:
+        unique_together = ['date', 'student_class']
+        verbose_name = "Class Daily Attendance"
+        verbose_name_plural = "Class Daily Attendance"
+
+
+class CalendarEvent(PublicContentMixin, models.Model):
     EVENT_TYPE_CHOICES = [
         ('holiday', 'Holiday'),
         ('festival', 'Festival'),
@@ -1126,10 +1645,17 @@ class CalendarEvent(models.Model):
     def save(self, *args, **kwargs):
         # Auto-populate Nepali date if not provided
         if self.event_date and not self.event_date_nepali:
-            nepali_date = NepaliCalendar.english_to_nepali_date(self.event_date)
-            self.event_date_nepali = NepaliCalendar.format_nepali_date(nepali_date, 'full_en')
+            self.event_date_nepali = NepaliCalendar.format_english_date(self.event_date, 'full_en')
         super().save(*args, **kwargs)
-    
+        from .school_calendar import invalidate_school_calendar
+        invalidate_school_calendar()
+
+    def delete(self, *args, **kwargs):
+        result = super().delete(*args, **kwargs)
+        from .school_calendar import invalidate_school_calendar
+        invalidate_school_calendar()
+        return result
+
     def __str__(self):
         return f"{self.title} - {self.event_date}"
     
@@ -1144,6 +1670,7 @@ class CalendarEvent(models.Model):
     
     class Meta:
         ordering = ['-event_date']
+        indexes = [models.Index(fields=['event_date', 'is_active'], name='calevent_date_active_idx')]
         verbose_name = "Calendar Event"
         verbose_name_plural = "Calendar Events"
 
@@ -1171,8 +1698,7 @@ class StudentAttendance(models.Model):
         
         # Auto-populate Nepali date if not provided
         if self.date and not self.date_nepali:
-            nepali_date = NepaliCalendar.english_to_nepali_date(self.date)
-            self.date_nepali = NepaliCalendar.format_nepali_date(nepali_date, 'full_en')
+            self.date_nepali = NepaliCalendar.format_english_date(self.date, 'full_en')
         super().save(*args, **kwargs)
     
     def __str__(self):
@@ -1197,18 +1723,8 @@ class StudentAttendance(models.Model):
         if end_date:
             queryset = queryset.filter(date__lte=end_date)
         
-        total = queryset.count()
-        present = queryset.filter(status='present').count()
-        absent = queryset.filter(status='absent').count()
-        late = queryset.filter(status='late').count()
-        
-        return {
-            'total': total,
-            'present': present,
-            'absent': absent,
-            'late': late,
-            'attendance_percentage': (present / total * 100) if total > 0 else 0
-        }
+        from .attendance_summary import summarize
+        return summarize(queryset)
     
     class Meta:
         unique_together = ['student', 'date']
@@ -1,5 +1,29 @@
 from datetime import datetime, date, timedelta
-import calendar
+from functools import lru_cache
+from . import bikram_sambat
+
+# Distinct dates kept by the conversion and formatting caches, about ten years of days
+DATE_CACHE_SIZE = 4096
+
+
+def _as_date(value):
+    """Cache key for an English date given as a date, datetime or 'YYYY-MM-DD' string"""
+    if isinstance(value, str):
+        return datetime.strptime(value, '%Y-%m-%d').date()
+    if isinstance(value, datetime):
+        return value.date()
+    return value
+
+
+@lru_cache(maxsize=DATE_CACHE_SIZE)
+def _to_bs(english_date):
+    return bikram_sambat.to_bs(english_date)
+
+
+@lru_cache(maxsize=DATE_CACHE_SIZE)
+def _format_english_date(english_date, format_type):
+    return NepaliCalendar.format_nepali_date(NepaliCalendar.english_to_nepali_date(english_date), format_type)
+
 
 class NepaliCalendar:
     """Enhanced Nepali Calendar utility for comprehensive date conversion and formatting"""
@@ -24,61 +48,47 @@ class NepaliCalendar:
         'Sunday', 'Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday'
     ]
     
-    # Comprehensive days in each Nepali month for different years
-    NEPALI_DAYS = {
-        2090: [31, 31, 32, 32, 31, 30, 30, 29, 30, 29, 30, 30],
-        2089: [31, 31, 32, 32, 31, 30, 30, 29, 30, 29, 30, 30],
-        2088: [31, 31, 32, 32, 31, 30, 30, 29, 30, 29, 30, 30],
-        2087: [31, 31, 32, 32, 31, 30, 30, 29, 30, 29, 30, 30],
-        2086: [31, 31, 32, 32, 31, 30, 30, 29, 30, 29, 30, 30],
-        2085: [31, 31, 32, 32, 31, 30, 30, 29, 30, 29, 30, 30],
-        2084: [31, 31, 32, 32, 31, 30, 30, 29, 30, 29, 30, 30],
-        2083: [31, 31, 32, 32, 31, 30, 30, 29, 30, 29, 30, 30],
-        2082: [31, 31, 32, 32, 31, 30, 30, 29, 30, 29, 30, 30],
-        2081: [31, 31, 32, 32, 31, 30, 30, 29, 30, 29, 30, 30],
-        2080: [31, 31, 32, 32, 31, 30, 30, 29, 30, 29, 30, 30],
-        2079: [31, 32, 31, 32, 31, 30, 30, 30, 29, 30, 29, 31],
-        2078: [31, 32, 31, 32, 31, 30, 30, 30, 29, 30, 29, 31],
-        2077: [31, 32, 31, 32, 31, 30, 30, 30, 29, 30, 29, 31],
-        2076: [31, 32, 31, 32, 31, 30, 30, 30, 29, 30, 29, 31],
-        2075: [31, 32, 31, 32, 31, 30, 30, 30, 29, 30, 29, 31],
-    }
+    # Days in each Nepali month, per year
+    NEPALI_DAYS = bikram_sambat.BS_MONTH_DAYS
     
     @classmethod
-    def english_to_nepali_date(cls, english_date):
-        """Convert English date to approximate Nepali date"""
-        if isinstance(english_date, str):
-            english_date = datetime.strptime(english_date, '%Y-%m-%d').date()
-        
-        # Simple approximation: Add ~57 years to get Nepali year
-        nepali_year = english_date.year + 57
-        
-        # Adjust for Nepali calendar start (mid-April)
-        if english_date.month < 4 or (english_date.month == 4 and english_date.day < 14):
-            nepali_year -= 1
-            
-        # Simple month mapping (approximate)
-        month_mapping = {
-            4: 1, 5: 2, 6: 3, 7: 4, 8: 5, 9: 6,
-            10: 7, 11: 8, 12: 9, 1: 10, 2: 11, 3: 12
+    def _nepali_date_dict(cls, year, month, day):
+        return {
+            'year': year,
+            'month': month,
+            'day': day,
+            'month_name': cls.NEPALI_MONTHS[month-1],
+            'month_name_en': cls.NEPALI_MONTHS_EN[month-1]
         }
-        
-        nepali_month = month_mapping.get(english_date.month, 1)
-        nepali_day = english_date.day
-        
-        # Adjust day if it exceeds month limit
-        max_days = cls.NEPALI_DAYS.get(nepali_year, [31]*12)[nepali_month-1]
-        if nepali_day > max_days:
-            nepali_day = max_days
-            
+    
+    @classmethod
+    def english_to_nepali_date(cls, english_date):
+        """Convert English date to Nepali date"""
+        return cls._nepali_date_dict(*_to_bs(_as_date(english_date)))
+    
+    @classmethod
+    def format_english_date(cls, english_date, format_type='full_en'):
+        """Nepali date string for an English date, formatted once per distinct date and format"""
+        return _format_english_date(_as_date(english_date), format_type)
+    
+    @classmethod
+    def cache_stats(cls):
+        """Hits, misses and size of the conversion and formatting caches"""
         return {
-            'year': nepali_year,
-            'month': nepali_month,
-            'day': nepali_day,
-            'month_name': cls.NEPALI_MONTHS[nepali_month-1],
-            'month_name_en': cls.NEPALI_MONTHS_EN[nepali_month-1]
+            name: function.cache_info()._asdict()
+            for name, function in (('conversion', _to_bs), ('formatting', _format_english_date))
         }
     
+    @classmethod
+    def clear_caches(cls):
+        _to_bs.cache_clear()
+        _format_english_date.cache_clear()
+    
+    @classmethod
+    def nepali_to_english_date(cls, nepali_year, nepali_month, nepali_day):
+        """Convert Nepali date to English date"""
+        return bikram_sambat.to_ad(nepali_year, nepali_month, nepali_day)
+    
     @classmethod
     def format_nepali_date(cls, nepali_date_dict, format_type='full'):
         """Format Nepali date in different formats"""
@@ -186,29 +196,8 @@ class NepaliCalendar:
     
     @classmethod
     def nepali_date_to_english_approximate(cls, nepali_year, nepali_month, nepali_day):
-        """Convert Nepali date to approximate English date"""
-        # Simple approximation: subtract ~57 years
-        english_year = nepali_year - 57
-        
-        # Reverse month mapping
-        month_mapping = {
-            1: 4, 2: 5, 3: 6, 4: 7, 5: 8, 6: 9,
-            7: 10, 8: 11, 9: 12, 10: 1, 11: 2, 12: 3
-        }
-        
-        english_month = month_mapping.get(nepali_month, 1)
-        
-        # Adjust year for months 10, 11, 12 (Jan, Feb, Mar)
-        if nepali_month >= 10:
-            english_year += 1
-        
-        # Ensure valid day
-        try:
-            max_days = calendar.monthrange(english_year, english_month)[1]
-            english_day = min(nepali_day, max_days)
-            return date(english_year, english_month, english_day)
-        except:
-            return date(english_year, english_month, 1)
+        """Convert Nepali date to English date; kept for older callers, now exact"""
+        return cls.nepali_to_english_date(nepali_year, nepali_month, nepali_day)
     
     @classmethod
     def get_nepali_year_sessions(cls, start_year=2082, end_year=2100):
@@ -232,7 +221,7 @@ class NepaliCalendar:
         days_in_month = cls.NEPALI_DAYS[year][month-1]
         
         # Get first day of month in English to determine starting weekday
-        first_day_english = cls.nepali_date_to_english_approximate(year, month, 1)
+        first_day_english = cls.nepali_to_english_date(year, month, 1)
         first_weekday = cls.get_nepali_weekday(first_day_english)['index']
         
         calendar_data = {
@@ -279,15 +268,12 @@ class NepaliCalendar:
         if isinstance(english_datetime, str):
             english_datetime = datetime.strptime(english_datetime, '%Y-%m-%d %H:%M:%S')
         
-        nepali_date = cls.english_to_nepali_date(english_datetime.date())
         time_str = english_datetime.strftime('%H:%M:%S')
         
         if format_type == 'full':
-            return f"{cls.format_nepali_date(nepali_date, 'full_en')} {time_str}"
-        elif format_type == 'short':
-            return f"{cls.format_nepali_date(nepali_date, 'short')} {time_str}"
+            return f"{cls.format_english_date(english_datetime, 'full_en')} {time_str}"
         else:
-            return f"{cls.format_nepali_date(nepali_date, format_type)} {time_str}"
+            return f"{cls.format_english_date(english_datetime, format_type)} {time_str}"
     
     @classmethod
     def get_nepali_events_calendar(cls, year, month):
@@ -309,33 +295,9 @@ class NepaliCalendar:
     @classmethod
     def add_nepali_days(cls, nepali_date_dict, days):
         """Add days to a Nepali date"""
-        year = nepali_date_dict['year']
-        month = nepali_date_dict['month']
-        day = nepali_date_dict['day'] + days
-        
-        # Handle month overflow
-        while day > cls.NEPALI_DAYS.get(year, [31]*12)[month-1]:
-            day -= cls.NEPALI_DAYS.get(year, [31]*12)[month-1]
-            month += 1
-            if month > 12:
-                month = 1
-                year += 1
-        
-        # Handle negative days
-        while day <= 0:
-            month -= 1
-            if month <= 0:
-                month = 12
-                year -= 1
-            day += cls.NEPALI_DAYS.get(year, [31]*12)[month-1]
-        
-        return {
-            'year': year,
-            'month': month,
-            'day': day,
-            'month_name': cls.NEPALI_MONTHS[month-1],
-            'month_name_en': cls.NEPALI_MONTHS_EN[month-1]
-        }
+        english_date = cls.nepali_to_english_date(
+            nepali_date_dict['year'], nepali_date_dict['month'], nepali_date_dict['day'])
+        return cls.english_to_nepali_date(english_date + timedelta(days=days))
     
     @classmethod
     def get_nepali_date_range(cls, start_date, end_date):
@@ -346,15 +308,12 @@ class NepaliCalendar:
             end_date = datetime.strptime(end_date, '%Y-%m-%d').date()
         
         dates = []
-        current_date = start_date
-        
-        while current_date <= end_date:
-            nepali_date = cls.english_to_nepali_date(current_date)
+        for current_date, nepali_ymd in bikram_sambat.bs_range(start_date, end_date):
+            nepali_date = cls._nepali_date_dict(*nepali_ymd)
             dates.append({
                 'english_date': current_date,
                 'nepali_date': nepali_date,
                 'formatted': cls.format_nepali_date(nepali_date, 'full_en')
             })
-            current_date += timedelta(days=1)
         
-        return dates
\ No newline at end of file
+        return dates
@@ -0,0 +1,82 @@
+from datetime import date
+from functools import wraps
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+
+VERSION_KEY = 'public_site:version'
+PAGE_KEY_PREFIX = 'public_site:page'
+
+
+def get_content_version():
+    """Current version of the public site content; every cached page is keyed on it"""
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        version = 1
+        cache.add(VERSION_KEY, version, None)
+    return version
+
+
+def bump_content_version():
+    """Retire every cached public page after HeroSlider, Blog, WelcomeSection,
+    CalendarEvent or SchoolDetail changes"""
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.set(VERSION_KEY, get_content_version() + 1, None)
+
+
+def is_anonymous_visitor(request):
+    """True when nothing on the page can depend on who is looking at it"""
+    session = request.session
+    if session.get('admin_logged_in') or session.get('student_logged_in'):
+        return False
+    user = getattr(request, 'user', None)
+    return not (user is not None and user.is_authenticated)
+
+
+def page_cache_key(request):
+    # The date is part of the key so pages showing today's figures roll over at midnight
+    return f'{PAGE_KEY_PREFIX}:{get_content_version()}:{date.today().isoformat()}:{request.get_full_path()}'
+
+
+def cache_public_page(view_func):
+    """Serve anonymous GET requests for a public page from the cache.
+
+    Successful responses are stored for settings.PUBLIC_PAGE_CACHE_TTL seconds
+    under the current content version, so a content change is visible on the
+    next request. Logged-in admins, students and Google users always get a
+    freshly rendered page because the navbar differs for them.
+    """
+    @wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        if request.method != 'GET' or not is_anonymous_visitor(request):
+            return view_func(request, *args, **kwargs)
+
+        key = page_cache_key(request)
+        cached = cache.get(key)
+        if cached is not None:
+            content, content_type = cached
+            return HttpResponse(content, content_type=content_type)
+
+        response = view_func(request, *args, **kwargs)
+        if response.status_code == 200 and not getattr(response, 'streaming', False):
+            if hasattr(response, 'render') and callable(response.render):
+                response.render()
+            cache.set(key, (response.content, response['Content-Type']),
+                      getattr(settings, 'PUBLIC_PAGE_CACHE_TTL', 300))
+        return response
+    return wrapper
+
+
+class PublicContentMixin:
+    """Model mixin: saving or deleting a row bumps the public content version"""
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        bump_content_version()
+
+    def delete(self, *args, **kwargs):
+        result = super().delete(*args, **kwargs)
+        bump_content_version()
+        return result
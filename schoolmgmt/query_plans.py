@@ -0,0 +1,62 @@
+from datetime import date, timedelta
+from django.db import connection
+from .models import (CalendarEvent, Exam, FeePayment, SchoolAttendance, Student, StudentDailyExpense,
+                     StudentRegistration)
+
+
+def hot_queries(today=None):
+    """The filters the busiest views run, as (name, table, queryset).
+
+    Each entry mirrors a real call site: the dashboard aggregates, class
+    listings and marksheets, the fee ledger and the enquiry pages. table is
+    the one that must be searched through an index rather than scanned.
+    """
+    today = today or date.today()
+    return [
+        ('dashboard fee collections', FeePayment._meta.db_table,
+         FeePayment.objects.filter(payment_date__gte=today - timedelta(days=29)).order_by()),
+        ('dashboard attendance', SchoolAttendance._meta.db_table,
+         SchoolAttendance.objects.filter(date=today, status='present').order_by()),
+        ('today\'s calendar event', CalendarEvent._meta.db_table,
+         CalendarEvent.objects.filter(event_date=today, is_active=True)),
+        ('class and section listing', Student._meta.db_table,
+         Student.objects.filter(student_class='Five', section='A').order_by('name')),
+        ('class marksheet students', Student._meta.db_table,
+         Student.objects.filter(student_class='Five').order_by('name')),
+        ('exams of a class', Exam._meta.db_table,
+         Exam.objects.filter(class_name='Five').order_by('-exam_date')),
+        ('unpaid daily expenses', StudentDailyExpense._meta.db_table,
+         StudentDailyExpense.objects.filter(student_id__in=[1, 2, 3], is_paid=False).order_by()),
+        ('pending registrations', StudentRegistration._meta.db_table,
+         StudentRegistration.objects.filter(status='pending').order_by('-registration_date')),
+    ]
+
+
+def uses_index(plan, table, vendor=None):
+    """Whether an EXPLAIN plan reaches table through an index instead of a full scan"""
+    vendor = vendor or connection.vendor
+    if vendor == 'sqlite':
+        # SQLite prints "SEARCH <table> USING INDEX ..." or "SCAN <table>"
+        lines = [line for line in plan.splitlines() if f' {table} ' in f' {line} ']
+        return bool(lines) and all('SEARCH' in line and 'INDEX' in line for line in lines)
+    if vendor == 'postgresql':
+        lines = [line for line in plan.splitlines() if f' on {table}' in line]
+        return bool(lines) and all('Index' in line for line in lines)
+    raise ValueError(f'No plan check for {vendor}')
+
+
+def explain_hot_queries(today=None):
+    """(name, uses_index, plan) for every hot query on the default database"""
+    results = []
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            # Tiny tables make PostgreSQL prefer a sequential scan; ask whether an index can be used at all
+            cursor.execute('SET enable_seqscan = off')
+        try:
+            for name, table, queryset in hot_queries(today):
+                plan = queryset.explain()
+                results.append((name, uses_index(plan, table), plan))
+        finally:
+            if connection.vendor == 'postgresql':
+                cursor.execute('RESET enable_seqscan')
+    return results
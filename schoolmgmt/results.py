@@ -0,0 +1,127 @@
+from collections import defaultdict
+from .models import ExamRanking, Marksheet, Student, dense_ranks
+from .grading import get_grading_engine
+
+
+def gpa_for(percentage):
+    """GPA interpolated within each 10% band (3.6-4.0 for A+, 3.2-3.6 for A, ...)"""
+    if percentage < 20:
+        return round(percentage * 0.8 / 20, 2)
+    band = min(int(percentage // 10), 9)
+    return round(0.8 + (band - 2) * 0.4 + (percentage - band * 10) * 0.4 / 10, 2)
+
+
+class StudentResult:
+    """One student's totals for an exam, in the shape the marksheet templates render"""
+
+    __slots__ = ('student', 'marksheets', 'total_marks', 'obtained_marks', 'raw_percentage',
+                 'failed_subjects', 'total_grade_points', 'overall_grade', 'rank')
+
+    def __init__(self, student, marksheets, engine=None):
+        engine = engine or get_grading_engine()
+        self.student = student
+        self.marksheets = marksheets
+        self.total_marks = sum(m.subject.max_marks for m in marksheets)
+        self.obtained_marks = sum(m.marks_obtained for m in marksheets)
+        self.raw_percentage = (self.obtained_marks / self.total_marks * 100) if self.total_marks > 0 else 0
+        self.failed_subjects = sum(1 for m in marksheets if m.marks_obtained < m.subject.pass_marks)
+        grade_points = [info.grade_point for info in engine.lookup_many(m.percentage for m in marksheets)]
+        self.total_grade_points = round(sum(grade_points) / len(grade_points), 2)
+        self.overall_grade = engine.grade(self.raw_percentage)
+        self.rank = None
+
+    @property
+    def percentage(self):
+        return round(self.raw_percentage, 2)
+
+    @property
+    def overall_status(self):
+        return 'Pass' if self.failed_subjects == 0 else 'Fail'
+
+    @property
+    def gpa(self):
+        return gpa_for(self.raw_percentage)
+
+    def as_dict(self):
+        return {
+            'student': self.student,
+            'marksheets': self.marksheets,
+            'total_marks': self.total_marks,
+            'obtained_marks': self.obtained_marks,
+            'percentage': self.percentage,
+            'overall_grade': self.overall_grade,
+            'overall_status': self.overall_status,
+            'failed_subjects': self.failed_subjects,
+            'total_grade_points': self.total_grade_points,
+            'gpa': self.gpa,
+            'rank': self.rank,
+        }
+
+
+class ExamResults:
+    """Results of every student in a class for one exam.
+
+    All marks are read in one select_related('subject') query and totals,
+    grades and failed subjects worked out in memory; ranks are the stored
+    ExamRanking class ranks, read in one more query. Iterating yields
+    StudentResult objects in the order the students were given, skipping
+    students who have no marks for the exam.
+    """
+
+    def __init__(self, exam, students=None, stored_ranks=True):
+        self.exam = exam
+        if students is None:
+            students = exam_students(exam)
+        students = list(students)
+
+        marks_by_student = defaultdict(list)
+        marksheets = (Marksheet.objects.filter(exam=exam, student_id__in=[s.pk for s in students])
+                      .select_related('subject').order_by('subject'))
+        for marksheet in marksheets:
+            marks_by_student[marksheet.student_id].append(marksheet)
+
+        engine = get_grading_engine()
+        self.results = []
+        for student in students:
+            marks = marks_by_student.get(student.pk)
+            if not marks:
+                continue
+            for marksheet in marks:
+                # The student is already loaded, so templates don't fetch it per subject
+                marksheet.student = student
+            self.results.append(StudentResult(student, marks, engine))
+        self.assign_ranks(stored_ranks)
+
+    def assign_ranks(self, stored=True):
+        """Dense ranks on percentage (1, 2, 2, 3), the rule ExamRanking stores.
+
+        With stored, a printout of part of a class shows each student's place
+        in the whole class. Results are ranked among themselves when the rows
+        are not there (stored=False is how ExamRanking itself is built).
+        """
+        if stored and self.results:
+            class_ranks = dict(ExamRanking.objects.filter(exam=self.exam, student_id__in=[
+                result.student.pk for result in self.results]).values_list('student_id', 'class_rank'))
+            if all(result.student.pk in class_ranks for result in self.results):
+                for result in self.results:
+                    result.rank = class_ranks[result.student.pk]
+                return
+        for result, rank in zip(self.results, dense_ranks(result.raw_percentage for result in self.results)):
+            result.rank = rank
+
+    def __iter__(self):
+        return iter(self.results)
+
+    def __len__(self):
+        return len(self.results)
+
+    def for_student(self, student_id):
+        for result in self.results:
+            if result.student.pk == student_id:
+                return result
+        return None
+
+
+def exam_students(exam):
+    """Students of the exam's class, in marksheet print order"""
+    return Student.objects.filter(student_class=exam.class_name).order_by('name')
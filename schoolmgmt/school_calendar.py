@@ -0,0 +1,97 @@
+from bisect import bisect_left, bisect_right
+from datetime import datetime
+from itertools import accumulate
+from .site_cache import VersionedCache
+
+HOLIDAY_TYPES = ('holiday', 'festival')
+SCHOOL_DAY_TYPE = 'school-day'
+SATURDAY = 5
+
+calendar_cache = VersionedCache('school_calendar')
+
+
+def _ordinal(day):
+    if isinstance(day, str):
+        day = datetime.strptime(day, '%Y-%m-%d').date()
+    if isinstance(day, datetime):
+        day = day.date()
+    return day.toordinal()
+
+
+def _saturdays_before(ordinal):
+    """Saturdays with an ordinal below the given one (ordinal 1 is a Monday, so Saturdays are 6 mod 7)"""
+    return (ordinal - 7) // 7 + 1
+
+
+class SchoolCalendar:
+    """Which days school is open, from the active calendar events.
+
+    Every day but Saturday is a school day unless a holiday or festival falls
+    on it; a 'school-day' event opens a Saturday or holiday. Only the dates
+    that break the Saturday rule are stored, sorted, with a running total of
+    their +1 / -1 effect, so a count over any range is the weekday arithmetic
+    plus two bisections.
+    """
+
+    def __init__(self, events):
+        self.holidays = {}
+        openings = set()
+        for event_date, event_type, title in events:
+            if event_type == SCHOOL_DAY_TYPE:
+                openings.add(event_date.toordinal())
+            else:
+                self.holidays.setdefault(event_date.toordinal(), title)
+
+        self.open_days = {}
+        for ordinal in openings | set(self.holidays):
+            is_open = ordinal in openings or ordinal not in self.holidays
+            if is_open != self._weekday_open(ordinal):
+                self.open_days[ordinal] = is_open
+        self.exceptions = sorted(self.open_days)
+        self.adjustments = [0] + list(accumulate(1 if self.open_days[o] else -1 for o in self.exceptions))
+
+    @classmethod
+    def build(cls):
+        from .models import CalendarEvent
+        events = (CalendarEvent.objects.filter(is_active=True, event_type__in=HOLIDAY_TYPES + (SCHOOL_DAY_TYPE,))
+                  .order_by('event_date', 'id').values_list('event_date', 'event_type', 'title'))
+        return cls(events)
+
+    @staticmethod
+    def _weekday_open(ordinal):
+        return (ordinal - 1) % 7 != SATURDAY
+
+    def is_school_day(self, day):
+        ordinal = _ordinal(day)
+        return self.open_days.get(ordinal, self._weekday_open(ordinal))
+
+    def holiday(self, day):
+        """Title of the holiday or festival on day, or None; set even when a school-day event overrides it"""
+        return self.holidays.get(_ordinal(day))
+
+    def count_school_days(self, start, end):
+        """School days from start to end, both included"""
+        first, last = _ordinal(start), _ordinal(end)
+        if first > last:
+            return 0
+        weekdays = (last - first + 1) - (_saturdays_before(last + 1) - _saturdays_before(first))
+        low = bisect_left(self.exceptions, first)
+        high = bisect_right(self.exceptions, last)
+        return weekdays + self.adjustments[high] - self.adjustments[low]
+
+
+def get_school_calendar():
+    """The shared calendar, rebuilt after calendar events change"""
+    return calendar_cache.get('calendar', SchoolCalendar.build)
+
+
+def invalidate_school_calendar():
+    calendar_cache.invalidate()
+
+
+def is_school_day(day):
+    return get_school_calendar().is_school_day(day)
+
+
+def count_school_days(start, end):
+    return get_school_calendar().count_school_days(start, end)
@@ -0,0 +1,60 @@
+import time
+from django.conf import settings
+from django.core.cache import cache
+
+
+class VersionedCache:
+    """Process-level memo that is emptied whenever a shared version number moves.
+
+    Entries live in this process's memory, so a hit costs no database query.
+    The version lives in Django's default cache, which every worker shares;
+    invalidate() bumps it, and every process notices on its next lookup and
+    reloads. Entries are also reloaded once they are settings.SITE_CACHE_TTL
+    seconds old, so a process never serves rows longer than that even if an
+    invalidation is lost.
+    """
+
+    def __init__(self, name, ttl=None):
+        self.version_key = f'site_cache:{name}:version'
+        self.ttl = ttl
+        self.version = None
+        self.entries = {}
+
+    def current_version(self):
+        version = cache.get(self.version_key)
+        if version is None:
+            # A fresh number, so entries loaded before the key was evicted can't match it
+            cache.add(self.version_key, time.time_ns(), None)
+            version = cache.get(self.version_key)
+        return version
+
+    def get(self, key, loader):
+        version = self.current_version()
+        if version != self.version:
+            self.entries = {}
+            self.version = version
+        ttl = self.ttl if self.ttl is not None else getattr(settings, 'SITE_CACHE_TTL', 300)
+        entry = self.entries.get(key)
+        now = time.monotonic()
+        if entry is None or now - entry[0] >= ttl:
+            entry = self.entries[key] = (now, loader())
+        return entry[1]
+
+    def invalidate(self):
+        try:
+            cache.incr(self.version_key)
+        except ValueError:
+            cache.set(self.version_key, time.time_ns(), None)
+        self.entries = {}
+
+
+school_cache = VersionedCache('school_detail')
+admin_cache = VersionedCache('admin_login')
+
+
+def memoize_on_request(request, name, loader):
+    """Load a value once per request; context processors run for every template rendered"""
+    attr = f'_site_cache_{name}'
+    if not hasattr(request, attr):
+        setattr(request, attr, loader())
+    return getattr(request, attr)
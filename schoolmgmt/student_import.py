@@ -0,0 +1,197 @@
+import csv
+import io
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import models, transaction
+from .models import Student, Session
+from .fee_ledger import refresh_fee_balances
+from .dashboard_stats import invalidate_dashboard_stats
+from .student_search import invalidate_search_index
+
+IMPORT_BATCH_SIZE = 500
+
+DEFAULT_SESSION = {'name': '2024-25', 'start_date': '2024-04-01', 'end_date': '2025-03-31'}
+
+# CSV header -> (Student field, default used when the cell is empty)
+TEXT_COLUMNS = {
+    'Name': ('name', ''),
+    'Father Name': ('father_name', ''),
+    'Mother Name': ('mother_name', ''),
+    'Class': ('student_class', 'Nursery'),
+    'Section': ('section', 'A'),
+    'Gender': ('gender', 'Boy'),
+    'Religion': ('religion', 'Hindu'),
+    'Transport': ('transport', '00_No Transport Service | 0 Rs.'),
+    'Address1': ('address1', 'N/A'),
+    'Address2': ('address2', ''),
+    'City': ('city', 'N/A'),
+    'Father Email': ('father_email', ''),
+    'Father Occupation': ('father_occupation', ''),
+    'Father Qualification': ('father_qualification', ''),
+    'Mother Occupation': ('mother_occupation', ''),
+    'Mother Qualification': ('mother_qualification', ''),
+}
+
+# Phone numbers are cut to the 10 digits the model stores, as the old importer did
+MOBILE_COLUMNS = {
+    'Mobile': ('mobile', '9999999999'),
+    'Father Mobile': ('father_mobile', '9999999999'),
+    'Mother Mobile': ('mother_mobile', ''),
+}
+
+REQUIRED_COLUMNS = ('Name', 'Father Name')
+CHOICE_FIELDS = ('student_class', 'section', 'gender', 'religion')
+
+
+def _cell(row, header, default=''):
+    value = (row.get(header) or '').strip()
+    return value or default
+
+
+def decode_csv_file(csv_file):
+    """Read an uploaded file as text, accepting UTF-8 with or without a BOM"""
+    data = csv_file.read()
+    try:
+        return data.decode('utf-8-sig')
+    except UnicodeDecodeError:
+        return data.decode('latin-1')
+
+
+class StudentImport:
+    """Validate a whole student CSV first, then insert it in one transaction.
+
+    Nothing is written unless every row is valid, so a failed import never
+    leaves part of a file behind. Existing registration numbers are loaded once
+    and duplicates are renamed against that set instead of querying per row.
+    """
+
+    def __init__(self, text, batch_size=IMPORT_BATCH_SIZE):
+        self.text = text
+        self.batch_size = batch_size
+        self.students = []
+        self.errors = []
+        self.warnings = []
+        self.created_count = 0
+
+    @classmethod
+    def from_file(cls, csv_file, **kwargs):
+        return cls(decode_csv_file(csv_file), **kwargs)
+
+    @property
+    def is_valid(self):
+        return not self.errors
+
+    def run(self, dry_run=False):
+        """Validate and, unless dry_run or a row failed, insert all students"""
+        self.validate()
+        if dry_run or not self.is_valid or not self.students:
+            return self
+
+        with transaction.atomic():
+            if self.current_session is None:
+                Session.objects.get_or_create(
+                    name=DEFAULT_SESSION['name'],
+                    defaults={'start_date': DEFAULT_SESSION['start_date'],
+                              'end_date': DEFAULT_SESSION['end_date'], 'is_active': True},
+                )
+            for start in range(0, len(self.students), self.batch_size):
+                batch = self.students[start:start + self.batch_size]
+                Student.objects.bulk_create(batch)
+                # bulk_create skips Student.save, so fill the balance table here
+                refresh_fee_balances(Student.objects.filter(reg_number__in=[s.reg_number for s in batch]))
+                self.created_count += len(batch)
+        invalidate_dashboard_stats()
+        invalidate_search_index()
+        return self
+
+    def validate(self):
+        self.students = []
+        self.errors = []
+        self.warnings = []
+
+        self.current_session = Session.get_current_session()
+        self.session_name = self.current_session.name if self.current_session else DEFAULT_SESSION['name']
+        self.taken_reg_numbers = set(Student.objects.values_list('reg_number', flat=True))
+        self.next_reg_sequence = len(self.taken_reg_numbers) + 1
+        self.today = datetime.now().date()
+
+        reader = csv.DictReader(io.StringIO(self.text))
+        for row_num, row in enumerate(reader, start=2):
+            # Skip empty rows
+            if not any((value or '').strip() for value in row.values() if isinstance(value, str)):
+                continue
+            student, row_errors = self.build_student(row_num, row)
+            if row_errors:
+                self.errors.extend(f'Row {row_num}: {message}' for message in row_errors)
+            else:
+                self.students.append(student)
+        return self.is_valid
+
+    def build_student(self, row_num, row):
+        """Unsaved Student for one CSV row plus a list of problems with it"""
+        row_errors = [f'{header} is required' for header in REQUIRED_COLUMNS if not _cell(row, header)]
+
+        fields = {field: _cell(row, header, default) for header, (field, default) in TEXT_COLUMNS.items()}
+        fields.update(
+            (field, _cell(row, header, default)[:10]) for header, (field, default) in MOBILE_COLUMNS.items()
+        )
+
+        for header, field, default in (('DOB', 'dob', '2000-01-01'),
+                                       ('Admission Date', 'admission_date', None)):
+            value = _cell(row, header)
+            if not value:
+                fields[field] = datetime.strptime(default, '%Y-%m-%d').date() if default else self.today
+                continue
+            try:
+                fields[field] = datetime.strptime(value, '%Y-%m-%d').date()
+            except ValueError:
+                row_errors.append(f'{header} "{value}" must be in YYYY-MM-DD format')
+
+        try:
+            fields['old_balance'] = Decimal(_cell(row, 'Old Balance', '0'))
+        except InvalidOperation:
+            row_errors.append(f'Old Balance "{_cell(row, "Old Balance")}" is not a number')
+
+        if fields['father_email']:
+            try:
+                validate_email(fields['father_email'])
+            except ValidationError:
+                row_errors.append(f'Father Email "{fields["father_email"]}" is not valid')
+
+        for field_name in CHOICE_FIELDS:
+            field = Student._meta.get_field(field_name)
+            if fields[field_name] not in dict(field.choices):
+                row_errors.append(f'{field.verbose_name.capitalize()} "{fields[field_name]}" is not one of '
+                                  + ', '.join(dict(field.choices)))
+
+        for field_name, value in fields.items():
+            field = Student._meta.get_field(field_name)
+            if isinstance(field, models.CharField) and len(value) > field.max_length:
+                row_errors.append(f'{field.verbose_name.capitalize()} is longer than {field.max_length} characters')
+
+        if row_errors:
+            return None, row_errors
+
+        fields['reg_number'] = self.claim_reg_number(row_num, _cell(row, 'Registration Number'))
+        fields['session'] = self.session_name
+
+        student = Student(**fields)
+        student.populate_nepali_dates()
+        return student, []
+
+    def claim_reg_number(self, row_num, reg_number):
+        """Reserve reg_number, or the next free REG<year><seq> number if it is blank or taken"""
+        if reg_number and reg_number not in self.taken_reg_numbers:
+            self.taken_reg_numbers.add(reg_number)
+            return reg_number
+
+        year = self.today.year
+        while f'REG{year}{self.next_reg_sequence:04d}' in self.taken_reg_numbers:
+            self.next_reg_sequence += 1
+        generated = f'REG{year}{self.next_reg_sequence:04d}'
+        self.taken_reg_numbers.add(generated)
+        if reg_number:
+            self.warnings.append(f'Row {row_num}: Registration Number {reg_number} already exists, imported as {generated}')
+        return generated
@@ -0,0 +1,210 @@
+import heapq
+from array import array
+from bisect import bisect_left, bisect_right
+from .site_cache import VersionedCache
+
+SEARCH_PAGE_SIZE = 20
+
+search_cache = VersionedCache('student_search')
+
+
+class StudentSearchIndex:
+    """In-memory search over name, registration number, class and father's name.
+
+    Queries of three or more characters match anywhere in those fields, like
+    the icontains filters they replace. A query without spaces lies inside one
+    word, so a trigram index over the distinct words (names repeat a lot)
+    finds the words containing it and their students. Queries with spaces are
+    found with str.find over one joined string. Shorter queries are too short
+    for trigrams: each one is answered by a pass over the students once and
+    remembered. Results are ranked: exact registration number, name or
+    number prefix, a word of the name starting with the query, the query
+    inside the name or number, then matches in class or father's name; ties
+    go by name.
+    """
+
+    FIELDS = ('id', 'name', 'reg_number', 'student_class', 'section', 'father_name')
+
+    def __init__(self, rows):
+        self.rows = list(rows)
+        self.names = [(row[1] or '').lower() for row in self.rows]
+        self.regs = [(row[2] or '').lower() for row in self.rows]
+        haystacks = ['\x00'.join((name, reg, (row[3] or '').lower(), (row[5] or '').lower()))
+                     for row, name, reg in zip(self.rows, self.names, self.regs)]
+
+        # One string holding every student, with each student's start offset
+        self.blob = '\n'.join(haystacks)
+        self.starts = []
+        offset = 0
+        for haystack in haystacks:
+            self.starts.append(offset)
+            offset += len(haystack) + 1
+
+        self.haystacks = haystacks
+        # Students containing each one- or two-character query, filled in as they are asked
+        self.short_matches = {}
+
+        word_positions = {}
+        for position, haystack in enumerate(haystacks):
+            for word in set(haystack.replace('\x00', ' ').split()):
+                word_positions.setdefault(word, array('I')).append(position)
+        self.words = sorted(word_positions)
+        self.word_positions = [word_positions[word] for word in self.words]
+        self.word_grams = {}
+        for word_id, word in enumerate(self.words):
+            for gram in {word[i:i + 3] for i in range(len(word) - 2)}:
+                self.word_grams.setdefault(gram, array('I')).append(word_id)
+
+        self.position_by_id = {row[0]: position for position, row in enumerate(self.rows)}
+        self.position_by_reg = {reg: position for position, reg in enumerate(self.regs) if reg}
+        # Positions in name order, and each position's place in that order
+        self.by_name = array('I', sorted(range(len(self.rows)), key=lambda p: (self.names[p], self.rows[p][0])))
+        self.sorted_names = [self.names[position] for position in self.by_name]
+        self.name_rank = array('I', bytes(4 * len(self.rows)))
+        for rank, position in enumerate(self.by_name):
+            self.name_rank[position] = rank
+        self.by_reg = array('I', sorted(range(len(self.rows)), key=self.regs.__getitem__))
+        self.sorted_regs = [self.regs[position] for position in self.by_reg]
+
+        # Words after the first in each name, for the "a word of the name starts with" tier
+        later_words = {}
+        for position, name in enumerate(self.names):
+            for word in set(name.split(' ')[1:]):
+                if word:
+                    later_words.setdefault(word, array('I')).append(position)
+        self.later_words = sorted(later_words)
+        self.later_word_positions = [later_words[word] for word in self.later_words]
+
+    @classmethod
+    def build(cls):
+        from .models import Student
+        return cls(Student.objects.order_by().values_list(*cls.FIELDS).iterator(chunk_size=2000))
+
+    def __len__(self):
+        return len(self.rows)
+
+    def matches(self, query):
+        """Positions of students matching a lower-case query, unranked"""
+        found = set()
+        # STU001 style ids from printed receipts
+        if query.startswith('stu') and query[3:].isdigit():
+            position = self.position_by_id.get(int(query[3:]))
+            if position is not None:
+                found.add(position)
+        if len(query) < 3:
+            # Too short for the trigrams; one pass over the students, then remembered
+            postings = self.short_matches.get(query)
+            if postings is None:
+                postings = array('I', [position for position, haystack in enumerate(self.haystacks)
+                                       if query in haystack])
+                self.short_matches[query] = postings
+            found.update(postings)
+            return found
+
+        if ' ' not in query:
+            grams = {query[i:i + 3] for i in range(len(query) - 2)}
+            if any(gram not in self.word_grams for gram in grams):
+                return found
+            words, word_positions = self.words, self.word_positions
+            for word_id in min((self.word_grams[gram] for gram in grams), key=len):
+                if query in words[word_id]:
+                    found.update(word_positions[word_id])
+            return found
+
+        blob, starts, find = self.blob, self.starts, self.blob.find
+        offset = find(query)
+        while offset >= 0:
+            position = bisect_right(starts, offset) - 1
+            found.add(position)
+            # Skip the rest of this student
+            next_start = starts[position + 1] if position + 1 < len(starts) else len(blob)
+            offset = find(query, next_start)
+        return found
+
+    def _prefix_positions(self, ordered, keys, query):
+        return ordered[bisect_left(keys, query):bisect_left(keys, query + '\uffff')]
+
+    def tiers(self, positions, query):
+        """positions split into ranking tiers, best first.
+
+        A generator, so a page filled from the first tiers never pays for the
+        later ones; short queries can match most students.
+        """
+        rest = set(positions)
+        exact = self.position_by_reg.get(query)
+        if exact in rest:
+            rest.discard(exact)
+            yield {exact}
+        prefix = rest.intersection(self._prefix_positions(self.by_name, self.sorted_names, query))
+        prefix.update(rest.intersection(self._prefix_positions(self.by_reg, self.sorted_regs, query)))
+        rest -= prefix
+        yield prefix
+        names, regs = self.names, self.regs
+        if ' ' in query:
+            word_start = f' {query}'
+            word = {position for position in rest if word_start in names[position]}
+        else:
+            low = bisect_left(self.later_words, query)
+            high = bisect_left(self.later_words, query + '\uffff')
+            word = set()
+            for postings in self.later_word_positions[low:high]:
+                word.update(postings)
+            word &= rest
+        rest -= word
+        yield word
+        contains = {position for position in rest if query in names[position] or query in regs[position]}
+        rest -= contains
+        yield contains
+        yield rest
+
+    def search(self, query='', student_class='', section='', name='', reg_number='',
+               page=1, page_size=SEARCH_PAGE_SIZE):
+        """(rows for the requested page, total matches); rows are tuples in FIELDS order"""
+        query = query.strip().lower()
+        if query:
+            positions = self.matches(query)
+        else:
+            positions = self.by_name
+
+        name, reg_number = name.strip().lower(), reg_number.strip().lower()
+        if student_class or section or name or reg_number:
+            rows = self.rows
+            positions = [
+                position for position in positions
+                if (not student_class or rows[position][3] == student_class)
+                and (not section or rows[position][4] == section)
+                and (not name or name in self.names[position])
+                and (not reg_number or reg_number in self.regs[position])
+            ]
+
+        total = len(positions)
+        end = max(page, 1) * page_size
+        if not query:
+            # Already in name order
+            ranked = sorted(positions, key=self.name_rank.__getitem__) if positions is not self.by_name else positions
+            ranked = ranked[:end]
+        else:
+            ranked = []
+            tiers = self.tiers(positions, query)
+            # Only ask for the next tier while the page still has room
+            while len(ranked) < end:
+                tier = next(tiers, None)
+                if tier is None:
+                    break
+                ranked.extend(heapq.nsmallest(end - len(ranked), tier, key=self.name_rank.__getitem__))
+        return [self.rows[position] for position in ranked[end - page_size:end]], total
+
+
+def get_search_index():
+    """The shared index, rebuilt after students are added, edited or deleted"""
+    return search_cache.get('index', StudentSearchIndex.build)
+
+
+def invalidate_search_index():
+    search_cache.invalidate()
+
+
+def search_student_ids(query):
+    """Ids of every student matching query"""
+    index = get_search_index()
+    return [index.rows[position][0] for position in index.matches(query.strip().lower())]
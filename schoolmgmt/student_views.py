@@ -2,8 +2,7 @@ from django.shortcuts import render, get_object_or_404
 from django.http import JsonResponse
 from django.db.models import Sum
 from decimal import Decimal
-import json
-from .models import Student, FeeStructure, FeePayment, StudentDailyExpense
+from .models import Student, FeeStructure, FeePayment, FeePaymentItem, StudentDailyExpense
 
 def student_detail_with_filters(request, student_id):
     """Student detail page with fee history based on filters"""
@@ -62,24 +61,8 @@ def student_detail_with_filters(request, student_id):
                     'Kartik', 'Mangsir', 'Poush', 'Magh', 'Falgun', 'Chaitra']
     
     # Get paid months from payments
-    paid_months = set()
-    paid_fee_types = set()
-    
-    for payment in payments:
-        if payment.selected_months:
-            try:
-                months = json.loads(payment.selected_months)
-                paid_months.update(months)
-            except json.JSONDecodeError:
-                pass
-        
-        if payment.fee_types:
-            try:
-                fee_types = json.loads(payment.fee_types)
-                for fee_data in fee_types:
-                    paid_fee_types.add(fee_data.get('type'))
-            except json.JSONDecodeError:
-                pass
+    paid_months = FeePaymentItem.paid_months_for(student)
+    paid_fee_types = FeePaymentItem.paid_fee_types_for(student)
     
     # Create fee history records based on filters
     if selected_months:
@@ -160,25 +143,13 @@ def student_fee_history_api(request, student_id):
         payments_data = []
         for payment in payments:
             # Parse fee types and months
-            fee_types = []
-            months = []
-            
-            if payment.fee_types:
-                try:
-                    fee_types = json.loads(payment.fee_types)
-                except json.JSONDecodeError:
-                    pass
-            
-            if payment.selected_months:
-                try:
-                    months = json.loads(payment.selected_months)
-                except json.JSONDecodeError:
-                    pass
+            fee_types = payment.get_fee_types()
+            months = payment.get_selected_months()
             
             payments_data.append({
                 'date': payment.payment_date.strftime('%Y-%m-%d'),
                 'amount': float(payment.payment_amount),
-                'fee_type': ', '.join([ft.get('type', '').replace('_', ' ').title() for ft in fee_types]) if fee_types else 'N/A',
+                'fee_type': ', '.join([ft.replace('_', ' ').title() for ft in fee_types]) if fee_types else 'N/A',
                 'months': ', '.join(months) if months else 'N/A',
                 'method': payment.payment_method
             })
@@ -0,0 +1,147 @@
+from django.db.models import Prefetch
+from .models import Subject, Teacher, TeacherClassSubject
+from .site_cache import VersionedCache
+
+CLASS_ORDER = {class_name: position for position, (class_name, _) in enumerate(TeacherClassSubject.CLASS_CHOICES)}
+
+coverage_cache = VersionedCache('teacher_coverage')
+
+
+def class_sort_key(class_name):
+    """Nursery to Twelve in school order, anything else after them by name"""
+    return (CLASS_ORDER.get(class_name, len(CLASS_ORDER)), class_name)
+
+
+def active_assignments():
+    return (TeacherClassSubject.objects.filter(is_active=True).select_related('subject')
+            .order_by('class_name', 'subject__name'))
+
+
+def group_by_class(assignments):
+    """{class_name: [subject, ...]} in the order given, like Teacher.get_all_assignments()"""
+    grouped = {}
+    for assignment in assignments:
+        grouped.setdefault(assignment.class_name, []).append(assignment.subject)
+    return grouped
+
+
+def with_assignments(teachers):
+    """teachers with their active assignments prefetched into teacher.assignments"""
+    return teachers.prefetch_related(Prefetch('class_subjects', queryset=active_assignments(), to_attr='assignments'))
+
+
+def teacher_directory(class_name=''):
+    """Teachers in name order, optionally only those teaching class_name, in two queries.
+
+    Each has .assignments (active, with their subjects) and .assignment_summary
+    (the same grouped by class), built from the prefetched rows.
+    """
+    teachers = Teacher.objects.order_by('name')
+    if class_name:
+        teachers = teachers.filter(id__in=TeacherClassSubject.objects.filter(class_name=class_name, is_active=True)
+                                   .values('teacher_id'))
+    teachers = list(with_assignments(teachers))
+    for teacher in teachers:
+        teacher.assignment_summary = group_by_class(teacher.assignments)
+    return teachers
+
+
+class TeacherCoverage:
+    """Which active teachers teach each class and each subject of a class.
+
+    Built from two queries over the active assignments and the subject list,
+    so "who teaches Nine Science" and the per-class gaps are dict lookups.
+    Teachers are dicts with id, name and designation, in name order.
+    """
+
+    def __init__(self, assignments, subjects):
+        self.by_class = {}
+        self.by_subject = {}
+        for class_name, subject_id, teacher_id, teacher_name, designation in assignments:
+            teacher = {'id': teacher_id, 'name': teacher_name, 'designation': designation}
+            class_teachers = self.by_class.setdefault(class_name, {})
+            class_teachers.setdefault(teacher_id, teacher)
+            self.by_subject.setdefault((class_name, subject_id), []).append(teacher)
+
+        self.subjects = {}
+        self.subject_ids = {}
+        for subject_id, class_name, name in subjects:
+            self.subjects.setdefault(class_name, []).append((subject_id, name))
+            self.subject_ids.setdefault((class_name, name.lower()), subject_id)
+
+    @classmethod
+    def build(cls):
+        assignments = (TeacherClassSubject.objects.filter(is_active=True, teacher__is_active=True)
+                       .order_by('teacher__name', 'teacher_id')
+                       .values_list('class_name', 'subject_id', 'teacher_id', 'teacher__name', 'teacher__designation'))
+        subjects = Subject.objects.order_by('class_name', 'name').values_list('id', 'class_name', 'name')
+        return cls(assignments, subjects)
+
+    def classes(self):
+        """Classes with a teacher or a subject, Nursery first"""
+        return sorted(set(self.by_class) | set(self.subjects), key=class_sort_key)
+
+    def taught_classes(self):
+        """Classes with at least one active teacher, Nursery first"""
+        return sorted(self.by_class, key=class_sort_key)
+
+    def teachers_for_class(self, class_name):
+        return list(self.by_class.get(class_name, {}).values())
+
+    def teachers_for(self, class_name, subject):
+        """Teachers of one subject of a class; subject is a Subject, its id, or its name in any case"""
+        subject_id = getattr(subject, 'pk', subject)
+        if isinstance(subject_id, str):
+            subject_id = self.subject_ids.get((class_name, subject_id.strip().lower()))
+        return list(self.by_subject.get((class_name, subject_id), []))
+
+    def subjects_taught(self, class_name, teacher_id):
+        """Names of the class's subjects the teacher is assigned to"""
+        return [name for subject_id, name in self.subjects.get(class_name, [])
+                if any(teacher['id'] == teacher_id for teacher in self.by_subject.get((class_name, subject_id), []))]
+
+    def uncovered(self, class_name):
+        """(subject_id, name) of the class's subjects no active teacher is assigned to"""
+        return [(subject_id, name) for subject_id, name in self.subjects.get(class_name, [])
+                if (class_name, subject_id) not in self.by_subject]
+
+    def uncovered_subjects(self, class_name):
+        return [name for _, name in self.uncovered(class_name)]
+
+    def find_subjects(self, class_names, names):
+        """({(class_name, subject_id), ...} for the named subjects of each class, names matching none of them)"""
+        pairs, unknown = set(), []
+        for name in names:
+            found = {(class_name, self.subject_ids[(class_name, name.lower())]) for class_name in class_names
+                     if (class_name, name.lower()) in self.subject_ids}
+            if not found:
+                unknown.append(name)
+            pairs |= found
+        return pairs, unknown
+
+    def class_summary(self, class_name):
+        subjects = self.subjects.get(class_name, [])
+        uncovered = self.uncovered_subjects(class_name)
+        return {
+            'class_name': class_name,
+            'teachers': self.teachers_for_class(class_name),
+            'subjects': [name for _, name in subjects],
+            'covered': len(subjects) - len(uncovered),
+            'uncovered': uncovered,
+        }
+
+
+def get_teacher_coverage():
+    """The shared coverage matrix, rebuilt after teachers, subjects or assignments change"""
+    return coverage_cache.get('coverage', TeacherCoverage.build)
+
+
+def invalidate_teacher_coverage():
+    coverage_cache.invalidate()
+
+
+def format_assignment_changes(summary):
+    """One line for the change summary TeacherClassSubject.bulk_assign returns"""
+    line = (f"{summary['created']} created, {summary['reactivated']} reactivated, "
+            f"{summary['deactivated']} deactivated, {summary['kept']} unchanged")
+    return line + (f", {summary['skipped']} skipped" if summary['skipped'] else '')
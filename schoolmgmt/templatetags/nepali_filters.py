@@ -11,8 +11,7 @@ def to_nepali_date(english_date, format_type='full_en'):
         return ''
     
     try:
-        nepali_date = NepaliCalendar.english_to_nepali_date(english_date)
-        return NepaliCalendar.format_nepali_date(nepali_date, format_type)
+        return NepaliCalendar.format_english_date(english_date, format_type)
     except:
         return str(english_date)
 
@@ -31,6 +31,7 @@ urlpatterns = [
     path('student-admission/', views.student_admission, name='student_admission'),
     path('studentlist/', views.studentlist, name='studentlist'),
     path('teachers/', views.teachers, name='teachers'),
+    path('teachers/coverage/', views.teacher_coverage_api, name='teacher_coverage_api'),
     path('teacher/<int:teacher_id>/view/', views.teacher_view, name='teacher_view'),
     path('teacher/<int:teacher_id>/edit/', views.teacher_edit, name='teacher_edit'),
     path('teacher/<int:teacher_id>/assign/', views.teacher_assignment, name='teacher_assignment'),
@@ -79,6 +80,7 @@ urlpatterns = [
     path('api/subjects-by-class/<str:class_name>/', views.api_subjects_by_class, name='api_subjects_by_class'),
     path('api/marksheet-data/<int:exam_id>/<int:subject_id>/', views.marksheet_data_api, name='marksheet_data_api'),
     path('api/save-marksheet/', views.save_marksheet_api, name='save_marksheet_api'),
+    path('api/exam-ranking/<int:exam_id>/', views.exam_ranking_api, name='exam_ranking_api'),
     path('api/populate-all-marksheet-data/', views.populate_all_marksheet_data, name='populate_all_marksheet_data'),
     path('api/auto-populate-exam-marks/<int:exam_id>/', views.auto_populate_exam_marks, name='auto_populate_exam_marks'),
     path('api/student-marksheet-data/<int:student_id>/', views.get_student_marksheet_data, name='get_student_marksheet_data'),
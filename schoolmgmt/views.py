@@ -5,9 +5,9 @@ from django.views.decorators.csrf import csrf_exempt
 from django.core.exceptions import ValidationError
 from django.core.mail import send_mail
 from django.conf import settings
-from .models import Student, FeeStructure, FeePayment, Subject, Exam, Marksheet, Session, StudentMarks, MarksheetData, StudentDailyExpense, SchoolDetail, AdminLogin, StudentRegistration, WelcomeSection, ContactEnquiry, SchoolAttendance, Teacher, TeacherClassSubject, CalendarEvent
+from .models import Student, FeeStructure, FeePayment, FeePaymentItem, StudentFeeBalance, Subject, Exam, Marksheet, ExamRanking, Session, StudentMarks, MarksheetData, StudentDailyExpense, SchoolDetail, AdminLogin, StudentRegistration, WelcomeSection, ContactEnquiry, SchoolAttendance, Teacher, TeacherClassSubject, CalendarEvent
 from .decorators import permission_required
-from django.db import models
+from django.db import models, transaction
 from django.db.models import F, Q
 import json
 from datetime import datetime, date
@@ -16,6 +16,19 @@ from decimal import Decimal
 import csv
 import io
 from .nepali_calendar import NepaliCalendar
+from .bikram_sambat import month_bounds
+from .fee_ledger import FeeLedger, deferred_balance_refresh, refresh_fee_balances
+from .csv_export import COLUMN_SETS, iter_csv_rows, streaming_csv_response
+from .attendance_summary import AttendanceReport
+from .attendance_rollup import attendance_totals, school_days
+from .school_calendar import count_school_days, get_school_calendar
+from .student_import import StudentImport
+from .results import ExamResults
+from .grading import grade_for
+from .dashboard_stats import get_dashboard_stats, invalidate_dashboard_stats
+from .public_cache import cache_public_page, bump_content_version
+from .student_search import SEARCH_PAGE_SIZE, get_search_index, invalidate_search_index, search_student_ids
+from .teacher_directory import get_teacher_coverage, teacher_directory
 try:
     from nepali_datetime import date as nepali_date
 except ImportError:
@@ -30,8 +43,7 @@ def convert_english_to_nepali_date_string(english_date, format_type='short'):
     if not english_date:
         return ''
     try:
-        nepali_date_dict = NepaliCalendar.english_to_nepali_date(english_date)
-        return NepaliCalendar.format_nepali_date(nepali_date_dict, format_type)
+        return NepaliCalendar.format_english_date(english_date, format_type)
     except:
         return str(english_date)
 
@@ -59,51 +71,13 @@ def dashboard(request):
     if not (request.session.get('is_super_admin') or request.session.get('can_view_dashboard')):
         return redirect('home')
     
-    # Get student statistics
-    total_students = Student.objects.count()
-    boys_count = Student.objects.filter(gender='Boy').count()
-    girls_count = Student.objects.filter(gender='Girl').count()
-    
-    # Get today's birthdays
+    # Student, collection, attendance and enquiry figures (cached snapshot)
     today = date.today()
-    todays_birthdays = Student.objects.filter(dob__month=today.month, dob__day=today.day).count()
-    
-    # Get today's collection
-    todays_collection = FeePayment.objects.filter(payment_date=today).aggregate(total=Sum('payment_amount'))['total'] or 0
-    
-    # Get weekly collection (last 7 days)
-    from datetime import timedelta
-    week_start = today - timedelta(days=6)
-    weekly_collection = FeePayment.objects.filter(payment_date__range=[week_start, today]).aggregate(total=Sum('payment_amount'))['total'] or 0
-    
-    # Get monthly collection (last 30 days) - total collection for last 30 days
-    thirty_days_ago = today - timedelta(days=29)  # 30 days including today
-    monthly_payments = FeePayment.objects.filter(
-        payment_date__range=[thirty_days_ago, today]
-    )
-    monthly_collection = monthly_payments.aggregate(total=Sum('payment_amount'))['total']
-    if monthly_collection is None:
-        monthly_collection = Decimal('0')
-    
-    # Get yearly collection (current year)
-    yearly_collection = FeePayment.objects.filter(payment_date__year=today.year).aggregate(total=Sum('payment_amount'))['total'] or 0
-    
-    
-    # Get pending enquiries count - only count pending registrations and non-closed contact enquiries
-    contact_enquiries_count = ContactEnquiry.objects.exclude(status='closed').count()
-    pending_registrations_count = StudentRegistration.objects.filter(status='pending').count()
-    pending_enquiries = contact_enquiries_count + pending_registrations_count
+    stats = get_dashboard_stats(today)
     
     # Check if today is a school day or holiday
     today_event = CalendarEvent.objects.filter(event_date=today, is_active=True).first()
     
-    # Always get attendance data
-    todays_attendance = SchoolAttendance.objects.filter(date=today)
-    total_present = todays_attendance.filter(status='present').count()
-    total_absent = todays_attendance.filter(status='absent').count()
-    total_late = todays_attendance.filter(status='late').count()
-    attendance_percentage = round((total_present / total_students * 100) if total_students > 0 else 0, 1)
-    
     if today_event:
         # Today has an event - show event info with attendance
         today_status = today_event.event_type.title()
@@ -115,34 +89,14 @@ def dashboard(request):
         today_message = 'Regular school day'
         is_holiday = False
     
-    # Get class-wise data
-    class_data = Student.objects.values('student_class').annotate(count=Count('student_class')).order_by('student_class')
-    
-    # Get religion-wise data
-    religion_data = Student.objects.values('religion').annotate(count=Count('religion')).order_by('religion')
-    
     # Get comprehensive Nepali date information
     nepali_info = get_comprehensive_nepali_info()
     
     context = {
-        'total_students': total_students,
-        'boys_count': boys_count,
-        'girls_count': girls_count,
-        'todays_birthdays': todays_birthdays,
-        'todays_collection': todays_collection,
-        'weekly_collection': weekly_collection,
-        'monthly_collection': monthly_collection,
-        'yearly_collection': yearly_collection,
-        'pending_enquiries': pending_enquiries,
-        'total_present': total_present,
-        'total_absent': total_absent,
-        'total_late': total_late,
-        'attendance_percentage': attendance_percentage,
+        **stats,
         'today_status': today_status,
         'today_message': today_message,
         'is_holiday': is_holiday,
-        'class_data': class_data,
-        'religion_data': religion_data,
         'nepali_info': nepali_info,
         'current_nepali_date': nepali_info['formatted_full'],
         'nepali_year': nepali_info['nepali_date']['year'],
@@ -155,6 +109,7 @@ def dashboard(request):
     return render(request, 'index.html', context)
 
 
+@cache_public_page
 def home(request):
     # Lincoln School Homepage - Modern website homepage
     # Get hero slider images
@@ -179,52 +134,12 @@ def home(request):
     except:
         welcome_section = None
     
-    # Get basic statistics for potential use - with error handling
+    # Only the public student count is shown here; fee and attendance figures stay on the staff dashboard
+    today = date.today()
     try:
         total_students = Student.objects.count()
-        boys_count = Student.objects.filter(gender='Boy').count()
-        girls_count = Student.objects.filter(gender='Girl').count()
     except:
         total_students = 0
-        boys_count = 0
-        girls_count = 0
-    
-    # Get today's birthdays
-    today = date.today()
-    try:
-        todays_birthdays = Student.objects.filter(dob__month=today.month, dob__day=today.day).count()
-    except:
-        todays_birthdays = 0
-    
-    # Get collection data
-    try:
-        todays_collection = FeePayment.objects.filter(payment_date=today).aggregate(total=Sum('payment_amount'))['total'] or 0
-    except:
-        todays_collection = 0
-    
-    from datetime import timedelta
-    week_start = today - timedelta(days=6)
-    try:
-        weekly_collection = FeePayment.objects.filter(payment_date__range=[week_start, today]).aggregate(total=Sum('payment_amount'))['total'] or 0
-    except:
-        weekly_collection = 0
-    
-    # Monthly collection calculation - total collection for last 30 days
-    thirty_days_ago = today - timedelta(days=29)  # 30 days including today
-    try:
-        monthly_payments = FeePayment.objects.filter(
-            payment_date__range=[thirty_days_ago, today]
-        )
-        monthly_collection = monthly_payments.aggregate(total=Sum('payment_amount'))['total']
-        if monthly_collection is None:
-            monthly_collection = Decimal('0')
-    except:
-        monthly_collection = Decimal('0')
-    
-    try:
-        yearly_collection = FeePayment.objects.filter(payment_date__year=today.year).aggregate(total=Sum('payment_amount'))['total'] or 0
-    except:
-        yearly_collection = 0
     
     # Check if today is a school day or holiday
     try:
@@ -233,63 +148,22 @@ def home(request):
         today_event = None
     
     if today_event and today_event.event_type in ['holiday', 'festival']:
-        # Today is a holiday - show event info instead of attendance
-        total_present = 0
-        total_absent = 0
-        total_late = 0
-        attendance_percentage = 0
         today_status = today_event.event_type.title()
         today_message = today_event.title
         is_holiday = True
     else:
-        # Today is a school day - get attendance data
-        try:
-            todays_attendance = SchoolAttendance.objects.filter(date=today)
-            total_present = todays_attendance.filter(status='present').count()
-            total_absent = todays_attendance.filter(status='absent').count()
-            total_late = todays_attendance.filter(status='late').count()
-            attendance_percentage = round((total_present / total_students * 100) if total_students > 0 else 0, 1)
-        except:
-            total_present = 0
-            total_absent = 0
-            total_late = 0
-            attendance_percentage = 0
         today_status = 'School Day'
         today_message = 'Regular school day'
         is_holiday = False
     
-    # Get class-wise and religion-wise data
-    try:
-        class_data = Student.objects.values('student_class').annotate(count=Count('student_class')).order_by('student_class')
-    except:
-        class_data = []
-    
-    try:
-        religion_data = Student.objects.values('religion').annotate(count=Count('religion')).order_by('religion')
-    except:
-        religion_data = []
-    
     # Get Nepali date information
     nepali_info = get_comprehensive_nepali_info()
     
     context = {
         'total_students': total_students,
-        'boys_count': boys_count,
-        'girls_count': girls_count,
-        'todays_birthdays': todays_birthdays,
-        'todays_collection': todays_collection,
-        'weekly_collection': weekly_collection,
-        'monthly_collection': monthly_collection,
-        'yearly_collection': yearly_collection,
-        'total_present': total_present,
-        'total_absent': total_absent,
-        'total_late': total_late,
-        'attendance_percentage': attendance_percentage,
         'today_status': today_status,
         'today_message': today_message,
         'is_holiday': is_holiday,
-        'class_data': class_data,
-        'religion_data': religion_data,
         'nepali_info': nepali_info,
         'current_nepali_date': nepali_info['formatted_full'],
         'nepali_year': nepali_info['nepali_date']['year'],
@@ -501,22 +375,11 @@ def teachers(request):
     # GET request - show teachers list with class filtering
     class_filter = request.GET.get('class', '')
     
-    if class_filter:
-        # Filter teachers who teach the selected class
-        teacher_ids = TeacherClassSubject.objects.filter(class_name=class_filter, is_active=True).values_list('teacher_id', flat=True).distinct()
-        teachers = Teacher.objects.filter(id__in=teacher_ids).order_by('name')
-    else:
-        teachers = Teacher.objects.all().order_by('name')
+    # Teachers with their assignments and assignment summaries, prefetched in two queries
+    teachers = teacher_directory(class_filter)
     
-    # Add assignments to each teacher
-    for teacher in teachers:
-        assignments = TeacherClassSubject.objects.filter(teacher=teacher, is_active=True).select_related('subject')
-        teacher.assignments = assignments
-        # Also add assignment summary for display
-        teacher.assignment_summary = teacher.get_all_assignments()
-    
-    # Get all unique classes for filter dropdown from TeacherClassSubject
-    all_classes = TeacherClassSubject.objects.filter(is_active=True).values_list('class_name', flat=True).distinct().order_by('class_name')
+    # Classes for the filter dropdown, from the cached coverage matrix
+    all_classes = get_teacher_coverage().taught_classes()
     
     school_info = SchoolDetail.get_current_school()
     
@@ -527,6 +390,20 @@ def teachers(request):
         'selected_class': class_filter,
     })
 
+@permission_required('can_view_teachers')
+def teacher_coverage_api(request):
+    """Who teaches a class (?class=Nine), or one of its subjects (&subject=Science, a name or id)"""
+    class_name = request.GET.get('class', '').strip()
+    subject = request.GET.get('subject', '').strip()
+    if not class_name:
+        return JsonResponse({'success': False, 'error': 'class is required'}, status=400)
+    
+    coverage = get_teacher_coverage()
+    if subject:
+        teachers = coverage.teachers_for(class_name, int(subject) if subject.isdigit() else subject)
+        return JsonResponse({'success': True, 'class_name': class_name, 'subject': subject, 'teachers': teachers})
+    return JsonResponse({'success': True, **coverage.class_summary(class_name)})
+
 def teacher_view(request, teacher_id):
     teacher = get_object_or_404(Teacher, id=teacher_id)
     school_info = SchoolDetail.get_current_school()
@@ -991,76 +868,21 @@ def download_template(request):
     return response
 
 def download_csv(request):
-    from django.db.models import Sum
-    
-    response = HttpResponse(content_type='text/csv')
-    response['Content-Disposition'] = 'attachment; filename="fee_receipt_book.csv"'
-    
-    writer = csv.writer(response)
-    writer.writerow([
-        'S.No', 'Student ID', 'Name', 'Class', 'Section', 'Roll Number',
-        'Total Fee', 'Amount Paid', 'Amount Pending', 'Payment Status',
-        'Last Payment Date', 'Father Name', 'Mobile', 'Paid Months'
-    ])
-    
-    students = Student.objects.annotate(
-        total_paid=Sum('feepayment__payment_amount'),
-        last_payment_date=Max('feepayment__payment_date')
-    ).order_by('name')
+    """Stream the fee receipt book (default) or student list (?columns=students) as CSV"""
+    column_set = request.GET.get('columns', 'fee_receipt_book')
+    if column_set not in COLUMN_SETS:
+        column_set = 'fee_receipt_book'
     
-    for index, student in enumerate(students, 1):
-        # Calculate total fee
-        try:
-            fee_structure = FeeStructure.objects.get(class_name=student.student_class)
-            total_fee = (
-                float(fee_structure.admission_fee) +
-                float(fee_structure.monthly_fee) * 12 +
-                float(fee_structure.tuition_fee) * 12 +
-                float(fee_structure.examination_fee) +
-                float(fee_structure.library_fee) +
-                float(fee_structure.sports_fee) +
-                float(fee_structure.laboratory_fee) +
-                float(fee_structure.computer_fee) +
-                float(fee_structure.transportation_fee) * 12
-            )
-        except FeeStructure.DoesNotExist:
-            total_fee = 5000 + (2500 * 12) + (2000 * 12) + 1000 + 500 + 800 + 1200 + 1500 + (1500 * 12)
-        
-        paid_amount = student.total_paid or 0
-        pending_amount = max(0, total_fee - paid_amount)
-        payment_status = 'Paid' if pending_amount == 0 else 'Pending'
-        
-        # Get paid months
-        payments = FeePayment.objects.filter(student=student)
-        paid_months = set()
-        for payment in payments:
-            if payment.selected_months:
-                try:
-                    months = json.loads(payment.selected_months)
-                    paid_months.update(months)
-                except json.JSONDecodeError:
-                    pass
-        
-        writer.writerow([
-            index,
-            f'STU{student.id:03d}',
-            student.name,
-            student.student_class,
-            student.section,
-            student.reg_number,
-            f'Rs.{total_fee:,.2f}',
-            f'Rs.{paid_amount:,.2f}',
-            f'Rs.{pending_amount:,.2f}',
-            payment_status,
-            student.last_payment_date.strftime('%Y-%m-%d') if student.last_payment_date else 'No payments',
-            student.father_name,
-            student.mobile,
-            ', '.join(sorted(paid_months)) if paid_months else 'None'
-        ])
+    students = Student.objects.order_by('name')
+    class_filter = request.GET.get('class', '').strip()
+    if class_filter:
+        students = students.filter(student_class=class_filter)
     
-    return response
+    filename = 'student_list.csv' if column_set == 'students' else 'fee_receipt_book.csv'
+    return streaming_csv_response(iter_csv_rows(students, column_set), filename)
 
 def upload_csv(request):
+    """Import students from CSV. Nothing is saved unless every row is valid; dry_run=1 only validates."""
     if request.method == 'POST':
         csv_file = request.FILES.get('csv_file')
         if not csv_file:
@@ -1069,110 +891,30 @@ def upload_csv(request):
         if not csv_file.name.endswith('.csv'):
             return JsonResponse({'success': False, 'error': 'Please upload a CSV file'})
         
+        dry_run = request.POST.get('dry_run', '').lower() in ('1', 'true', 'on', 'yes')
+        
         try:
-            # Handle different encodings
-            try:
-                decoded_file = csv_file.read().decode('utf-8')
-            except UnicodeDecodeError:
-                csv_file.seek(0)
-                decoded_file = csv_file.read().decode('utf-8-sig')
-            
-            io_string = io.StringIO(decoded_file)
-            reader = csv.DictReader(io_string)
-            
-            created_count = 0
-            errors = []
-            
-            for row_num, row in enumerate(reader, start=2):
-                try:
-                    # Skip empty rows
-                    if not any(row.values()):
-                        continue
-                    
-                    # Validate required fields
-                    name = row.get('Name', '').strip()
-                    if not name:
-                        errors.append(f'Row {row_num}: Name is required')
-                        continue
-                    
-                    father_name = row.get('Father Name', '').strip()
-                    if not father_name:
-                        errors.append(f'Row {row_num}: Father Name is required')
-                        continue
-                    
-                    # Generate unique registration number if not provided
-                    reg_number = row.get('Registration Number', '').strip()
-                    if not reg_number:
-                        reg_number = f'REG{datetime.now().year}{created_count+1:04d}'
-                    
-                    # Check if registration number already exists
-                    if Student.objects.filter(reg_number=reg_number).exists():
-                        reg_number = f'REG{datetime.now().year}{Student.objects.count()+created_count+1:04d}'
-                    
-                    # Validate and set defaults
-                    student_class = row.get('Class', 'Nursery').strip()
-                    section = row.get('Section', 'A').strip()
-                    gender = row.get('Gender', 'Boy').strip()
-                    religion = row.get('Religion', 'Hindu').strip()
-                    
-                    # Parse dates
-                    dob = row.get('DOB', '2000-01-01').strip()
-                    admission_date = row.get('Admission Date', datetime.now().strftime('%Y-%m-%d')).strip()
-                    
-                    # Always use current active session for consistency
-                    current_session = Session.get_current_session()
-                    if not current_session:
-                        current_session, created = Session.objects.get_or_create(
-                            name='2024-25',
-                            defaults={
-                                'start_date': '2024-04-01',
-                                'end_date': '2025-03-31',
-                                'is_active': True
-                            }
-                        )
-                    session_name = current_session.name
-                    
-                    # Create student with proper field mapping
-                    student = Student.objects.create(
-                        name=name,
-                        student_class=student_class,
-                        section=section,
-                        mobile=row.get('Mobile', '9999999999').strip()[:10],
-                        father_name=father_name,
-                        mother_name=row.get('Mother Name', '').strip(),
-                        reg_number=reg_number,
-                        transport=row.get('Transport', '00_No Transport Service | 0 Rs.').strip(),
-                        address1=row.get('Address1', 'N/A').strip(),
-                        address2=row.get('Address2', '').strip(),
-                        city=row.get('City', 'N/A').strip(),
-                        gender=gender,
-                        religion=religion,
-                        dob=dob,
-                        admission_date=admission_date,
-                        session=session_name,
-                        father_mobile=row.get('Father Mobile', '9999999999').strip()[:10],
-                        mother_mobile=row.get('Mother Mobile', '').strip()[:10] if row.get('Mother Mobile', '').strip() else '',
-                        father_email=row.get('Father Email', '').strip(),
-                        father_occupation=row.get('Father Occupation', '').strip(),
-                        father_qualification=row.get('Father Qualification', '').strip(),
-                        mother_occupation=row.get('Mother Occupation', '').strip(),
-                        mother_qualification=row.get('Mother Qualification', '').strip(),
-                        old_balance=float(row.get('Old Balance', 0) or 0)
-                    )
-                    created_count += 1
-                except Exception as e:
-                    errors.append(f'Row {row_num}: {str(e)}')
-            
-            if created_count > 0:
-                message = f'Successfully imported {created_count} students'
-                if errors:
-                    message += f'. {len(errors)} rows had errors.'
-                return JsonResponse({'success': True, 'message': message, 'errors': errors[:5]})
-            else:
-                return JsonResponse({'success': False, 'error': 'No valid student records found in CSV'})
-                
+            result = StudentImport.from_file(csv_file).run(dry_run=dry_run)
         except Exception as e:
             return JsonResponse({'success': False, 'error': f'Error processing CSV: {str(e)}'})
+        
+        if result.errors:
+            message = f'{len(result.errors)} problems found, no students were imported. ' + '; '.join(result.errors[:5])
+            return JsonResponse({'success': False, 'error': message, 'errors': result.errors,
+                                 'warnings': result.warnings, 'dry_run': dry_run})
+        
+        if not result.students:
+            return JsonResponse({'success': False, 'error': 'No valid student records found in CSV'})
+        
+        if dry_run:
+            message = f'{len(result.students)} students are valid and ready to import'
+        else:
+            message = f'Successfully imported {result.created_count} students'
+        if result.warnings:
+            message += f'. {len(result.warnings)} registration numbers were changed.'
+        return JsonResponse({'success': True, 'message': message, 'dry_run': dry_run,
+                             'valid_count': len(result.students), 'created_count': result.created_count,
+                             'errors': [], 'warnings': result.warnings})
     
     return JsonResponse({'success': False, 'error': 'Invalid request method'})
 
@@ -1193,6 +935,8 @@ def bulk_delete_students(request):
             data = json.loads(request.body)
             student_ids = data.get('student_ids', [])
             deleted_count = Student.objects.filter(id__in=student_ids).delete()[0]
+            invalidate_dashboard_stats()
+            invalidate_search_index()
             return JsonResponse({'success': True, 'deleted_count': deleted_count})
         except Exception as e:
             return JsonResponse({'success': False, 'error': str(e)})
@@ -1232,82 +976,38 @@ def search_student_api(request):
         student_class = request.GET.get('class', '').strip()
         section = request.GET.get('section', '').strip()
         reg_number = request.GET.get('reg', '').strip()
+        try:
+            page = max(int(request.GET.get('page', 1)), 1)
+        except ValueError:
+            page = 1
         
-        # Build query conditions
-        conditions = models.Q()
-        
-        # Quick search (backward compatibility)
-        if query:
-            # Try to find by ID format (STU001)
-            if query.upper().startswith('STU'):
-                try:
-                    student_id = int(query[3:])  # Extract number after STU
-                    conditions |= models.Q(id=student_id)
-                except ValueError:
-                    pass
-            
-            # Add other search conditions
-            conditions |= models.Q(reg_number__icontains=query)
-            conditions |= models.Q(name__icontains=query)
-            conditions |= models.Q(student_class__icontains=query)
-            conditions |= models.Q(father_name__icontains=query)
-        
-        # Advanced search
-        if name:
-            if conditions:
-                conditions &= models.Q(name__icontains=name)
-            else:
-                conditions = models.Q(name__icontains=name)
-        if student_class:
-            if conditions:
-                conditions &= models.Q(student_class=student_class)
-            else:
-                conditions = models.Q(student_class=student_class)
-        if section:
-            if conditions:
-                conditions &= models.Q(section=section)
-            else:
-                conditions = models.Q(section=section)
-        if reg_number:
-            if conditions:
-                conditions &= models.Q(reg_number__icontains=reg_number)
-            else:
-                conditions = models.Q(reg_number__icontains=reg_number)
-        
-        # If no search criteria provided, return all students (limited)
-        if not any([query, name, student_class, section, reg_number]):
-            students = Student.objects.all().order_by('name')[:20]
-        else:
-            # Execute search
-            students = Student.objects.filter(conditions).order_by('name')[:20]  # Limit to 20 results
+        # Ranked search over the in-memory index; no database query once it is built
+        index = get_search_index()
+        rows, total = index.search(query, student_class=student_class, section=section,
+                                   name=name, reg_number=reg_number, page=page)
         
-        if students:
-            students_data = []
-            for student in students:
-                students_data.append({
-                    'id': student.id,
-                    'name': student.name,
-                    'reg_number': student.reg_number,
-                    'student_class': student.student_class,
-                    'section': student.section,
-                    'father_name': student.father_name
-                })
+        if rows:
+            students_data = [dict(zip(('id', 'name', 'reg_number', 'student_class', 'section', 'father_name'), row))
+                             for row in rows]
+            page_info = {'page': page, 'total': total, 'has_next': page * SEARCH_PAGE_SIZE < total}
             
             # For backward compatibility, if only one result and it's a quick search, return single student
-            if len(students_data) == 1 and query and not any([name, student_class, section, reg_number]):
+            if total == 1 and query and not any([name, student_class, section, reg_number]):
                 return JsonResponse({
                     'success': True,
                     'student': students_data[0],
-                    'students': students_data
+                    'students': students_data,
+                    **page_info
                 })
             else:
                 return JsonResponse({
                     'success': True,
-                    'students': students_data
+                    'students': students_data,
+                    **page_info
                 })
         else:
             # Check if there are any students in the database at all
-            total_students = Student.objects.count()
+            total_students = len(index)
             if total_students == 0:
                 return JsonResponse({'success': False, 'error': 'No students found in database. Please add students first.'})
             else:
@@ -1337,85 +1037,90 @@ def submit_payment(request):
             
             payment_ids = []
             
-            # Create separate payment record for each fee type with appropriate months
-            for fee_type in fee_types:
-                # One-time fees don't need months
-                one_time_fees = ['admission_fee', 'examination_fee', 'library_fee', 'sports_fee', 'laboratory_fee', 'computer_fee']
-                fee_months = [] if fee_type['type'] in one_time_fees else selected_months
+            # Payments, expense updates and the cached fee balance commit together; the balance is
+            # rebuilt once at the end rather than after every payment row
+            with transaction.atomic(), deferred_balance_refresh():
+                # Create separate payment record for each fee type with appropriate months
+                for fee_type in fee_types:
+                    # One-time fees don't need months
+                    one_time_fees = ['admission_fee', 'examination_fee', 'library_fee', 'sports_fee', 'laboratory_fee', 'computer_fee']
+                    fee_months = [] if fee_type['type'] in one_time_fees else selected_months
                 
-                payment = FeePayment.objects.create(
-                    student=student,
-                    selected_months=json.dumps(fee_months),
-                    fee_types=json.dumps([fee_type]),
-                    custom_fees='[]',
-                    total_fee=fee_type.get('total', fee_type.get('amount', 0)),
-                    payment_amount=fee_type.get('total', fee_type.get('amount', 0)),
-                    balance=0,
-                    payment_method=data['payment_method'],
-                    bank_name=data.get('bank_name', ''),
-                    cheque_dd_no=data.get('cheque_dd_no', ''),
-                    cheque_date=cheque_date,
-                    remarks=data.get('remarks', ''),
-                    sms_sent=data.get('sms_sent', False),
-                    whatsapp_sent=data.get('whatsapp_sent', False)
-                )
-                payment_ids.append(payment.id)
+                    payment = FeePayment.objects.create(
+                        student=student,
+                        selected_months=json.dumps(fee_months),
+                        fee_types=json.dumps([fee_type]),
+                        custom_fees='[]',
+                        total_fee=fee_type.get('total', fee_type.get('amount', 0)),
+                        payment_amount=fee_type.get('total', fee_type.get('amount', 0)),
+                        balance=0,
+                        payment_method=data['payment_method'],
+                        bank_name=data.get('bank_name', ''),
+                        cheque_dd_no=data.get('cheque_dd_no', ''),
+                        cheque_date=cheque_date,
+                        remarks=data.get('remarks', ''),
+                        sms_sent=data.get('sms_sent', False),
+                        whatsapp_sent=data.get('whatsapp_sent', False)
+                    )
+                    payment_ids.append(payment.id)
             
-            # Create separate payment records for custom fees
-            for custom_fee in custom_fees:
-                payment = FeePayment.objects.create(
-                    student=student,
-                    selected_months='[]',
-                    fee_types='[]',
-                    custom_fees=json.dumps([custom_fee]),
-                    total_fee=custom_fee['amount'],
-                    payment_amount=custom_fee['amount'],
-                    balance=0,
-                    payment_method=data['payment_method'],
-                    bank_name=data.get('bank_name', ''),
-                    cheque_dd_no=data.get('cheque_dd_no', ''),
-                    cheque_date=cheque_date,
-                    remarks=data.get('remarks', ''),
-                    sms_sent=data.get('sms_sent', False),
-                    whatsapp_sent=data.get('whatsapp_sent', False)
-                )
-                payment_ids.append(payment.id)
-            
-            # Update admission status if admission fee is paid
-            for fee_type in fee_types:
-                if fee_type['type'] == 'admission_fee':
-                    student.admission_paid = True
-                    student.save()
-                    break
-            
-            # Record paid daily expenses as FeePayment entries and mark as paid
-            daily_expenses = json.loads(data.get('daily_expenses', '[]'))
-            if daily_expenses:
-                for expense in daily_expenses:
-                    # Create FeePayment record for daily expense
-                    FeePayment.objects.create(
+                # Create separate payment records for custom fees
+                for custom_fee in custom_fees:
+                    payment = FeePayment.objects.create(
                         student=student,
                         selected_months='[]',
                         fee_types='[]',
-                        custom_fees=json.dumps([{'name': expense['description'], 'amount': expense['amount']}]),
-                        total_fee=expense['amount'],
-                        payment_amount=expense['amount'],
+                        custom_fees=json.dumps([custom_fee]),
+                        total_fee=custom_fee['amount'],
+                        payment_amount=custom_fee['amount'],
                         balance=0,
                         payment_method=data['payment_method'],
                         bank_name=data.get('bank_name', ''),
                         cheque_dd_no=data.get('cheque_dd_no', ''),
                         cheque_date=cheque_date,
-                        remarks=f"Daily Expense: {expense['description']}",
+                        remarks=data.get('remarks', ''),
                         sms_sent=data.get('sms_sent', False),
                         whatsapp_sent=data.get('whatsapp_sent', False)
                     )
+                    payment_ids.append(payment.id)
+            
+                # Update admission status if admission fee is paid
+                for fee_type in fee_types:
+                    if fee_type['type'] == 'admission_fee':
+                        student.admission_paid = True
+                        student.save()
+                        break
+            
+                # Record paid daily expenses as FeePayment entries and mark as paid
+                daily_expenses = json.loads(data.get('daily_expenses', '[]'))
+                if daily_expenses:
+                    for expense in daily_expenses:
+                        # Create FeePayment record for daily expense
+                        FeePayment.objects.create(
+                            student=student,
+                            selected_months='[]',
+                            fee_types='[]',
+                            custom_fees=json.dumps([{'name': expense['description'], 'amount': expense['amount']}]),
+                            total_fee=expense['amount'],
+                            payment_amount=expense['amount'],
+                            balance=0,
+                            payment_method=data['payment_method'],
+                            bank_name=data.get('bank_name', ''),
+                            cheque_dd_no=data.get('cheque_dd_no', ''),
+                            cheque_date=cheque_date,
+                            remarks=f"Daily Expense: {expense['description']}",
+                            sms_sent=data.get('sms_sent', False),
+                            whatsapp_sent=data.get('whatsapp_sent', False)
+                        )
                 
-                # Mark daily expenses as paid instead of deleting them
-                expense_ids = [expense['id'] for expense in daily_expenses]
-                StudentDailyExpense.objects.filter(id__in=expense_ids).update(
-                    is_paid=True,
-                    payment_date=date.today()
-                )
+                    # Mark daily expenses as paid instead of deleting them
+                    expense_ids = [expense['id'] for expense in daily_expenses]
+                    StudentDailyExpense.objects.filter(id__in=expense_ids).update(
+                        is_paid=True,
+                        payment_date=date.today()
+                    )
+                
+                refresh_fee_balances([student])
             
             return JsonResponse({'success': True, 'payment_ids': payment_ids, 'daily_expenses_paid': len(daily_expenses) if daily_expenses else 0})
         except Exception as e:
@@ -1424,9 +1129,6 @@ def submit_payment(request):
     return JsonResponse({'success': False, 'error': 'Invalid request method'})
 
 def fee_receipt_book(request):
-    from django.db.models import Sum, Max
-    from decimal import Decimal
-    
     # Get filter parameters
     selected_months = [m.strip() for m in request.GET.get('months', '').split(',') if m.strip()]
     selected_fee_types = [f.strip() for f in request.GET.get('fee_types', '').split(',') if f.strip()]
@@ -1436,67 +1138,33 @@ def fee_receipt_book(request):
     students_query = Student.objects.all()
     
     if search_query:
-        students_query = students_query.filter(
-            models.Q(name__icontains=search_query) |
-            models.Q(reg_number__icontains=search_query) |
-            models.Q(student_class__icontains=search_query) |
-            models.Q(father_name__icontains=search_query)
-        )
-    
-    students = students_query.annotate(
-        total_paid=Sum('feepayment__payment_amount'),
-        last_payment_date=Max('feepayment__payment_date')
-    ).order_by('name')
+        # Matching ids come from the search index; load them in chunks to stay under SQL parameter limits
+        matching_ids = search_student_ids(search_query)
+        students = []
+        for start in range(0, len(matching_ids), 500):
+            students.extend(students_query.filter(id__in=matching_ids[start:start + 500]))
+        students.sort(key=lambda student: student.name)
+    else:
+        students = list(students_query.order_by('name'))
+    ledger = FeeLedger(students)
     
     # Get unique classes from students
     available_classes = Student.objects.values_list('student_class', flat=True).distinct().order_by('student_class')
     
     # Calculate statistics
-    total_students = students.count()
-    total_collected = Decimal('0')
-    total_pending = Decimal('0')
+    total_students = len(students)
+    total_collected = ledger.total_paid
+    total_pending = ledger.total_pending
+    
+    month_names = ['Baisakh', 'Jestha', 'Ashadh', 'Shrawan', 'Bhadra', 'Ashwin',
+                  'Kartik', 'Mangsir', 'Poush', 'Magh', 'Falgun', 'Chaitra']
+    month_shorts = ['B', 'J', 'A', 'S', 'B', 'A', 'K', 'M', 'P', 'M', 'F', 'C']
     
     # Process each student
     students_with_data = []
     for student in students:
-        payments = FeePayment.objects.filter(student=student)
-        
-        # Calculate total fee for student based on fee structure
-        try:
-            fee_structure = FeeStructure.objects.get(class_name=student.student_class)
-            student_total_fee = (
-                fee_structure.admission_fee +
-                fee_structure.monthly_fee * 12 +
-                fee_structure.tuition_fee * 12 +
-                fee_structure.examination_fee +
-                fee_structure.library_fee +
-                fee_structure.sports_fee +
-                fee_structure.laboratory_fee +
-                fee_structure.computer_fee +
-                fee_structure.transportation_fee * 12
-            )
-        except FeeStructure.DoesNotExist:
-            student_total_fee = Decimal('5000') + (Decimal('2500') * 12) + (Decimal('2000') * 12) + Decimal('1000') + Decimal('500') + Decimal('800') + Decimal('1200') + Decimal('1500') + (Decimal('1500') * 12)
-        
-        # Calculate paid amount
-        student_paid = student.total_paid or Decimal('0')
-        
-        # Get only unpaid daily expenses (paid expenses are deleted from the table)
-        unpaid_daily_expenses = StudentDailyExpense.objects.filter(student=student, is_paid=False)
-        daily_expenses_total = unpaid_daily_expenses.aggregate(
-            total_expenses=Sum('amount')
-        )['total_expenses'] or Decimal('0')
-        
-        # Only add unpaid daily expenses to total fee
-        student_total_fee += daily_expenses_total
-        student_pending = max(Decimal('0'), student_total_fee - student_paid)
-        
-        # Add to totals
-        total_collected += student_paid
-        total_pending += student_pending
-        
-        # Store only unpaid daily expenses for display
-        student.daily_expenses_total = float(daily_expenses_total)
+        entry = ledger[student.pk]
+        fee_structure = entry.fee_structure
         
         # Calculate fee breakdown based on applied filters
         if fee_structure:
@@ -1538,55 +1206,21 @@ def fee_receipt_book(request):
             student.fee_breakdown_text = "No fee structure found"
         
         # Set student attributes for template
-        student.total_fee = float(student_total_fee)
-        student.paid_amount = float(student_paid)
-        student.pending_amount = float(student_pending)
-        student.payment_status = 'paid' if student_pending == 0 else 'pending'
+        student.total_fee = float(entry.total_fee)
+        student.paid_amount = float(entry.paid_amount)
+        student.pending_amount = float(entry.pending_amount)
+        student.payment_status = entry.payment_status
+        student.last_payment_date = entry.last_payment_date
         student.roll_number = student.reg_number
-        student.daily_expenses_total = float(daily_expenses_total)
-        student.email = student.email  # Ensure email is available
-        
-        # Calculate monthly fee amount (monthly_fee + tuition_fee)
-        try:
-            fee_structure = FeeStructure.objects.get(class_name=student.student_class)
-            monthly_fee_amount = float(fee_structure.monthly_fee) + float(fee_structure.tuition_fee)
-        except FeeStructure.DoesNotExist:
-            monthly_fee_amount = 4500.0  # 2500 + 2000
+        student.daily_expenses_total = float(entry.unpaid_expenses)
         
-        # Create fee breakdown with months
+        # Create fee breakdown with months (monthly_fee + tuition_fee per month)
+        monthly_fee_amount = float(entry.monthly_fee_amount)
         months_data = [
-            {'name': 'Baisakh', 'short': 'B', 'paid': False, 'amount': monthly_fee_amount},
-            {'name': 'Jestha', 'short': 'J', 'paid': False, 'amount': monthly_fee_amount},
-            {'name': 'Ashadh', 'short': 'A', 'paid': False, 'amount': monthly_fee_amount},
-            {'name': 'Shrawan', 'short': 'S', 'paid': False, 'amount': monthly_fee_amount},
-            {'name': 'Bhadra', 'short': 'B', 'paid': False, 'amount': monthly_fee_amount},
-            {'name': 'Ashwin', 'short': 'A', 'paid': False, 'amount': monthly_fee_amount},
-            {'name': 'Kartik', 'short': 'K', 'paid': False, 'amount': monthly_fee_amount},
-            {'name': 'Mangsir', 'short': 'M', 'paid': False, 'amount': monthly_fee_amount},
-            {'name': 'Poush', 'short': 'P', 'paid': False, 'amount': monthly_fee_amount},
-            {'name': 'Magh', 'short': 'M', 'paid': False, 'amount': monthly_fee_amount},
-            {'name': 'Falgun', 'short': 'F', 'paid': False, 'amount': monthly_fee_amount},
-            {'name': 'Chaitra', 'short': 'C', 'paid': False, 'amount': monthly_fee_amount}
+            {'name': month_name, 'short': month_shorts[i], 'paid': entry.is_month_paid(month_name), 'amount': monthly_fee_amount}
+            for i, month_name in enumerate(month_names)
         ]
         
-        # Mark paid months based on payments
-        paid_months = set()
-        for payment in payments:
-            if payment.selected_months:
-                try:
-                    months = json.loads(payment.selected_months)
-                    paid_months.update(months)
-                except json.JSONDecodeError:
-                    pass
-        
-        # Update months data
-        month_names = ['Baisakh', 'Jestha', 'Ashadh', 'Shrawan', 'Bhadra', 'Ashwin',
-                      'Kartik', 'Mangsir', 'Poush', 'Magh', 'Falgun', 'Chaitra']
-        
-        for i, month_name in enumerate(month_names):
-            if month_name in paid_months or str(i+1) in paid_months:
-                months_data[i]['paid'] = True
-        
         student.fee_breakdown = [{'months': months_data}]
         
         students_with_data.append(student)
@@ -1677,35 +1311,17 @@ def student_payments_api(request, student_id):
         return JsonResponse({'success': False, 'error': str(e)})
 
 def admission_fee_table(request):
-    students = Student.objects.all().order_by('name')
+    students = list(Student.objects.all().order_by('name'))
+    ledger = FeeLedger(students, include_expenses=False)
     
     # Add paid months data for each student
     students_with_months = []
     for student in students:
-        payments = FeePayment.objects.filter(student=student)
-        paid_months = set()
-        admission_fee_paid = student.admission_paid
-        
-        for payment in payments:
-            if payment.selected_months:
-                try:
-                    months = json.loads(payment.selected_months)
-                    paid_months.update(months)
-                except json.JSONDecodeError:
-                    pass
-            
-            # Check if admission fee was paid in this payment
-            if not admission_fee_paid and payment.fee_types:
-                try:
-                    fee_types = json.loads(payment.fee_types)
-                    for fee_type in fee_types:
-                        if fee_type.get('type') == 'admission_fee':
-                            admission_fee_paid = True
-                            break
-                except json.JSONDecodeError:
-                    pass
+        entry = ledger[student.pk]
+        paid_months = entry.paid_months
         
-        student.admission_paid = admission_fee_paid
+        # Admission counts as paid if any payment covered the admission fee
+        student.admission_paid = student.admission_paid or 'admission_fee' in entry.paid_fee_types
         student.paid_months = list(paid_months)
         # If at least one month is paid, mark admission as paid
         student.has_monthly_payment = len(paid_months) > 0
@@ -1752,8 +1368,7 @@ def fee_receipt(request, payment_id):
     payment_date_nepali = ''
     if payment.payment_date:
         try:
-            nepali_date_dict = NepaliCalendar.english_to_nepali_date(payment.payment_date)
-            payment_date_nepali = NepaliCalendar.format_nepali_date(nepali_date_dict, 'full_en')
+            payment_date_nepali = NepaliCalendar.format_english_date(payment.payment_date, 'full_en')
         except:
             pass
     
@@ -1878,23 +1493,8 @@ def credit_slip(request, student_id):
     if fee_structure:
         # Get paid months and fee types
         payments = FeePayment.objects.filter(student=student)
-        paid_months = set()
-        paid_fee_types = set()
-        
-        for payment in payments:
-            if payment.selected_months:
-                try:
-                    months = json.loads(payment.selected_months)
-                    paid_months.update(months)
-                except json.JSONDecodeError:
-                    pass
-            if payment.fee_types:
-                try:
-                    fee_types = json.loads(payment.fee_types)
-                    for fee_data in fee_types:
-                        paid_fee_types.add(fee_data.get('type'))
-                except json.JSONDecodeError:
-                    pass
+        paid_months = FeePaymentItem.paid_months_for(student)
+        paid_fee_types = FeePaymentItem.paid_fee_types_for(student)
         
         # Show only selected unpaid items
         if selected_months or selected_fee_types:
@@ -2000,15 +1600,7 @@ def fee_receipt_book_api(request):
                 student_total_fee = monthly_fee * len(selected_months)
                 
                 # Calculate paid amount for selected months only
-                payments = FeePayment.objects.filter(student=student)
-                paid_months = set()
-                for payment in payments:
-                    if payment.selected_months:
-                        try:
-                            months = json.loads(payment.selected_months)
-                            paid_months.update(months)
-                        except json.JSONDecodeError:
-                            pass
+                paid_months = FeePaymentItem.paid_months_for(student)
                 
                 paid_selected_months = len([m for m in selected_months if m in paid_months])
                 student_paid = monthly_fee * paid_selected_months
@@ -2123,37 +1715,17 @@ def bulk_print_receipts(request):
     if not class_filter:
         return HttpResponse('Class selection is required for bulk printing.')
     
-    students = Student.objects.filter(student_class=class_filter).order_by('name')
+    students = list(Student.objects.filter(student_class=class_filter).order_by('name'))
+    ledger = FeeLedger(students, include_expenses=False)
     
     # Process each student with fee calculations
     students_with_data = []
     for student in students:
-        try:
-            fee_structure = FeeStructure.objects.get(class_name=student.student_class)
-        except FeeStructure.DoesNotExist:
-            fee_structure = None
-        
-        # Get payments for this student
-        payments = FeePayment.objects.filter(student=student)
-        paid_months = set()
-        paid_fee_types = set()
-        total_paid = Decimal('0')
-        
-        for payment in payments:
-            total_paid += payment.payment_amount
-            if payment.selected_months:
-                try:
-                    months = json.loads(payment.selected_months)
-                    paid_months.update(months)
-                except json.JSONDecodeError:
-                    pass
-            if payment.fee_types:
-                try:
-                    fee_types = json.loads(payment.fee_types)
-                    for fee_data in fee_types:
-                        paid_fee_types.add(fee_data.get('type'))
-                except json.JSONDecodeError:
-                    pass
+        entry = ledger[student.pk]
+        fee_structure = entry.fee_structure
+        paid_months = entry.paid_months
+        paid_fee_types = entry.paid_fee_types
+        total_paid = entry.paid_amount
         
         # Calculate pending fees based on filters
         pending_fees = []
@@ -2234,49 +1806,25 @@ def bulk_print_receipts(request):
     return render(request, 'bulk_print_receipts.html', context)
 
 def fee_pending_report(request):
-    from django.db.models import Sum, Max
     from decimal import Decimal
     
-    # Get all students with pending fees
-    students_query = Student.objects.annotate(
-        total_paid=Sum('feepayment__payment_amount'),
-        last_payment_date=Max('feepayment__payment_date')
-    ).order_by('name')
+    # Pending balances are kept current in StudentFeeBalance, so this is a single indexed read
+    balances = StudentFeeBalance.objects.filter(pending_amount__gt=0).select_related('student').order_by('student__name')
     
-    # Process students and filter only those with pending fees
     students_with_pending = []
     total_pending_amount = Decimal('0')
     
-    for student in students_query:
-        try:
-            fee_structure = FeeStructure.objects.get(class_name=student.student_class)
-            student_total_fee = (
-                fee_structure.admission_fee +
-                fee_structure.monthly_fee * 12 +
-                fee_structure.tuition_fee * 12 +
-                fee_structure.examination_fee +
-                fee_structure.library_fee +
-                fee_structure.sports_fee +
-                fee_structure.laboratory_fee +
-                fee_structure.computer_fee +
-                fee_structure.transportation_fee * 12
-            )
-        except FeeStructure.DoesNotExist:
-            student_total_fee = Decimal('60000')  # Default total fee
-        
-        student_paid = student.total_paid or Decimal('0')
-        student_pending = max(Decimal('0'), student_total_fee - student_paid)
+    for balance in balances:
+        student = balance.student
+        student.total_fee = float(balance.total_fee)
+        student.paid_amount = float(balance.total_paid)
+        student.pending_amount = float(balance.pending_amount)
+        student.payment_status = 'pending'
+        student.roll_number = student.reg_number
+        student.last_payment_date = balance.last_payment_date
         
-        # Only include students with pending fees
-        if student_pending > 0:
-            student.total_fee = float(student_total_fee)
-            student.paid_amount = float(student_paid)
-            student.pending_amount = float(student_pending)
-            student.payment_status = 'pending'
-            student.roll_number = student.reg_number
-            
-            students_with_pending.append(student)
-            total_pending_amount += student_pending
+        students_with_pending.append(student)
+        total_pending_amount += balance.pending_amount
     
     context = {
         'students': students_with_pending,
@@ -2299,8 +1847,7 @@ def create_exam(request):
             exam_date_nepali = ''
             if exam_date:
                 try:
-                    nepali_date_dict = NepaliCalendar.english_to_nepali_date(exam_date)
-                    exam_date_nepali = NepaliCalendar.format_nepali_date(nepali_date_dict, 'full_en')
+                    exam_date_nepali = NepaliCalendar.format_english_date(exam_date, 'full_en')
                 except:
                     pass
             
@@ -2385,45 +1932,26 @@ def enter_marks(request):
             
             # Handle bulk marks entry
             if 'bulk_marks' in data:
-                bulk_marks = data['bulk_marks']
-                created_count = 0
-                
-                for mark_data in bulk_marks:
-                    exam = get_object_or_404(Exam, id=mark_data['exam_id'])
-                    student = get_object_or_404(Student, id=mark_data['student_id'])
-                    subject = get_object_or_404(Subject, id=mark_data['subject_id'])
-                    
-                    marksheet, created = Marksheet.objects.update_or_create(
-                        student=student,
-                        exam=exam,
-                        subject=subject,
-                        defaults={
-                            'marks_obtained': mark_data['marks_obtained'],
-                            'remarks': mark_data.get('remarks', '')
-                        }
-                    )
-                    created_count += 1
+                saved_count, errors = Marksheet.bulk_upsert(data['bulk_marks'])
+                if errors:
+                    return JsonResponse({
+                        'success': False,
+                        'error': f'{len(errors)} marks are invalid, nothing was saved',
+                        'errors': errors
+                    })
                 
                 return JsonResponse({
                     'success': True,
-                    'message': f'Successfully saved marks for {created_count} students'
+                    'message': f'Successfully saved marks for {saved_count} students'
                 })
             
-            # Handle single mark entry
+            # Handle single mark entry, validated and ranked like the bulk grid
             else:
-                exam = get_object_or_404(Exam, id=data['exam_id'])
-                student = get_object_or_404(Student, id=data['student_id'])
-                subject = get_object_or_404(Subject, id=data['subject_id'])
-                
-                marksheet, created = Marksheet.objects.update_or_create(
-                    student=student,
-                    exam=exam,
-                    subject=subject,
-                    defaults={
-                        'marks_obtained': data['marks_obtained'],
-                        'remarks': data.get('remarks', '')
-                    }
-                )
+                saved_count, errors = Marksheet.bulk_upsert([data])
+                if errors:
+                    return JsonResponse({'success': False, 'error': errors[0], 'errors': errors})
+                marksheet = Marksheet.objects.select_related('subject').get(
+                    student_id=data['student_id'], exam_id=data['exam_id'], subject_id=data['subject_id'])
                 
                 return JsonResponse({
                     'success': True,
@@ -2483,23 +2011,8 @@ def student_marksheet(request, student_id, exam_id):
             obtained_marks = sum(int(m.marks_obtained) for m in marksheets if m.marks_obtained is not None)
             percentage = (obtained_marks / total_marks * 100) if total_marks > 0 else 0
             
-            # Overall grade
-            if percentage >= 90:
-                overall_grade = 'A+'
-            elif percentage >= 80:
-                overall_grade = 'A'
-            elif percentage >= 70:
-                overall_grade = 'B+'
-            elif percentage >= 60:
-                overall_grade = 'B'
-            elif percentage >= 50:
-                overall_grade = 'C+'
-            elif percentage >= 40:
-                overall_grade = 'C'
-            elif percentage >= 35:
-                overall_grade = 'D'
-            else:
-                overall_grade = 'F'
+            # Overall grade from the grading scale
+            overall_grade = grade_for(percentage).grade
             
             # Overall status
             failed_subjects = marksheets.filter(
@@ -2847,22 +2360,13 @@ def save_marksheet_api(request):
             data = json.loads(request.body)
             marks_data = data.get('marks', [])
             
-            saved_count = 0
-            for mark_data in marks_data:
-                student = get_object_or_404(Student, id=mark_data['student_id'])
-                exam = get_object_or_404(Exam, id=mark_data['exam_id'])
-                subject = get_object_or_404(Subject, id=mark_data['subject_id'])
-                
-                marksheet, created = Marksheet.objects.update_or_create(
-                    student=student,
-                    exam=exam,
-                    subject=subject,
-                    defaults={
-                        'marks_obtained': mark_data['marks_obtained'],
-                        'remarks': mark_data.get('remarks', '')
-                    }
-                )
-                saved_count += 1
+            saved_count, errors = Marksheet.bulk_upsert(marks_data)
+            if errors:
+                return JsonResponse({
+                    'success': False,
+                    'error': f'{len(errors)} marks are invalid, nothing was saved',
+                    'errors': errors
+                })
             
             return JsonResponse({
                 'success': True,
@@ -2873,6 +2377,41 @@ def save_marksheet_api(request):
     
     return JsonResponse({'success': False, 'error': 'Invalid request method'})
 
+def exam_ranking_api(request, exam_id):
+    """Merit list of an exam from the stored rankings (?section=A for one section)"""
+    try:
+        exam = get_object_or_404(Exam, id=exam_id)
+        ExamRanking.ensure_for_exams([exam.id])
+        
+        rankings = exam.rankings.select_related('student')
+        section = request.GET.get('section', '').strip()
+        if section:
+            rankings = rankings.filter(section=section).order_by('section_rank', 'student__name')
+        
+        return JsonResponse({
+            'success': True,
+            'exam': {'id': exam.id, 'name': exam.name, 'class_name': exam.class_name, 'session': exam.session},
+            'section': section,
+            'rankings': [{
+                'student_id': ranking.student_id,
+                'name': ranking.student.name,
+                'reg_number': ranking.student.reg_number,
+                'section': ranking.section,
+                'obtained_marks': ranking.obtained_marks,
+                'total_marks': ranking.total_marks,
+                'percentage': float(ranking.percentage),
+                'gpa': float(ranking.gpa),
+                'failed_subjects': ranking.failed_subjects,
+                'status': ranking.overall_status,
+                'class_rank': ranking.class_rank,
+                'section_rank': ranking.section_rank,
+                'class_size': ranking.class_size,
+                'section_size': ranking.section_size,
+            } for ranking in rankings]
+        })
+    except Exception as e:
+        return JsonResponse({'success': False, 'error': str(e)})
+
 @csrf_exempt
 def auto_populate_exam_marks(request, exam_id):
     """API to auto-populate marks for a specific exam"""
@@ -2884,32 +2423,27 @@ def auto_populate_exam_marks(request, exam_id):
             students = Student.objects.filter(student_class=exam.class_name)
             subjects = Subject.objects.filter(class_name=exam.class_name)
             
-            total_records = 0
+            # Students/subjects that already have non-zero marks for this exam are left alone
+            filled = set(
+                Marksheet.objects.filter(exam=exam).exclude(marks_obtained=0)
+                .values_list('student_id', 'subject_id')
+            )
             
+            records = []
             for student in students:
                 for subject in subjects:
-                    # Check if marksheet already exists with marks
-                    existing = Marksheet.objects.filter(
-                        student=student, exam=exam, subject=subject
-                    ).first()
-                    
-                    if not existing or not existing.marks_obtained:
+                    if (student.id, subject.id) not in filled:
                         # Generate random marks (35-95% of max marks)
                         min_marks = max(35, int(subject.max_marks * 0.35))
                         max_marks = int(subject.max_marks * 0.95)
-                        random_marks = random.randint(min_marks, max_marks)
-                        
-                        # Create or update marksheet
-                        Marksheet.objects.update_or_create(
-                            student=student,
-                            exam=exam,
-                            subject=subject,
-                            defaults={
-                                'marks_obtained': random_marks,
-                                'remarks': 'Auto-filled'
-                            }
-                        )
-                        total_records += 1
+                        records.append({
+                            'exam_id': exam.id, 'student_id': student.id, 'subject_id': subject.id,
+                            'marks_obtained': random.randint(min_marks, max_marks), 'remarks': 'Auto-filled'
+                        })
+            
+            total_records, errors = Marksheet.bulk_upsert(records)
+            if errors:
+                return JsonResponse({'success': False, 'error': '; '.join(errors[:5]), 'errors': errors})
             
             return JsonResponse({
                 'success': True,
@@ -3024,33 +2558,28 @@ def populate_all_marksheet_data(request):
             if not exams.exists():
                 return JsonResponse({'success': False, 'error': 'No exams found'})
             
-            total_records = 0
+            subjects_by_class = {}
+            for subject in subjects:
+                subjects_by_class.setdefault(subject.class_name, []).append(subject)
+            exams_by_class = {}
+            for exam in exams:
+                exams_by_class.setdefault(exam.class_name, []).append(exam)
             
+            records = []
             for student in students:
-                # Get subjects for student's class
-                student_subjects = subjects.filter(class_name=student.student_class)
-                
-                # Get exams for student's class
-                student_exams = exams.filter(class_name=student.student_class)
-                
-                for exam in student_exams:
-                    for subject in student_subjects:
+                for exam in exams_by_class.get(student.student_class, []):
+                    for subject in subjects_by_class.get(student.student_class, []):
                         # Generate random marks (60-95% of max marks for realistic data)
                         min_marks = int(subject.max_marks * 0.6)
                         max_marks = int(subject.max_marks * 0.95)
-                        random_marks = random.randint(min_marks, max_marks)
-                        
-                        # Create or update marksheet
-                        marksheet, created = Marksheet.objects.update_or_create(
-                            student=student,
-                            exam=exam,
-                            subject=subject,
-                            defaults={
-                                'marks_obtained': random_marks,
-                                'remarks': 'Auto-generated'
-                            }
-                        )
-                        total_records += 1
+                        records.append({
+                            'exam_id': exam.id, 'student_id': student.id, 'subject_id': subject.id,
+                            'marks_obtained': random.randint(min_marks, max_marks), 'remarks': 'Auto-generated'
+                        })
+            
+            total_records, errors = Marksheet.bulk_upsert(records)
+            if errors:
+                return JsonResponse({'success': False, 'error': '; '.join(errors[:5]), 'errors': errors})
             
             return JsonResponse({
                 'success': True,
@@ -3069,50 +2598,7 @@ def generate_class_marksheets(request, exam_id):
     exam = get_object_or_404(Exam, id=exam_id)
     students = Student.objects.filter(student_class=exam.class_name).order_by('name')
     
-    marksheets_data = []
-    for student in students:
-        marksheets = Marksheet.objects.filter(student=student, exam=exam)
-        
-        if marksheets.exists():
-            # Calculate totals
-            total_marks = sum(m.subject.max_marks for m in marksheets)
-            obtained_marks = sum(m.marks_obtained for m in marksheets)
-            percentage = (obtained_marks / total_marks * 100) if total_marks > 0 else 0
-            
-            # Overall grade
-            if percentage >= 90:
-                overall_grade = 'A+'
-            elif percentage >= 80:
-                overall_grade = 'A'
-            elif percentage >= 70:
-                overall_grade = 'B+'
-            elif percentage >= 60:
-                overall_grade = 'B'
-            elif percentage >= 50:
-                overall_grade = 'C+'
-            elif percentage >= 40:
-                overall_grade = 'C'
-            elif percentage >= 30:
-                overall_grade = 'D+'
-            elif percentage >= 20:
-                overall_grade = 'D'
-            else:
-                overall_grade = 'E'
-            
-            # Overall status
-            failed_subjects = marksheets.filter(marks_obtained__lt=models.F('subject__pass_marks')).count()
-            overall_status = 'Pass' if failed_subjects == 0 else 'Fail'
-            
-            marksheets_data.append({
-                'student': student,
-                'marksheets': marksheets,
-                'total_marks': total_marks,
-                'obtained_marks': obtained_marks,
-                'percentage': round(percentage, 2),
-                'overall_grade': overall_grade,
-                'overall_status': overall_status,
-                'failed_subjects': failed_subjects
-            })
+    marksheets_data = ExamResults(exam, students)
     
     context = {
         'exam': exam,
@@ -3157,23 +2643,8 @@ def generate_student_result(request, student_id):
             obtained_marks = sum(m.marks_obtained for m in exam_marksheets)
             percentage = (obtained_marks / total_marks * 100) if total_marks > 0 else 0
             
-            # Calculate grade
-            if percentage >= 90:
-                grade = 'A+'
-            elif percentage >= 80:
-                grade = 'A'
-            elif percentage >= 70:
-                grade = 'B+'
-            elif percentage >= 60:
-                grade = 'B'
-            elif percentage >= 50:
-                grade = 'C+'
-            elif percentage >= 40:
-                grade = 'C'
-            elif percentage >= 35:
-                grade = 'D'
-            else:
-                grade = 'F'
+            # Overall grade from the grading scale
+            grade = grade_for(percentage).grade
             
             # Check pass/fail
             failed_subjects = exam_marksheets.filter(marks_obtained__lt=models.F('subject__pass_marks')).count()
@@ -3438,104 +2909,35 @@ def generate_class_marksheets_new_tab(request, exam_id):
     if not students.exists():
         students = Student.objects.all().order_by('name')[:10]  # Get first 10 students for demo
     
-    # Calculate total school days and attendance for the session
+    # Term attendance: from the session start up to the exam (or today), from the monthly rollups
     current_session = Session.get_current_session()
+    term_start = term_end = None
     if current_session:
-        # Calculate total school days from session start to today or session end
-        from datetime import timedelta
-        today = date.today()
-        session_start = current_session.start_date
-        session_end = min(current_session.end_date, today)
-        
-        # Calculate total school days up to exam date
         exam_date = exam.exam_date if exam.exam_date else date.today()
-        session_end_for_exam = min(exam_date, session_end)
-        total_days = SchoolAttendance.objects.values('date').distinct().count()
-    else:
-        total_days = SchoolAttendance.objects.values('date').distinct().count()
+        term_start = current_session.start_date
+        term_end = min(current_session.end_date, date.today(), exam_date)
+    # Days the school calendar has the school open, or the days attendance was taken when there is no session
+    total_days = count_school_days(term_start, term_end) if current_session else school_days()
+    
+    results = ExamResults(exam, students)
+    attendance_counts = attendance_totals([result.student.pk for result in results], term_start, term_end)
     
     marksheets_data = []
-    for student in students:
-        marksheets = Marksheet.objects.filter(student=student, exam=exam)
-        
-        # Get actual attendance data from SchoolAttendance model
-        student_present_days = SchoolAttendance.objects.filter(
-            student=student, status='present'
-        ).count()
-        
-        student_late_days = SchoolAttendance.objects.filter(
-            student=student, status='late'
-        ).count()
-        
-        student_absent_days = SchoolAttendance.objects.filter(
-            student=student, status='absent'
-        ).count()
-        
-        # Total attendance days = present + late (late is counted as attendance)
-        student_attendance_days = student_present_days + student_late_days
-        student_present_and_late_days = student_present_days + student_late_days
-        student_leave_days = 0  # No leave status in current model
-        
-        if marksheets.exists():
-            # Calculate totals
-            total_marks = sum(m.subject.max_marks for m in marksheets)
-            obtained_marks = sum(m.marks_obtained for m in marksheets)
-            percentage = (obtained_marks / total_marks * 100) if total_marks > 0 else 0
-            
-            # Overall grade and GPA
-            if percentage >= 90:
-                overall_grade = 'A+'
-                gpa = round(3.6 + (percentage - 90) * 0.4 / 10, 2)
-            elif percentage >= 80:
-                overall_grade = 'A'
-                gpa = round(3.2 + (percentage - 80) * 0.4 / 10, 2)
-            elif percentage >= 70:
-                overall_grade = 'B+'
-                gpa = round(2.8 + (percentage - 70) * 0.4 / 10, 2)
-            elif percentage >= 60:
-                overall_grade = 'B'
-                gpa = round(2.4 + (percentage - 60) * 0.4 / 10, 2)
-            elif percentage >= 50:
-                overall_grade = 'C+'
-                gpa = round(2.0 + (percentage - 50) * 0.4 / 10, 2)
-            elif percentage >= 40:
-                overall_grade = 'C'
-                gpa = round(1.6 + (percentage - 40) * 0.4 / 10, 2)
-            elif percentage >= 30:
-                overall_grade = 'D+'
-                gpa = round(1.2 + (percentage - 30) * 0.4 / 10, 2)
-            elif percentage >= 20:
-                overall_grade = 'D'
-                gpa = round(0.8 + (percentage - 20) * 0.4 / 10, 2)
-            else:
-                overall_grade = 'E'
-                gpa = round((percentage) * 0.8 / 20, 2)
-            
+    for result in results:
+        counts = attendance_counts.get(result.student.pk, {'present': 0, 'late': 0, 'absent': 0})
+        data = result.as_dict()
+        data.update({
             # Overall status - FAIL only for grades C, D+, D, and E
-            failed_subjects = marksheets.filter(marks_obtained__lt=models.F('subject__pass_marks')).count()
-            overall_status = 'FAIL' if overall_grade in ['C', 'D+', 'D', 'E'] else 'PASS'
-            
-            # Calculate total grade points (GPA)
-            total_grade_points = sum(m.grade_point for m in marksheets) / len(marksheets) if marksheets else 0
-            
-            marksheets_data.append({
-                'student': student,
-                'marksheets': marksheets,
-                'total_marks': total_marks,
-                'obtained_marks': obtained_marks,
-                'percentage': round(percentage, 2),
-                'overall_grade': overall_grade,
-                'overall_status': overall_status,
-                'failed_subjects': failed_subjects,
-                'total_grade_points': round(total_grade_points, 2),
-                'gpa': gpa,
-                'total_school_days': total_days,
-                'student_attendance_days': student_attendance_days,
-                'student_present_days': student_present_days,
-                'student_present_and_late_days': student_present_and_late_days,
-                'student_leave_days': student_leave_days,
-                'student_absent_days': student_absent_days
-            })
+            'overall_status': 'FAIL' if result.overall_grade in ['C', 'D+', 'D', 'E'] else 'PASS',
+            'total_school_days': total_days,
+            # Total attendance days = present + late (late is counted as attendance)
+            'student_attendance_days': counts['present'] + counts['late'],
+            'student_present_days': counts['present'],
+            'student_present_and_late_days': counts['present'] + counts['late'],
+            'student_leave_days': 0,  # No leave status in current model
+            'student_absent_days': counts['absent'],
+        })
+        marksheets_data.append(data)
     
     # Get current Nepali date using our NepaliCalendar class
     try:
@@ -3561,62 +2963,15 @@ def generate_class_marksheets_new_tab(request, exam_id):
     response['Pragma'] = 'no-cache'
     response['Expires'] = '0'
     
-    return response
-
-def generate_class_marksheets_see_style(request, exam_id):
-    """Generate SEE-style marksheets for all students in an exam"""
-    exam = get_object_or_404(Exam, id=exam_id)
-    school = SchoolDetail.get_current_school()
-    students = Student.objects.filter(student_class=exam.class_name).order_by('name')
-    
-    marksheets_data = []
-    for student in students:
-        marksheets = Marksheet.objects.filter(student=student, exam=exam)
-        
-        if marksheets.exists():
-            # Calculate totals
-            total_marks = sum(m.subject.max_marks for m in marksheets)
-            obtained_marks = sum(m.marks_obtained for m in marksheets)
-            percentage = (obtained_marks / total_marks * 100) if total_marks > 0 else 0
-            
-            # Overall grade
-            if percentage >= 90:
-                overall_grade = 'A+'
-            elif percentage >= 80:
-                overall_grade = 'A'
-            elif percentage >= 70:
-                overall_grade = 'B+'
-            elif percentage >= 60:
-                overall_grade = 'B'
-            elif percentage >= 50:
-                overall_grade = 'C+'
-            elif percentage >= 40:
-                overall_grade = 'C'
-            elif percentage >= 30:
-                overall_grade = 'D+'
-            elif percentage >= 20:
-                overall_grade = 'D'
-            else:
-                overall_grade = 'E'
-            
-            # Overall status
-            failed_subjects = marksheets.filter(marks_obtained__lt=models.F('subject__pass_marks')).count()
-            overall_status = 'Pass' if failed_subjects == 0 else 'Fail'
-            
-            # Calculate total grade points (GPA)
-            total_grade_points = sum(m.grade_point for m in marksheets) / len(marksheets) if marksheets else 0
-            
-            marksheets_data.append({
-                'student': student,
-                'marksheets': marksheets,
-                'total_marks': total_marks,
-                'obtained_marks': obtained_marks,
-                'percentage': round(percentage, 2),
-                'overall_grade': overall_grade,
-                'overall_status': overall_status,
-                'failed_subjects': failed_subjects,
-                'total_grade_points': round(total_grade_points, 2)
-            })
+    return response
+
+def generate_class_marksheets_see_style(request, exam_id):
+    """Generate SEE-style marksheets for all students in an exam"""
+    exam = get_object_or_404(Exam, id=exam_id)
+    school = SchoolDetail.get_current_school()
+    students = Student.objects.filter(student_class=exam.class_name).order_by('name')
+    
+    marksheets_data = ExamResults(exam, students)
     
     context = {
         'exam': exam,
@@ -3639,54 +2994,7 @@ def generate_class_marksheets_print_see_style(request, exam_id):
     school = SchoolDetail.get_current_school()
     students = Student.objects.filter(student_class=exam.class_name).order_by('name')
     
-    marksheets_data = []
-    for student in students:
-        marksheets = Marksheet.objects.filter(student=student, exam=exam)
-        
-        if marksheets.exists():
-            # Calculate totals
-            total_marks = sum(m.subject.max_marks for m in marksheets)
-            obtained_marks = sum(m.marks_obtained for m in marksheets)
-            percentage = (obtained_marks / total_marks * 100) if total_marks > 0 else 0
-            
-            # Overall grade
-            if percentage >= 90:
-                overall_grade = 'A+'
-            elif percentage >= 80:
-                overall_grade = 'A'
-            elif percentage >= 70:
-                overall_grade = 'B+'
-            elif percentage >= 60:
-                overall_grade = 'B'
-            elif percentage >= 50:
-                overall_grade = 'C+'
-            elif percentage >= 40:
-                overall_grade = 'C'
-            elif percentage >= 30:
-                overall_grade = 'D+'
-            elif percentage >= 20:
-                overall_grade = 'D'
-            else:
-                overall_grade = 'E'
-            
-            # Overall status
-            failed_subjects = marksheets.filter(marks_obtained__lt=models.F('subject__pass_marks')).count()
-            overall_status = 'Pass' if failed_subjects == 0 else 'Fail'
-            
-            # Calculate total grade points (GPA)
-            total_grade_points = sum(m.grade_point for m in marksheets) / len(marksheets) if marksheets else 0
-            
-            marksheets_data.append({
-                'student': student,
-                'marksheets': marksheets,
-                'total_marks': total_marks,
-                'obtained_marks': obtained_marks,
-                'percentage': round(percentage, 2),
-                'overall_grade': overall_grade,
-                'overall_status': overall_status,
-                'failed_subjects': failed_subjects,
-                'total_grade_points': round(total_grade_points, 2)
-            })
+    marksheets_data = ExamResults(exam, students)
     
     context = {
         'exam': exam,
@@ -3708,54 +3016,7 @@ def generate_sarathi_pathshala_marksheets(request, exam_id):
     exam = get_object_or_404(Exam, id=exam_id)
     students = Student.objects.filter(student_class=exam.class_name).order_by('name')
     
-    marksheets_data = []
-    for student in students:
-        marksheets = Marksheet.objects.filter(student=student, exam=exam)
-        
-        if marksheets.exists():
-            # Calculate totals
-            total_marks = sum(m.subject.max_marks for m in marksheets)
-            obtained_marks = sum(m.marks_obtained for m in marksheets)
-            percentage = (obtained_marks / total_marks * 100) if total_marks > 0 else 0
-            
-            # Overall grade
-            if percentage >= 90:
-                overall_grade = 'A+'
-            elif percentage >= 80:
-                overall_grade = 'A'
-            elif percentage >= 70:
-                overall_grade = 'B+'
-            elif percentage >= 60:
-                overall_grade = 'B'
-            elif percentage >= 50:
-                overall_grade = 'C+'
-            elif percentage >= 40:
-                overall_grade = 'C'
-            elif percentage >= 30:
-                overall_grade = 'D+'
-            elif percentage >= 20:
-                overall_grade = 'D'
-            else:
-                overall_grade = 'E'
-            
-            # Overall status
-            failed_subjects = marksheets.filter(marks_obtained__lt=models.F('subject__pass_marks')).count()
-            overall_status = 'Pass' if failed_subjects == 0 else 'Fail'
-            
-            # Calculate total grade points (GPA)
-            total_grade_points = sum(m.grade_point for m in marksheets) / len(marksheets) if marksheets else 0
-            
-            marksheets_data.append({
-                'student': student,
-                'marksheets': marksheets,
-                'total_marks': total_marks,
-                'obtained_marks': obtained_marks,
-                'percentage': round(percentage, 2),
-                'overall_grade': overall_grade,
-                'overall_status': overall_status,
-                'failed_subjects': failed_subjects,
-                'total_grade_points': round(total_grade_points, 2)
-            })
+    marksheets_data = ExamResults(exam, students)
     
     context = {
         'exam': exam,
@@ -3776,54 +3037,7 @@ def generate_sarathi_pathshala_see_marksheets(request, exam_id):
     exam = get_object_or_404(Exam, id=exam_id)
     students = Student.objects.filter(student_class=exam.class_name).order_by('name')
     
-    marksheets_data = []
-    for student in students:
-        marksheets = Marksheet.objects.filter(student=student, exam=exam)
-        
-        if marksheets.exists():
-            # Calculate totals
-            total_marks = sum(m.subject.max_marks for m in marksheets)
-            obtained_marks = sum(m.marks_obtained for m in marksheets)
-            percentage = (obtained_marks / total_marks * 100) if total_marks > 0 else 0
-            
-            # Overall grade
-            if percentage >= 90:
-                overall_grade = 'A+'
-            elif percentage >= 80:
-                overall_grade = 'A'
-            elif percentage >= 70:
-                overall_grade = 'B+'
-            elif percentage >= 60:
-                overall_grade = 'B'
-            elif percentage >= 50:
-                overall_grade = 'C+'
-            elif percentage >= 40:
-                overall_grade = 'C'
-            elif percentage >= 30:
-                overall_grade = 'D+'
-            elif percentage >= 20:
-                overall_grade = 'D'
-            else:
-                overall_grade = 'E'
-            
-            # Overall status
-            failed_subjects = marksheets.filter(marks_obtained__lt=models.F('subject__pass_marks')).count()
-            overall_status = 'Pass' if failed_subjects == 0 else 'Fail'
-            
-            # Calculate total grade points (GPA)
-            total_grade_points = sum(m.grade_point for m in marksheets) / len(marksheets) if marksheets else 0
-            
-            marksheets_data.append({
-                'student': student,
-                'marksheets': marksheets,
-                'total_marks': total_marks,
-                'obtained_marks': obtained_marks,
-                'percentage': round(percentage, 2),
-                'overall_grade': overall_grade,
-                'overall_status': overall_status,
-                'failed_subjects': failed_subjects,
-                'total_grade_points': round(total_grade_points, 2)
-            })
+    marksheets_data = ExamResults(exam, students)
     
     context = {
         'exam': exam,
@@ -3904,45 +3118,7 @@ def populate_grade_sheet_certificate(request):
     
     students = Student.objects.filter(student_class=exam.class_name).order_by('name')
     
-    marksheets_data = []
-    for student in students:
-        marksheets = Marksheet.objects.filter(student=student, exam=exam)
-        
-        if marksheets.exists():
-            # Calculate totals
-            total_marks = sum(m.subject.max_marks for m in marksheets)
-            obtained_marks = sum(m.marks_obtained for m in marksheets)
-            percentage = (obtained_marks / total_marks * 100) if total_marks > 0 else 0
-            
-            # Overall grade
-            if percentage >= 90: overall_grade = 'A+'
-            elif percentage >= 80: overall_grade = 'A'
-            elif percentage >= 70: overall_grade = 'B+'
-            elif percentage >= 60: overall_grade = 'B'
-            elif percentage >= 50: overall_grade = 'C+'
-            elif percentage >= 40: overall_grade = 'C'
-            elif percentage >= 30: overall_grade = 'D+'
-            elif percentage >= 20: overall_grade = 'D'
-            else: overall_grade = 'E'
-            
-            # Overall status
-            failed_subjects = marksheets.filter(marks_obtained__lt=models.F('subject__pass_marks')).count()
-            overall_status = 'Pass' if failed_subjects == 0 else 'Fail'
-            
-            # Calculate total grade points (GPA)
-            total_grade_points = sum(m.grade_point for m in marksheets) / len(marksheets) if marksheets else 0
-            
-            marksheets_data.append({
-                'student': student,
-                'marksheets': marksheets,
-                'total_marks': total_marks,
-                'obtained_marks': obtained_marks,
-                'percentage': round(percentage, 2),
-                'overall_grade': overall_grade,
-                'overall_status': overall_status,
-                'failed_subjects': failed_subjects,
-                'total_grade_points': round(total_grade_points, 2)
-            })
+    marksheets_data = ExamResults(exam, students)
     
     context = {
         'exam': exam,
@@ -3963,10 +3139,12 @@ def student_attendance_dashboard(request):
     # Check if selected date is a holiday or Saturday
     from datetime import datetime
     selected_date_obj = datetime.strptime(selected_date, '%Y-%m-%d').date()
-    selected_event = CalendarEvent.objects.filter(event_date=selected_date_obj, is_active=True, event_type__in=['holiday', 'festival']).first()
-    is_holiday = bool(selected_event)
-    is_saturday = selected_date_obj.weekday() == 5  # Saturday is 5 in Python's weekday()
-    can_mark_attendance = not (is_holiday or is_saturday)
+    school_calendar = get_school_calendar()
+    can_mark_attendance = school_calendar.is_school_day(selected_date_obj)
+    selected_event = school_calendar.holiday(selected_date_obj)
+    # A school-day event opens a holiday or Saturday, and then no notice is shown
+    is_holiday = bool(selected_event) and not can_mark_attendance
+    is_saturday = selected_date_obj.weekday() == 5 and not can_mark_attendance
     
     # Get unique classes and sections
     classes = Student.objects.values_list('student_class', flat=True).distinct().order_by('student_class')
@@ -4017,7 +3195,7 @@ def student_attendance_dashboard(request):
     late_count = sum(1 for s in students_with_attendance if s['attendance']['status'] == 'late')
     
     # Total days attendance was recorded
-    total_school_days = SchoolAttendance.objects.values('date').distinct().count()
+    total_school_days = school_days()
     
     context = {
         'students_with_attendance': students_with_attendance,
@@ -4444,27 +3622,16 @@ def get_nepali_calendar_events_api(request):
         nepali_year = int(request.GET.get('year', 2081))
         nepali_month = int(request.GET.get('month', 1))
         
-        # Convert Nepali date range to English dates (approximate)
-        english_year = nepali_year - 56
-        english_month = nepali_month - 8
-        
-        if english_month <= 0:
-            english_month += 12
-            english_year -= 1
-        
-        # Get events for the approximate English month
+        # The English dates this Nepali month spans
+        first_day, last_day = month_bounds(nepali_year, nepali_month)
         events = CalendarEvent.objects.filter(
-            event_date__year=english_year,
-            event_date__month=english_month,
+            event_date__range=(first_day, last_day),
             is_active=True
-        )
+        ).select_related('school')
         
         events_data = []
         for event in events:
-            # Convert English date to approximate Nepali date
-            nepali_day = event.event_date.day + 15
-            if nepali_day > 30:
-                nepali_day -= 30
+            nepali_day = (event.event_date - first_day).days + 1
             
             events_data.append({
                 'id': event.id,
@@ -4532,24 +3699,16 @@ def bulk_save_attendance(request):
             attendance_records = data['attendance_records']
             marked_by = request.session.get('admin_username', 'System')
             
-            saved_count = 0
-            for record in attendance_records:
-                student = get_object_or_404(Student, id=record['student_id'])
-                
-                SchoolAttendance.objects.update_or_create(
-                    student=student,
-                    date=attendance_date,
-                    defaults={
-                        'status': record['status'],
-                        'remarks': record.get('remarks', ''),
-                        'marked_by': marked_by
-                    }
-                )
-                saved_count += 1
+            results = SchoolAttendance.bulk_upsert(attendance_date, attendance_records, marked_by)
+            created_count = sum(1 for outcome in results.values() if outcome == 'created')
+            updated_count = len(results) - created_count
             
             return JsonResponse({
                 'success': True,
-                'message': f'Attendance saved for {saved_count} students'
+                'message': f'Attendance saved for {len(results)} students',
+                'created_count': created_count,
+                'updated_count': updated_count,
+                'results': {str(student_id): outcome for student_id, outcome in results.items()}
             })
         except Exception as e:
             return JsonResponse({'success': False, 'error': str(e)})
@@ -4673,126 +3832,6 @@ def get_attendance_api(request):
     except Exception as e:
         return JsonResponse({'success': False, 'error': str(e)})
 
-def get_attendance_summary(request, student_id):
-    """Get detailed attendance summary for a student"""
-    try:
-        student = get_object_or_404(Student, id=student_id)
-        
-        # Get date range from request or default to current month
-        start_date = request.GET.get('start_date')
-        end_date = request.GET.get('end_date')
-        
-        if start_date:
-            start_date = datetime.strptime(start_date, '%Y-%m-%d').date()
-        if end_date:
-            end_date = datetime.strptime(end_date, '%Y-%m-%d').date()
-        
-        attendance_records = SchoolAttendance.objects.filter(student=student)
-        if start_date:
-            attendance_records = attendance_records.filter(date__gte=start_date)
-        if end_date:
-            attendance_records = attendance_records.filter(date__lte=end_date)
-        
-        total = attendance_records.count()
-        present = attendance_records.filter(status='present').count()
-        absent = attendance_records.filter(status='absent').count()
-        late = attendance_records.filter(status='late').count()
-        summary = {
-            'total': total,
-            'present': present,
-            'absent': absent,
-            'late': late,
-            'attendance_percentage': (present / total * 100) if total > 0 else 0
-        }
-        
-        # Get recent attendance records
-        recent_records = SchoolAttendance.objects.filter(
-            student=student
-        ).order_by('-date')[:10]
-        
-        recent_attendance = []
-        for record in recent_records:
-            recent_attendance.append({
-                'date': record.date.strftime('%Y-%m-%d'),
-                'date_nepali': record.date_nepali,
-                'status': record.status,
-                'remarks': record.remarks
-            })
-        
-        return JsonResponse({
-            'success': True,
-            'student': {
-                'id': student.id,
-                'name': student.name,
-                'class': student.student_class,
-                'section': student.section,
-                'reg_number': student.reg_number
-            },
-            'summary': summary,
-            'recent_attendance': recent_attendance
-        })
-    except Exception as e:
-        return JsonResponse({'success': False, 'error': str(e)})
-
-def attendance_report(request):
-    """Generate comprehensive attendance reports"""
-    from datetime import timedelta
-    
-    # Get filter parameters
-    start_date = request.GET.get('start_date', (date.today() - timedelta(days=30)).strftime('%Y-%m-%d'))
-    end_date = request.GET.get('end_date', date.today().strftime('%Y-%m-%d'))
-    selected_class = request.GET.get('class', '')
-    selected_section = request.GET.get('section', '')
-    
-    # Filter students
-    students_query = Student.objects.all()
-    if selected_class:
-        students_query = students_query.filter(student_class=selected_class)
-    if selected_section:
-        students_query = students_query.filter(section=selected_section)
-    
-    students = students_query.order_by('name')
-    
-    # Get attendance data for each student
-    students_with_attendance = []
-    for student in students:
-        attendance_records = SchoolAttendance.objects.filter(
-            student=student,
-            date__range=[datetime.strptime(start_date, '%Y-%m-%d').date(), datetime.strptime(end_date, '%Y-%m-%d').date()]
-        )
-        total = attendance_records.count()
-        present = attendance_records.filter(status='present').count()
-        absent = attendance_records.filter(status='absent').count()
-        late = attendance_records.filter(status='late').count()
-        summary = {
-            'total': total,
-            'present': present,
-            'absent': absent,
-            'late': late,
-            'attendance_percentage': (present / total * 100) if total > 0 else 0
-        }
-        
-        students_with_attendance.append({
-            'student': student,
-            'summary': summary
-        })
-    
-    # Get unique classes and sections for filters
-    classes = Student.objects.values_list('student_class', flat=True).distinct().order_by('student_class')
-    sections = Student.objects.values_list('section', flat=True).distinct().order_by('section')
-    
-    context = {
-        'students_with_attendance': students_with_attendance,
-        'classes': classes,
-        'sections': sections,
-        'start_date': start_date,
-        'end_date': end_date,
-        'selected_class': selected_class,
-        'selected_section': selected_section
-    }
-    
-    return render(request, 'attendance_report.html', context)
-
 def school_settings_test(request):
     """Test view to debug template loading"""
     try:
@@ -5121,6 +4160,7 @@ def website_settings(request):
         elif action == 'delete_hero':
             hero_id = request.POST.get('hero_id')
             HeroSlider.objects.filter(id=hero_id).delete()
+            bump_content_version()
             messages.success(request, 'Hero image deleted successfully!')
         
         elif action == 'add_blog':
@@ -5144,10 +4184,12 @@ def website_settings(request):
         elif action == 'delete_blog':
             blog_id = request.POST.get('blog_id')
             Blog.objects.filter(id=blog_id).delete()
+            bump_content_version()
             messages.success(request, 'Blog post deleted successfully!')
         
         elif action == 'add_welcome':
             WelcomeSection.objects.update(is_active=False)
+            bump_content_version()
             welcome_data = {
                 'title': request.POST.get('welcome_title'),
                 'content': request.POST.get('welcome_content'),
@@ -5171,6 +4213,7 @@ def website_settings(request):
         elif action == 'delete_welcome':
             welcome_id = request.POST.get('welcome_id')
             WelcomeSection.objects.filter(id=welcome_id).delete()
+            bump_content_version()
             messages.success(request, 'Welcome section deleted successfully!')
         
         return redirect('website_settings')
@@ -5325,27 +4368,7 @@ def fee_payment_report_dashboard(request):
     total_payments = FeePayment.objects.count()
     
     # Calculate pending fees
-    total_pending = 0
-    for student in Student.objects.all():
-        try:
-            fee_structure = FeeStructure.objects.get(class_name=student.student_class)
-            student_total_fee = (
-                fee_structure.admission_fee +
-                fee_structure.monthly_fee * 12 +
-                fee_structure.tuition_fee * 12 +
-                fee_structure.examination_fee +
-                fee_structure.library_fee +
-                fee_structure.sports_fee +
-                fee_structure.laboratory_fee +
-                fee_structure.computer_fee +
-                fee_structure.transportation_fee * 12
-            )
-        except FeeStructure.DoesNotExist:
-            student_total_fee = 60000
-        
-        student_paid = FeePayment.objects.filter(student=student).aggregate(total=Sum('payment_amount'))['total'] or 0
-        student_pending = max(0, student_total_fee - student_paid)
-        total_pending += student_pending
+    total_pending = StudentFeeBalance.objects.aggregate(total=Sum('pending_amount'))['total'] or 0
     
     # Get recent payments
     recent_payments = FeePayment.objects.select_related('student').order_by('-payment_date')[:10]
@@ -6045,82 +5068,6 @@ def load_attendance(request):
     except Exception as e:
         return JsonResponse({'success': False, 'error': str(e)})
 
-def get_attendance_summary(request, student_id):
-    """API to get attendance summary for a student"""
-    try:
-        student = get_object_or_404(Student, id=student_id)
-        
-        # Get date range from request or default to current month
-        start_date = request.GET.get('start_date')
-        end_date = request.GET.get('end_date')
-        
-        if start_date:
-            start_date = datetime.strptime(start_date, '%Y-%m-%d').date()
-        if end_date:
-            end_date = datetime.strptime(end_date, '%Y-%m-%d').date()
-        
-        summary = StudentAttendance.get_student_attendance_summary(
-            student, start_date, end_date
-        )
-        
-        return JsonResponse({
-            'success': True,
-            'student': {
-                'id': student.id,
-                'name': student.name,
-                'class': student.student_class,
-                'section': student.section
-            },
-            'summary': summary
-        })
-        
-    except Exception as e:
-        return JsonResponse({'success': False, 'error': str(e)})
-
-def attendance_report(request):
-    """Attendance report page showing today's attendance data"""
-    today = date.today()
-    
-    # Get today's attendance data
-    attendance_records = StudentAttendance.objects.filter(date=today).select_related('student')
-    
-    # Get all students for comparison
-    all_students = Student.objects.all().order_by('student_class', 'name')
-    
-    # Create attendance data with status
-    students_data = []
-    for student in all_students:
-        try:
-            attendance = attendance_records.get(student=student)
-            status = attendance.status
-        except StudentAttendance.DoesNotExist:
-            status = 'not_marked'
-        
-        students_data.append({
-            'student': student,
-            'status': status
-        })
-    
-    # Calculate statistics
-    total_students = all_students.count()
-    total_present = attendance_records.filter(status='present').count()
-    total_absent = attendance_records.filter(status='absent').count()
-    total_late = attendance_records.filter(status='late').count()
-    not_marked = total_students - attendance_records.count()
-    attendance_percentage = round((total_present / total_students * 100) if total_students > 0 else 0, 1)
-    
-    context = {
-        'students_data': students_data,
-        'today': today,
-        'total_students': total_students,
-        'total_present': total_present,
-        'total_absent': total_absent,
-        'total_late': total_late,
-        'not_marked': not_marked,
-        'attendance_percentage': attendance_percentage
-    }
-    
-    return render(request, 'attendance_report.html', context)
 def api_subjects_by_class(request, class_name):
     """API to get subjects by class for teacher edit"""
     try:
@@ -6189,71 +5136,6 @@ def load_attendance(request):
     except Exception as e:
         return JsonResponse({'success': False, 'error': str(e)})
 
-def get_attendance_summary(request, student_id):
-    """Get attendance summary for a student"""
-    try:
-        student = get_object_or_404(Student, id=student_id)
-        
-        # Get attendance records for current month
-        today = date.today()
-        start_date = today.replace(day=1)
-        
-        attendance_records = StudentAttendance.objects.filter(
-            student=student,
-            date__range=[start_date, today]
-        )
-        
-        present_count = attendance_records.filter(status='present').count()
-        absent_count = attendance_records.filter(status='absent').count()
-        late_count = attendance_records.filter(status='late').count()
-        
-        return JsonResponse({
-            'success': True,
-            'student_name': student.name,
-            'present': present_count,
-            'absent': absent_count,
-            'late': late_count,
-            'total_days': attendance_records.count()
-        })
-    except Exception as e:
-        return JsonResponse({'success': False, 'error': str(e)})
-
-def attendance_report(request):
-    """Attendance report view"""
-    students = Student.objects.all().order_by('name')
-    today = date.today()
-    
-    # Get attendance statistics for each student
-    students_with_attendance = []
-    for student in students:
-        attendance_records = StudentAttendance.objects.filter(
-            student=student,
-            date__month=today.month,
-            date__year=today.year
-        )
-        
-        present_count = attendance_records.filter(status='present').count()
-        absent_count = attendance_records.filter(status='absent').count()
-        late_count = attendance_records.filter(status='late').count()
-        total_days = attendance_records.count()
-        
-        attendance_percentage = (present_count / total_days * 100) if total_days > 0 else 0
-        
-        student.present_days = present_count
-        student.absent_days = absent_count
-        student.late_days = late_count
-        student.total_days = total_days
-        student.attendance_percentage = round(attendance_percentage, 1)
-        
-        students_with_attendance.append(student)
-    
-    context = {
-        'students': students_with_attendance,
-        'current_month': today.strftime('%B %Y')
-    }
-    
-    return render(request, 'attendance_report.html', context)
-
 # Missing views for contact and blog functionality
 def contact(request):
     """Contact page view"""
@@ -6528,12 +5410,14 @@ def contact(request):
     
     return render(request, 'contact.html')
 
+@cache_public_page
 def blog_list(request):
     """Blog list page"""
     from .models import Blog
     blogs = Blog.objects.all().order_by('-created_at')
     return render(request, 'blog_list.html', {'blogs': blogs})
 
+@cache_public_page
 def blog_detail(request, blog_id):
     """Blog detail page"""
     from .models import Blog
@@ -6610,23 +5494,13 @@ def get_attendance_summary(request, student_id):
     try:
         student = get_object_or_404(Student, id=student_id)
         
-        # Get attendance records for current month
-        from datetime import datetime, timedelta
+        # Attendance for the current month
         today = date.today()
         month_start = today.replace(day=1)
-        
-        attendance_records = StudentAttendance.objects.filter(
-            student=student,
-            date__range=[month_start, today]
-        )
-        
-        present_count = attendance_records.filter(status='present').count()
-        absent_count = attendance_records.filter(status='absent').count()
-        late_count = attendance_records.filter(status='late').count()
-        leave_count = attendance_records.filter(status='leave').count()
+        summary = SchoolAttendance.get_attendance_summary(student, month_start, today)
         
         total_days = (today - month_start).days + 1
-        attendance_percentage = (present_count / total_days * 100) if total_days > 0 else 0
+        attendance_percentage = (summary['present'] / total_days * 100) if total_days > 0 else 0
         
         return JsonResponse({
             'success': True,
@@ -6637,10 +5511,9 @@ def get_attendance_summary(request, student_id):
                 'section': student.section
             },
             'summary': {
-                'present': present_count,
-                'absent': absent_count,
-                'late': late_count,
-                'leave': leave_count,
+                'present': summary['present'],
+                'absent': summary['absent'],
+                'late': summary['late'],
                 'total_days': total_days,
                 'attendance_percentage': round(attendance_percentage, 1)
             }
@@ -6649,57 +5522,50 @@ def get_attendance_summary(request, student_id):
         return JsonResponse({'success': False, 'error': str(e)})
 
 def attendance_report(request):
-    """Attendance report page"""
-    # Get filter parameters
-    class_filter = request.GET.get('class', '')
-    date_filter = request.GET.get('date', '')
-    
-    if not date_filter:
-        date_filter = date.today().strftime('%Y-%m-%d')
-    
-    # Get students based on class filter
-    if class_filter:
-        students = Student.objects.filter(student_class=class_filter).order_by('name')
-    else:
-        students = Student.objects.all().order_by('name')
+    """Attendance totals per student and per class over a date range, as a page or CSV"""
+    from datetime import timedelta
     
-    # Get attendance for the selected date
-    attendance_records = StudentAttendance.objects.filter(date=date_filter).select_related('student')
-    attendance_dict = {record.student.id: record.status for record in attendance_records}
+    # Get filter parameters; the last 30 days by default
+    today = date.today()
+    try:
+        end_date = datetime.strptime(request.GET.get('end_date', ''), '%Y-%m-%d').date()
+    except ValueError:
+        end_date = today
+    try:
+        start_date = datetime.strptime(request.GET.get('start_date', ''), '%Y-%m-%d').date()
+    except ValueError:
+        start_date = end_date - timedelta(days=29)
+    selected_class = request.GET.get('class', '')
+    selected_section = request.GET.get('section', '')
     
-    # Add attendance status to students
-    students_with_attendance = []
-    for student in students:
-        student.attendance_status = attendance_dict.get(student.id, 'not_marked')
-        students_with_attendance.append(student)
+    report = AttendanceReport(start_date, end_date, selected_class, selected_section)
+    if request.GET.get('format') == 'csv':
+        return streaming_csv_response(report.iter_csv_rows(), f'attendance_report_{start_date}_{end_date}.csv')
     
-    # Calculate statistics
-    total_students = len(students_with_attendance)
-    present_count = len([s for s in students_with_attendance if s.attendance_status == 'present'])
-    absent_count = len([s for s in students_with_attendance if s.attendance_status == 'absent'])
-    late_count = len([s for s in students_with_attendance if s.attendance_status == 'late'])
-    leave_count = len([s for s in students_with_attendance if s.attendance_status == 'leave'])
-    not_marked_count = len([s for s in students_with_attendance if s.attendance_status == 'not_marked'])
+    page = report.page(request.GET.get('page'))
+    totals = report.totals()
     
-    attendance_percentage = (present_count / total_students * 100) if total_students > 0 else 0
+    # Filters without the page number, for the pagination links
+    query = request.GET.copy()
+    query.pop('page', None)
     
-    # Get unique classes for filter
+    # Get unique classes and sections for filters
     classes = Student.objects.values_list('student_class', flat=True).distinct().order_by('student_class')
+    sections = Student.objects.values_list('section', flat=True).distinct().order_by('section')
     
     context = {
-        'students': students_with_attendance,
+        'students_with_attendance': page.rows,
+        'page_obj': page,
+        'class_summaries': report.by_class(),
+        'totals': totals,
+        'attendance_percentage': round(totals['attendance_percentage'], 1),
         'classes': classes,
-        'selected_class': class_filter,
-        'selected_date': date_filter,
-        'statistics': {
-            'total_students': total_students,
-            'present': present_count,
-            'absent': absent_count,
-            'late': late_count,
-            'leave': leave_count,
-            'not_marked': not_marked_count,
-            'attendance_percentage': round(attendance_percentage, 1)
-        }
+        'sections': sections,
+        'start_date': start_date.strftime('%Y-%m-%d'),
+        'end_date': end_date.strftime('%Y-%m-%d'),
+        'selected_class': selected_class,
+        'selected_section': selected_section,
+        'filter_query': query.urlencode(),
     }
     
     return render(request, 'attendance_report.html', context)
@@ -6752,8 +5618,7 @@ def convert_english_to_nepali_date_string(english_date, format_type='short'):
     if not english_date:
         return ''
     try:
-        nepali_date_dict = NepaliCalendar.english_to_nepali_date(english_date)
-        return NepaliCalendar.format_nepali_date(nepali_date_dict, format_type)
+        return NepaliCalendar.format_english_date(english_date, format_type)
     except:
         return str(english_date)
 
@@ -7431,6 +6296,7 @@ def public_school_calendar(request):
     
     return render(request, 'public_school_calendar.html', context)
 
+@cache_public_page
 def public_school_calendar(request):
     from .models import CalendarEvent
     import json
@@ -9,10 +9,7 @@ def check_admin_session(request):
     admin_id = request.session.get('admin_id')
     if not admin_id:
         return None
-    try:
-        return AdminLogin.objects.get(id=admin_id, is_active=True)
-    except AdminLogin.DoesNotExist:
-        return None
+    return AdminLogin.get_active(pk=admin_id)
 
 def admin_login_view(request):
     if request.method == 'POST':
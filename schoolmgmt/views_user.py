@@ -89,9 +89,8 @@ def user_dashboard(request):
         return redirect('user_login')
     
     # Get user info
-    try:
-        user = AdminLogin.objects.get(id=request.session.get('user_id'), is_active=True)
-    except AdminLogin.DoesNotExist:
+    user = AdminLogin.get_active(pk=request.session.get('user_id'))
+    if user is None:
         return redirect('user_login')
     
     # Get dashboard data based on permissions
@@ -115,7 +114,7 @@ def user_logout(request):
     return redirect('user_login')
 
 def student_login_view(request):
-    school_info = SchoolDetail.objects.first()
+    school_info = SchoolDetail.get_current_school()
     
     if request.method == 'POST':
         username = request.POST.get('username', '').strip()
@@ -177,7 +176,7 @@ def student_dashboard(request):
     
     context = {
         'student': student,
-        'school': SchoolDetail.objects.first(),
+        'school': SchoolDetail.get_current_school(),
     }
     
     return render(request, 'student_dashboard.html', context)
@@ -238,7 +237,7 @@ def student_attendance(request, student_id):
             'present_days': present_days,
             'absent_days': absent_days,
             'late_days': late_days,
-            'school': SchoolDetail.objects.first(),
+            'school': SchoolDetail.get_current_school(),
         }
         
         return render(request, 'student_attendance.html', context)
@@ -275,39 +274,22 @@ def student_performance(request, student_id):
             passed_subjects = sum(1 for mark in student_marks if mark.marks_obtained >= mark.subject.pass_marks)
             
             # Calculate overall grade
-            if overall_percentage >= 90:
-                overall_grade = 'A+'
-            elif overall_percentage >= 80:
-                overall_grade = 'A'
-            elif overall_percentage >= 70:
-                overall_grade = 'B+'
-            elif overall_percentage >= 60:
-                overall_grade = 'B'
-            elif overall_percentage >= 50:
-                overall_grade = 'C+'
-            elif overall_percentage >= 40:
-                overall_grade = 'C'
-            else:
-                overall_grade = 'D'
-            
-            # Calculate class ranking
-            from django.db.models import Sum, F
-            class_students = Marksheet.objects.filter(
-                student__student_class=student.student_class
-            ).values('student__name', 'student__reg_number').annotate(
-                total_marks=Sum('marks_obtained')
-            ).order_by('-total_marks')
+            from .grading import grade_for
+            overall_grade = grade_for(overall_percentage).grade
             
-            class_rank = 1
-            total_class_students = class_students.count()
-            for i, s in enumerate(class_students, 1):
-                if s['student__reg_number'] == student.reg_number:
-                    class_rank = i
-                    break
+            # Class rank comes from the stored per-exam rankings; the latest exam is shown
+            from .models import ExamRanking
+            ExamRanking.ensure_for_exams({mark.exam_id for mark in student_marks})
+            exam_rankings = list(student.exam_rankings.select_related('exam').order_by('-exam__exam_date', '-exam_id'))
+            latest_ranking = exam_rankings[0] if exam_rankings else None
+            class_rank = latest_ranking.class_rank if latest_ranking else 0
+            total_class_students = latest_ranking.class_size if latest_ranking else 0
         except:
             total_marks = total_possible = overall_percentage = total_subjects = passed_subjects = 0
             class_rank = total_class_students = 0
             overall_grade = 'N/A'
+            exam_rankings = []
+            latest_ranking = None
         
         context = {
             'student': student,
@@ -319,8 +301,10 @@ def student_performance(request, student_id):
             'passed_subjects': passed_subjects,
             'class_rank': class_rank,
             'total_class_students': total_class_students,
+            'exam_rankings': exam_rankings,
+            'latest_ranking': latest_ranking,
             'overall_grade': overall_grade,
-            'school': SchoolDetail.objects.first(),
+            'school': SchoolDetail.get_current_school(),
         }
         
         return render(request, 'student_performance.html', context)
@@ -357,7 +341,7 @@ def student_fees(request, student_id):
             'student': student,
             'fee_payments': fee_payments,
             'total_paid': total_paid,
-            'school': SchoolDetail.objects.first(),
+            'school': SchoolDetail.get_current_school(),
         }
         
         return render(request, 'student_fees.html', context)
@@ -405,7 +389,7 @@ def user_profile(request):
                                 )
                                 messages.success(request, f'Verification code sent to {student.father_email}')
                                 return render(request, 'user_profile.html', {
-                                    'school': SchoolDetail.objects.first(),
+                                    'school': SchoolDetail.get_current_school(),
                                     'show_verification_form': True,
                                     'student_id_temp': student.id
                                 })
@@ -447,7 +431,7 @@ def user_profile(request):
                 messages.error(request, 'Invalid verification code.')
     
     context = {
-        'school': SchoolDetail.objects.first(),
+        'school': SchoolDetail.get_current_school(),
     }
     
     return render(request, 'user_profile.html', context)
\ No newline at end of file